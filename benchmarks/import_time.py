@@ -0,0 +1,66 @@
+"""Measures how long `import pysometric` takes in a fresh interpreter.
+
+Each run starts a new Python process with `-X importtime` and reads the cumulative time
+reported for the top-level package, so the numbers exclude interpreter startup.
+
+Usage: python -m benchmarks.import_time [--runs N] [--json PATH]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+def import_time(module: str = "pysometric") -> tuple[float, bool]:
+    """Imports a module in a new interpreter, returning the seconds it took and whether
+    vsketch was loaded along with it."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {module}; print('vsketch' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6, result.stdout.strip() == "True"
+
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    runs = [import_time() for _ in range(args.runs)]
+    times = [seconds for seconds, _ in runs]
+    results = {
+        "benchmark": "import",
+        "runs": args.runs,
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "max_s": max(times),
+        "loads_vsketch": any(loads_vsketch for _, loads_vsketch in runs),
+    }
+
+    print(
+        f"import pysometric: median {results['median_s'] * 1e3:.1f} ms "
+        f"(min {results['min_s'] * 1e3:.1f} ms, max {results['max_s'] * 1e3:.1f} ms) "
+        f"over {args.runs} runs, vsketch loaded: {results['loads_vsketch']}"
+    )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
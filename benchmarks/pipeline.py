@@ -0,0 +1,260 @@
+"""Times each stage of the rendering pipeline on synthetic scenes of several sizes.
+
+Stages are measured separately, each on the output of the previous ones:
+
+    projection     projecting the vertices of every face to the screen
+    rotation       composing rotations and applying them to the vertices of every face
+    compile        compiling every child (groups and polygons), with texture fills cached
+    texture        generating every texture fill from scratch
+    clip           clipping the compiled geometries to the frame
+    occlude_*      hidden line removal, for each occlusion engine
+    scene_compile  a full Scene.compile() from cold caches
+    render_*       batching by layer and writing to SVG (and to vsketch when installed)
+
+Results can be saved as JSON and compared against a previous run, in which case the command
+fails when any stage is slower than the baseline by more than the given threshold.
+
+Usage: python -m benchmarks.pipeline [--scenes NAME ...] [--sizes N ...] [--repeat N]
+                                     [--json PATH] [--compare PATH] [--threshold RATIO]
+                                     [--min-time SECONDS]
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from math import radians
+from typing import Callable
+
+import numpy as np
+import shapely
+
+from pysometric import Axis, Rotation, Scene
+from pysometric.depth import flatten_faces
+from pysometric.fill import clear_hatch_cache
+from pysometric.layers import batch_by_layer
+from pysometric.matrix import compose_rotations, transform_points
+from pysometric.occlusion import OCCLUSION_ENGINES
+from pysometric.render import RenderableGeometry, project_points
+from pysometric.scene import _clip_to_frame, _flatten_compiled, render_to_sketch
+from pysometric.svg import write_svg
+from pysometric.texture import clear_texture_cache
+
+from .scenes import SCENES
+
+DEFAULT_SIZES = [16, 64, 256]
+
+
+def _time(fn: Callable, repeat: int, setup: Callable | None = None) -> dict:
+    """Runs `fn` `repeat` times, calling `setup` untimed before each run."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    return {"min_s": min(times), "median_s": statistics.median(times)}
+
+
+def _clear_caches():
+    clear_texture_cache()
+    clear_hatch_cache()
+
+
+def _copy(renderables: list[RenderableGeometry]) -> list[RenderableGeometry]:
+    return [RenderableGeometry(r.geometry, r.layer) for r in renderables]
+
+
+def benchmark_scene(scene: Scene, repeat: int) -> tuple[dict, dict]:
+    """Times every stage on a scene, returning the timings and some counts describing it."""
+    ctx = scene.render_context
+    children = scene.children
+    faces = [face for child in children for face in flatten_faces(child, ctx)]
+    vertices = np.concatenate([face.vertex_array for face in faces])
+    rotations = [
+        Rotation(Axis.Z, radians(30), (0, 0, 0)),
+        Rotation(Axis.X, radians(15), (0, 0, 0)),
+    ]
+    textures = [
+        (texture, shapely.Polygon(project_points(face.vertex_array, ctx)))
+        for face in faces
+        for texture in getattr(face, "textures", [])
+    ]
+
+    # Stage inputs in the order Scene.compile() produces them, from back to front
+    _clear_caches()
+    flattened = [
+        r for child in reversed(children) for r in _flatten_compiled(child.compile(ctx))
+    ]
+    clipped = _clip_to_frame(_copy(flattened), ctx)
+
+    stages = {
+        "projection": _time(lambda: project_points(vertices, ctx), repeat),
+        "rotation": _time(
+            lambda: transform_points(vertices, compose_rotations(rotations)), repeat
+        ),
+        "compile": _time(lambda: [child.compile(ctx) for child in children], repeat),
+        "texture": _time(
+            lambda: [texture.compile(polygon, ctx) for texture, polygon in textures],
+            repeat,
+            _clear_caches,
+        ),
+    }
+
+    copies = []
+    stages["clip"] = _time(
+        lambda: _clip_to_frame(copies.pop(), ctx),
+        repeat,
+        lambda: copies.append(_copy(flattened)),
+    )
+    for name, engine in OCCLUSION_ENGINES.items():
+        stages[f"occlude_{name}"] = _time(lambda: engine(clipped), repeat)
+
+    def cold_scene():
+        _clear_caches()
+        scene.invalidate()
+
+    stages["scene_compile"] = _time(scene.compile, repeat, cold_scene)
+    occluded = scene.compile()
+    stages["render_svg"] = _time(
+        lambda: write_svg(batch_by_layer(occluded), io.StringIO(), ctx.frame_bounds), repeat
+    )
+    try:
+        import vsketch
+    except ImportError:
+        pass
+    else:
+        stages["render_vsketch"] = _time(
+            lambda: render_to_sketch(batch_by_layer(occluded), vsketch.Vsketch()), repeat
+        )
+
+    counts = {
+        "children": len(children),
+        "faces": len(faces),
+        "textures": len(textures),
+        "geometries": len(clipped),
+        "output_vertices": int(
+            shapely.get_num_coordinates([r.geometry for r in occluded]).sum()
+        ),
+    }
+    return stages, counts
+
+
+def run(scenes: list[str], sizes: list[int], repeat: int) -> dict:
+    results = []
+    for name in scenes:
+        for size in sizes:
+            stages, counts = benchmark_scene(SCENES[name](size), repeat)
+            for stage, timing in stages.items():
+                results.append(
+                    {"scene": name, "size": size, "stage": stage, **counts, **timing}
+                )
+
+    return {"metadata": _metadata(repeat), "results": results}
+
+
+def _metadata(repeat: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "shapely": shapely.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+    }
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float, min_time: float
+) -> list[str]:
+    """Prints the ratio of every timing to the baseline, returning the regressed stages.
+
+    Stages faster than `min_time` seconds are too noisy to be reported as regressions.
+    """
+    previous = {(r["scene"], r["size"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    print(
+        f"\n{'scene':<16}{'size':>6}  {'stage':<16}"
+        f"{'baseline':>12}{'current':>12}{'ratio':>8}"
+    )
+    for result in results["results"]:
+        key = (result["scene"], result["size"], result["stage"])
+        if key not in previous:
+            continue
+
+        before, after = previous[key]["min_s"], result["min_s"]
+        ratio = after / before if before > 0 else float("inf")
+        regressed = ratio > threshold and after >= min_time
+        print(
+            f"{key[0]:<16}{key[1]:>6}  {key[2]:<16}"
+            f"{before * 1e3:>10.2f}ms{after * 1e3:>10.2f}ms{ratio:>8.2f}"
+            + (" !" if regressed else "")
+        )
+        if regressed:
+            regressions.append(" ".join(map(str, key)))
+
+    return regressions
+
+
+def _print_results(results: dict):
+    print(f"{'scene':<16}{'size':>6}{'faces':>7}  {'stage':<16}{'min':>12}{'median':>12}")
+    for r in results["results"]:
+        print(
+            f"{r['scene']:<16}{r['size']:>6}{r['faces']:>7}  {r['stage']:<16}"
+            f"{r['min_s'] * 1e3:>10.2f}ms{r['median_s'] * 1e3:>10.2f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenes", nargs="+", choices=sorted(SCENES), default=list(SCENES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="compare the results with a previous JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="slowdown ratio over the baseline reported as a regression",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.001,
+        help="seconds below which a stage is never reported as a regression",
+    )
+    args = parser.parse_args()
+
+    results = run(args.scenes, args.sizes, args.repeat)
+    _print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_time)
+
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) regressed: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
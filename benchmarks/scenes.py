@@ -0,0 +1,116 @@
+"""Synthetic scene generators used by the benchmarks.
+
+Every generator takes the number of objects to place and returns a Scene laid out on a square
+grid, with children sorted from front to back. The frame is slightly smaller than the scene, so
+that the objects along the edges are clipped. Generators are seeded and deterministic.
+"""
+from math import ceil, radians, sqrt
+
+import numpy as np
+import shapely
+
+from pysometric import (
+    Axis,
+    Box,
+    Circle,
+    FillTexture,
+    HatchTexture,
+    Plane,
+    Prism,
+    Rotation,
+    Scene,
+)
+
+FRAME_SIZE = 1000
+
+
+def _grid(count: int, spacing: float) -> tuple[np.ndarray, float]:
+    """Returns `count` grid positions centered on the origin, and the grid pitch that makes the
+    scene overflow the frame slightly."""
+    side = ceil(sqrt(count))
+    steps = (np.arange(side) - (side - 1) / 2) * spacing
+    xs, ys = np.meshgrid(steps, steps)
+    positions = np.column_stack([xs.ravel(), ys.ravel()])[:count]
+    grid_pitch = 1.2 * FRAME_SIZE / (sqrt(3) * spacing * side)
+    return positions, grid_pitch
+
+
+def _scene(children: list, grid_pitch: float, **options) -> Scene:
+    scene = Scene(shapely.box(0, 0, FRAME_SIZE, FRAME_SIZE), grid_pitch, children, **options)
+    scene.sort_children_by_depth()
+    return scene
+
+
+def box_grid(count: int, **options) -> Scene:
+    """Untextured unit boxes with gaps between them."""
+    positions, grid_pitch = _grid(count, 1.5)
+    return _scene([Box((x, y, 0)) for x, y in positions], grid_pitch, **options)
+
+
+def box_collection(count: int, **options) -> Scene:
+    """The boxes of box_grid, built at once with Box.many."""
+    positions, grid_pitch = _grid(count, 1.5)
+    origins = np.column_stack([positions, np.zeros(len(positions))])
+    return _scene([Box.many(origins)], grid_pitch, **options)
+
+
+def tile_map(count: int, **options) -> Scene:
+    """Touching boxes of random heights covering the ground, as in a tile map."""
+    rng = np.random.default_rng(0)
+    positions, grid_pitch = _grid(count, 1.0)
+    heights = rng.integers(1, 4, count) * 0.5
+    children = [Box((x, y, h / 2), 1, 1, h) for (x, y), h in zip(positions, heights)]
+    return _scene(children, grid_pitch, **options)
+
+
+def prism_field(count: int, **options) -> Scene:
+    """Overlapping prisms with random side counts and heights."""
+    rng = np.random.default_rng(0)
+    positions, grid_pitch = _grid(count, 0.8)
+    children = [
+        Prism((x, y, 0), int(sides), 0.6, height)
+        for (x, y), sides, height in zip(
+            positions, rng.integers(3, 9, count), rng.uniform(0.5, 2.5, count)
+        )
+    ]
+    return _scene(children, grid_pitch, **options)
+
+
+def rotated_circles(count: int, **options) -> Scene:
+    """Hatched circles rotated out of the ground plane by random angles."""
+    rng = np.random.default_rng(0)
+    positions, grid_pitch = _grid(count, 1.2)
+    hatch = [HatchTexture(4)]
+    children = [
+        Circle(
+            (x, y, 0.5),
+            0.5,
+            Plane.XY,
+            textures=hatch,
+            rotations=[Rotation(Axis.X, radians(angle), (x, y, 0.5))],
+        )
+        for (x, y), angle in zip(positions, rng.uniform(-60, 60, count))
+    ]
+    return _scene(children, grid_pitch, **options)
+
+
+def hatched_faces(count: int, **options) -> Scene:
+    """Touching boxes with dense hatches on every visible face and solid fills on some."""
+    positions, grid_pitch = _grid(count, 1.0)
+    hatch = {"textures": [HatchTexture(1.5)]}
+    fill = {"textures": [FillTexture(layer=2)]}
+    children = [
+        Box((x, y, 0), top=hatch, left=hatch, right=fill if i % 3 == 0 else hatch)
+        for i, (x, y) in enumerate(positions)
+    ]
+    return _scene(children, grid_pitch, **options)
+
+
+SCENES = {
+    "box_grid": box_grid,
+    "box_collection": box_collection,
+    "tile_map": tile_map,
+    "prism_field": prism_field,
+    "rotated_circles": rotated_circles,
+    "hatched_faces": hatched_faces,
+}
@@ -27,10 +27,10 @@ class Example01Sketch(vsketch.SketchClass):
 
         frame = shapely.box(0, 0, vsk.width, vsk.height)
         scene = pyso.Scene(frame, self.unit_size, self.create_boxes())
-        scene.render(vsk)
+        scene.render(vsk, merge_lines=True, sort_paths=True)
 
     def finalize(self, vsk: vsketch.Vsketch) -> None:
-        vsk.vpype("linemerge linesimplify reloop linesort")
+        vsk.vpype("linesimplify reloop")
 
 
 if __name__ == "__main__":
@@ -38,10 +38,10 @@ class Example02Sketch(vsketch.SketchClass):
             ],
         )
         scene = psm.Scene(frame, self.unit_size, [pyramid, cube, prism])
-        scene.render(vsk)
+        scene.render(vsk, merge_lines=True, sort_paths=True)
 
     def finalize(self, vsk: vsketch.Vsketch) -> None:
-        vsk.vpype("linemerge linesimplify reloop linesort")
+        vsk.vpype("linesimplify reloop")
 
 
 if __name__ == "__main__":
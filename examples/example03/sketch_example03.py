@@ -21,10 +21,10 @@ class Example03Sketch(vsketch.SketchClass):
             circles.append(psm.Circle((0, 0, z), circle_radius, psm.Plane.XY, 96))
 
         scene = psm.Scene(frame, self.unit_size, circles)
-        scene.render(vsk)
+        scene.render(vsk, merge_lines=True, sort_paths=True)
 
     def finalize(self, vsk: vsketch.Vsketch) -> None:
-        vsk.vpype("linemerge linesimplify reloop linesort")
+        vsk.vpype("linesimplify reloop")
 
 
 if __name__ == "__main__":
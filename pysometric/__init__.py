@@ -1,8 +1,15 @@
 from .axis import Axis
+from .collection import FaceCollection
+from .diskcache import DiskCache
+from .instance import InstancedGroup
 from .plane import Plane
 from .scene import DIMETRIC_ANGLE, Scene
+from .scenefile import load_scene, save_scene
 from .shape import Circle, Group, Polygon, Rectangle, RegularPolygon, Renderable, Rotation
+from .stats import CompileStats
+from .svg import SvgWriter, write_svg
 from .texture import FillTexture, HatchTexture
+from .tiling import TiledScene
 from .vector import Vector2, Vector3
 from .volume import Box, Prism, Pyramid
 
@@ -10,10 +17,14 @@ __all__ = [
     "Axis",
     "Box",
     "Circle",      
+    "CompileStats",
     "DIMETRIC_ANGLE",
+    "DiskCache",
+    "FaceCollection",
     "Group",
     "FillTexture",
     "HatchTexture",
+    "InstancedGroup",
     "Plane",
     "Polygon",
     "Prism",
@@ -23,7 +34,12 @@ __all__ = [
     "Renderable",
     "Rotation",
     "Scene",
+    "SvgWriter",
+    "TiledScene",
     "Vector2",
     "Vector3",
+    "load_scene",
+    "save_scene",
+    "write_svg",
     "DIMETRIC_ANGLE",
 ]
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, NamedTuple
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+    weight: float
+
+
+class LRUCache:
+    """A thread-safe mapping that keeps at most `maxsize` of its most recently used entries.
+
+    A `maxsize` of 0 disables the cache entirely. When a `weigh` function is given, entries
+    are additionally evicted until the summed weight of all entries is at most `maxweight`,
+    which allows bounding memory for values of very different sizes.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        maxweight: float | None = None,
+        weigh: Callable[[Any], float] | None = None,
+    ) -> None:
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._weights: dict[Hashable, float] = {}
+        self._lock = Lock()
+        self._maxsize = maxsize
+        self._maxweight = maxweight
+        self._weigh = weigh
+        self._weight = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default=None) -> Any:
+        """Returns the entry for the given key, marking it as most recently used."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+
+            self._misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        """Stores an entry, evicting the least recently used entries beyond the size limit."""
+        with self._lock:
+            if key in self._entries:
+                self._weight -= self._weights.pop(key, 0)
+
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self._weigh is not None:
+                self._weights[key] = self._weigh(value)
+                self._weight += self._weights[key]
+
+            self._evict()
+
+    def clear(self):
+        """Removes all entries and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self._weight = 0
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> CacheInfo:
+        """Returns the hit and miss statistics of the cache."""
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._maxsize, len(self._entries), self._weight
+            )
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize: int):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    @property
+    def maxweight(self) -> float | None:
+        return self._maxweight
+
+    @maxweight.setter
+    def maxweight(self, maxweight: float | None):
+        with self._lock:
+            self._maxweight = maxweight
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > max(self._maxsize, 0)
+            or (self._maxweight is not None and self._weight > self._maxweight)
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self._weight -= self._weights.pop(key, 0)
@@ -0,0 +1,526 @@
+from typing import Sequence
+
+import numpy as np
+import shapely
+
+from .plane import Plane
+from .render import RenderableGeometry, RenderContext, project_points
+from .shape import _PLANE_AXES, Polygon
+from .texture import Texture
+
+# Signs of the (horizontal, vertical) half extents of each corner of a rectangle, in the
+# same clockwise order as _rect_vertices
+_RECT_SIGNS = {
+    Plane.YZ: np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)]),
+    Plane.XZ: np.array([(-1, -1), (-1, 1), (1, 1), (1, -1)]),
+    Plane.XY: np.array([(-1, -1), (-1, 1), (1, 1), (1, -1)]),
+}
+
+
+def _rect_vertices_many(
+    origins: np.ndarray, widths: np.ndarray, heights: np.ndarray, orientation: Plane
+) -> np.ndarray:
+    """Vectorized _rect_vertices: returns the (N, 4, 3) vertices of N rectangles."""
+    x_axis, y_axis = _PLANE_AXES[orientation]
+    signs = _RECT_SIGNS[orientation]
+    vertices = np.repeat(origins[:, np.newaxis, :], 4, axis=1)
+    vertices[:, :, x_axis] += signs[:, 0] * (widths[:, np.newaxis] / 2.0)
+    vertices[:, :, y_axis] += signs[:, 1] * (heights[:, np.newaxis] / 2.0)
+    return vertices
+
+
+def _regular_polygon_vertices_many(
+    origins: np.ndarray, num_vertices: int, radii: np.ndarray, orientation: Plane
+) -> np.ndarray:
+    """Vectorized _regular_polygon_vertices for polygons with the same number of vertices.
+
+    Returns the (N, num_vertices, 3) vertices of N polygons.
+    """
+    angles = np.arange(num_vertices) * (2 * np.pi / num_vertices)
+    vertices = np.zeros((len(origins), num_vertices, 3))
+    x_axis, y_axis = _PLANE_AXES[orientation]
+    vertices[:, :, x_axis] = np.cos(angles) * radii[:, np.newaxis]
+    vertices[:, :, y_axis] = np.sin(angles) * radii[:, np.newaxis]
+    return vertices + origins[:, np.newaxis, :]
+
+
+def _ragged_gather(order: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Returns the indices that restore runs of `counts` items stored in `order` order.
+
+    The runs of items 0..N-1 are stored one after the other in the order given by `order`;
+    the returned indices gather them back into the order 0..N-1.
+    """
+    stored_starts = np.empty(len(order), dtype=np.intp)
+    stored_starts[order] = np.concatenate([[0], np.cumsum(counts[order])[:-1]])
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return np.arange(counts.sum()) + np.repeat(stored_starts - starts, counts)
+
+
+def _column(values, count: int, dtype) -> np.ndarray:
+    """Broadcasts a scalar or per-item sequence to a column of `count` values."""
+    return np.broadcast_to(np.asarray(values, dtype=dtype), (count,)).copy()
+
+
+def _per_face(values, count: int, faces: int, dtype) -> np.ndarray:
+    """Broadcasts values such as layers or texture set ids to a (count, faces) array.
+
+    A scalar or 1D array gives the same value to every face of each item, while a 2D array
+    gives a value per face.
+    """
+    values = np.asarray(values, dtype=dtype)
+    if values.ndim < 2:
+        values = np.broadcast_to(values, (count,))[:, np.newaxis]
+
+    return np.broadcast_to(values, (count, faces)).copy()
+
+
+class FaceCollection:
+    """A compact renderable holding the polygon faces of many volumes as flat arrays.
+
+    Faces are stored as one array of vertices with per-face sizes, volumes, layers and
+    texture set ids, so that very large numbers of shapes can be built and compiled without
+    a Python object per shape. All faces are projected in a single batch when compiled.
+
+    Volumes are drawn back to front by the depth of the center of their 3D bounds, as in
+    Scene.sort_children_by_depth(), so nearer volumes occlude farther ones regardless of
+    their order in the collection. Within a volume, faces are drawn by ascending rank, and
+    faces of equal rank back to front, as in the draw order of Box, Prism and Pyramid. The
+    faces of volumes flagged in `cull_back_faces` that point away from the viewer are
+    skipped, as for Prism and Pyramid.
+
+    Parameters
+    ----------
+    vertices : np.ndarray
+        The (V, 3) vertices of all faces, face after face.
+    face_sizes : np.ndarray
+        The number of vertices of each face.
+    face_volumes : np.ndarray
+        The index of the volume that each face belongs to, in ascending order.
+    face_layers : np.ndarray | int
+        The layer of each face.
+    face_textures : np.ndarray | None
+        The index in `texture_sets` of the textures applied to each face, or -1 for none.
+    texture_sets : Sequence[Sequence[Texture]]
+        The distinct lists of textures applied to faces.
+    face_ranks : np.ndarray | None
+        The rank of each face in the draw order of its volume, or None to draw the faces of
+        each volume in the order they are given.
+    cull_back_faces : np.ndarray | bool
+        Whether back faces are culled, for each volume.
+    """
+
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        face_sizes: np.ndarray,
+        face_volumes: np.ndarray,
+        face_layers: np.ndarray | int = 1,
+        face_textures: np.ndarray | None = None,
+        texture_sets: Sequence[Sequence[Texture]] = (),
+        face_ranks: np.ndarray | None = None,
+        cull_back_faces: np.ndarray | bool = False,
+    ) -> None:
+        self._vertices = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self._face_sizes = np.asarray(face_sizes, dtype=np.intp).reshape(-1)
+        self._face_volumes = np.asarray(face_volumes, dtype=np.intp).reshape(-1)
+        face_count = len(self._face_sizes)
+        self._face_layers = _column(face_layers, face_count, np.int64)
+        self._face_textures = _column(
+            -1 if face_textures is None else face_textures, face_count, np.intp
+        )
+        self._texture_sets = [list(textures) for textures in texture_sets]
+        self._face_ranks = _column(
+            np.arange(face_count) if face_ranks is None else face_ranks, face_count, np.intp
+        )
+        volume_count = int(self._face_volumes[-1]) + 1 if face_count else 0
+        self._cull_back_faces = _column(cull_back_faces, volume_count, bool)
+
+        if self._face_sizes.sum() != len(self._vertices):
+            raise ValueError("Face sizes do not match the number of vertices")
+        if np.any(np.diff(self._face_volumes) < 0):
+            raise ValueError("Faces must be grouped by volume in ascending order")
+
+        for array in (
+            self._vertices,
+            self._face_sizes,
+            self._face_volumes,
+            self._face_layers,
+            self._face_textures,
+            self._face_ranks,
+            self._cull_back_faces,
+        ):
+            array.flags.writeable = False
+
+    @classmethod
+    def concatenate(cls, collections: Sequence["FaceCollection"]) -> "FaceCollection":
+        """Merges collections into one, so that all of their volumes are ordered together."""
+        if not collections:
+            return cls(np.empty((0, 3)), [], [])
+        if len(collections) == 1:
+            return collections[0]
+
+        volume_offsets = np.cumsum([0] + [len(c) for c in collections])
+        texture_offsets = np.cumsum([0] + [len(c.texture_sets) for c in collections])
+        return cls(
+            np.concatenate([c._vertices for c in collections]),
+            np.concatenate([c._face_sizes for c in collections]),
+            np.concatenate(
+                [c._face_volumes + offset for c, offset in zip(collections, volume_offsets)]
+            ),
+            np.concatenate([c._face_layers for c in collections]),
+            np.concatenate(
+                [
+                    np.where(c._face_textures < 0, -1, c._face_textures + offset)
+                    for c, offset in zip(collections, texture_offsets)
+                ]
+            ),
+            [textures for c in collections for textures in c.texture_sets],
+            np.concatenate([c._face_ranks for c in collections]),
+            np.concatenate([c._cull_back_faces for c in collections]),
+        )
+
+    def __len__(self) -> int:
+        """The number of volumes in the collection."""
+        return len(self._cull_back_faces)
+
+    @property
+    def vertex_array(self) -> np.ndarray:
+        """The (V, 3) array of the vertices of all faces."""
+        return self._vertices
+
+    @property
+    def face_sizes(self) -> np.ndarray:
+        return self._face_sizes
+
+    @property
+    def face_volumes(self) -> np.ndarray:
+        return self._face_volumes
+
+    @property
+    def face_layers(self) -> np.ndarray:
+        return self._face_layers
+
+    @property
+    def face_textures(self) -> np.ndarray:
+        return self._face_textures
+
+    @property
+    def texture_sets(self) -> list[list[Texture]]:
+        return self._texture_sets
+
+    @property
+    def face_ranks(self) -> np.ndarray:
+        return self._face_ranks
+
+    @property
+    def cull_back_faces(self) -> np.ndarray:
+        return self._cull_back_faces
+
+    def draw_order(self, render_context: RenderContext) -> list[Polygon]:
+        """Returns the visible faces as Polygons, from back to front.
+
+        Building Polygons costs a Python object per face, so compile() avoids this; it is
+        used where faces must be handled individually, e.g. for depth sorting a Scene.
+        """
+        starts = np.concatenate([[0], np.cumsum(self._face_sizes)[:-1]])
+        return [
+            Polygon(
+                self._vertices[starts[face] : starts[face] + self._face_sizes[face]],
+                self.__textures(face),
+                [],
+                int(self._face_layers[face]),
+            )
+            for face in self.__visible_faces(
+                render_context, project_points(self._vertices, render_context)
+            )
+        ]
+
+    def compile(self, render_context: RenderContext) -> list[RenderableGeometry]:
+        projected = project_points(self._vertices, render_context)
+        faces = self.__visible_faces(render_context, projected)
+        if len(faces) == 0:
+            return []
+
+        # Only the faces that are drawn are built into polygons
+        sizes = self._face_sizes[faces]
+        starts = np.concatenate([[0], np.cumsum(self._face_sizes)[:-1]])
+        gathered_starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        vertices = np.arange(sizes.sum()) + np.repeat(starts[faces] - gathered_starts, sizes)
+        rings = shapely.linearrings(
+            projected[vertices], indices=np.repeat(np.arange(len(faces)), sizes)
+        )
+        polygons = shapely.polygons(rings)
+
+        compiled = []
+        for polygon2d, face in zip(polygons, faces.tolist()):
+            compiled.append(RenderableGeometry(polygon2d, int(self._face_layers[face])))
+            for texture in self.__textures(face):
+                compiled.append(texture.compile(polygon2d, render_context))
+
+        return compiled
+
+    def __textures(self, face: int) -> list[Texture]:
+        texture_id = self._face_textures[face]
+        return self._texture_sets[texture_id] if texture_id >= 0 else []
+
+    def __visible_faces(
+        self, render_context: RenderContext, projected: np.ndarray
+    ) -> np.ndarray:
+        """Returns the indices of the faces to draw, with volumes ordered back to front.
+
+        `projected` holds the screen coordinates of the vertices. When the context clips to
+        its frame, the faces of volumes whose screen bounds miss the frame are skipped.
+        """
+        face_count = len(self._face_sizes)
+        if face_count == 0:
+            return np.empty(0, dtype=np.intp)
+
+        starts = np.concatenate([[0], np.cumsum(self._face_sizes)[:-1]])
+        vertex_faces = np.repeat(np.arange(face_count), self._face_sizes)
+        vertex_volumes = self._face_volumes[vertex_faces]
+        volume_starts = np.flatnonzero(np.r_[True, np.diff(vertex_volumes) != 0])
+        volumes = vertex_volumes[volume_starts]
+
+        # Volumes are ordered by the depth of the center of their 3D bounds along the view
+        # direction, as in depth.volume_depth_keys(), so that the nearest are drawn last
+        centers = (
+            np.minimum.reduceat(self._vertices, volume_starts)
+            + np.maximum.reduceat(self._vertices, volume_starts)
+        ) / 2.0
+        volume_keys = np.full(len(self), -np.inf)
+        volume_keys[volumes] = centers @ render_context.view_direction
+        volume_order = np.empty(len(self), dtype=np.intp)
+        volume_order[np.argsort(volume_keys, kind="stable")] = np.arange(len(self))
+
+        # Faces within a volume that reach lower on screen appear closer
+        face_keys = np.maximum.reduceat(projected[:, 1], starts)
+
+        visible = np.ones(face_count, dtype=bool)
+        if render_context.clip_to_frame:
+            min_x, min_y, max_x, max_y = render_context.frame_bounds
+            lower = np.minimum.reduceat(projected, volume_starts)
+            upper = np.maximum.reduceat(projected, volume_starts)
+            outside = np.zeros(len(self), dtype=bool)
+            outside[volumes] = (
+                (upper[:, 0] < min_x)
+                | (upper[:, 1] < min_y)
+                | (lower[:, 0] > max_x)
+                | (lower[:, 1] > max_y)
+            )
+            visible &= ~outside[self._face_volumes]
+
+        culled = self._cull_back_faces[self._face_volumes]
+        if culled.any():
+            # Newell normals, oriented away from the center of their volume
+            following = np.arange(len(self._vertices)) + 1
+            following[starts + self._face_sizes - 1] = starts
+            normals = np.add.reduceat(
+                np.cross(self._vertices, self._vertices[following]), starts
+            )
+            face_centers = np.add.reduceat(self._vertices, starts) / self._face_sizes[:, None]
+            volume_centers = np.zeros((len(self), 3))
+            volume_centers[volumes] = (
+                np.add.reduceat(self._vertices, volume_starts)
+                / np.diff(np.r_[volume_starts, len(self._vertices)])[:, None]
+            )
+            outward = np.einsum(
+                "ij,ij->i", normals, face_centers - volume_centers[self._face_volumes]
+            )
+            normals[outward < 0] *= -1
+
+            view_direction = render_context.view_direction
+            tolerance = (
+                1e-9 * np.linalg.norm(normals, axis=1) * np.linalg.norm(view_direction)
+            )
+            visible &= ~culled | (normals @ view_direction >= -tolerance)
+
+        order = np.lexsort(
+            (
+                np.arange(face_count),
+                face_keys,
+                self._face_ranks,
+                volume_order[self._face_volumes],
+            )
+        )
+        return order[visible[order]]
+
+
+def box_collection(
+    origins: np.ndarray,
+    sizes: np.ndarray,
+    layers: np.ndarray | int = 1,
+    textures: np.ndarray | None = None,
+    texture_sets: Sequence[Sequence[Texture]] = (),
+) -> FaceCollection:
+    """Builds the faces of many boxes at once, matching Box.
+
+    `sizes` holds the (width, depth, height) of each box. `layers` and `textures` (texture
+    set ids, -1 for none) are given per box or, as (N, 3) arrays, for the (top, left, right)
+    faces of each box.
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    count = len(origins)
+    sizes = np.broadcast_to(np.asarray(sizes, dtype=np.float64), (count, 3))
+    width, depth, height = sizes[:, 0], sizes[:, 1], sizes[:, 2]
+    offsets = np.zeros((count, 3))
+
+    offsets[:, 0] = -width / 2.0
+    left = _rect_vertices_many(origins + offsets, depth, height, Plane.YZ)
+    offsets[:, 0], offsets[:, 1] = 0, -depth / 2.0
+    right = _rect_vertices_many(origins + offsets, width, height, Plane.XZ)
+    offsets[:, 1], offsets[:, 2] = 0, height / 2.0
+    top = _rect_vertices_many(origins + offsets, width, depth, Plane.XY)
+
+    # Faces are stored in draw order: left, right, top
+    kinds = [1, 2, 0]
+    return FaceCollection(
+        np.stack([left, right, top], axis=1),
+        np.full(3 * count, 4),
+        np.repeat(np.arange(count), 3),
+        _per_face(layers, count, 3, np.int64)[:, kinds].reshape(-1),
+        _per_face(-1 if textures is None else textures, count, 3, np.intp)[:, kinds].reshape(-1),
+        texture_sets,
+        np.tile([0, 1, 2], count),
+        False,
+    )
+
+
+def prism_collection(
+    origins: np.ndarray,
+    sides: np.ndarray | int,
+    radii: np.ndarray | float = 1,
+    heights: np.ndarray | float = 1,
+    layers: np.ndarray | int = 1,
+    textures: np.ndarray | None = None,
+    texture_sets: Sequence[Sequence[Texture]] = (),
+) -> FaceCollection:
+    """Builds the faces of many prisms at once, matching Prism.
+
+    `layers` and `textures` (texture set ids, -1 for none) are given per prism or, as
+    (N, 3) arrays, for the (top, bottom, sides) faces of each prism.
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    count = len(origins)
+    sides = _column(sides, count, np.intp)
+    radii = _column(radii, count, np.float64)
+    heights = _column(heights, count, np.float64)
+    layers = _per_face(layers, count, 3, np.int64)
+    ids = _per_face(-1 if textures is None else textures, count, 3, np.intp)
+
+    # Prisms are built in batches of equal side counts, then put back in their order
+    by_sides = np.argsort(sides, kind="stable")
+    vertex_parts, size_parts, layer_parts, texture_parts, rank_parts = [], [], [], [], []
+    for num_sides in np.unique(sides).tolist():
+        batch = by_sides[sides[by_sides] == num_sides]
+        centers = origins[batch].copy()
+        centers[:, 2] += heights[batch] / 2
+        top = _regular_polygon_vertices_many(centers, num_sides, radii[batch], Plane.XY)
+        centers[:, 2] = origins[batch, 2] - heights[batch] / 2
+        bottom = _regular_polygon_vertices_many(centers, num_sides, radii[batch], Plane.XY)
+
+        following = (np.arange(num_sides) + 1) % num_sides
+        side_faces = np.stack(
+            [top, top[:, following], bottom[:, following], bottom], axis=2
+        ).reshape(len(batch), -1, 3)
+
+        vertex_parts.append(np.concatenate([bottom, side_faces, top], axis=1).reshape(-1, 3))
+        size_parts.append(np.tile([num_sides] + [4] * num_sides + [num_sides], len(batch)))
+        rank_parts.append(np.tile([0] + [1] * num_sides + [2], len(batch)))
+        # Faces are stored as bottom, sides, top
+        kinds = [1] + [2] * num_sides + [0]
+        layer_parts.append(layers[batch][:, kinds].reshape(-1))
+        texture_parts.append(ids[batch][:, kinds].reshape(-1))
+
+    face_counts = sides + 2
+    vertices = np.concatenate(vertex_parts) if vertex_parts else np.empty((0, 3))
+    face_sizes = np.concatenate(size_parts) if size_parts else np.empty(0, np.intp)
+    face_layers = np.concatenate(layer_parts) if layer_parts else np.empty(0, np.int64)
+    face_textures = np.concatenate(texture_parts) if texture_parts else np.empty(0, np.intp)
+    face_ranks = np.concatenate(rank_parts) if rank_parts else np.empty(0, np.intp)
+    if np.any(by_sides != np.arange(count)):
+        vertices = vertices[_ragged_gather(by_sides, 6 * sides)]
+        faces = _ragged_gather(by_sides, face_counts)
+        face_sizes, face_layers, face_textures, face_ranks = (
+            face_sizes[faces],
+            face_layers[faces],
+            face_textures[faces],
+            face_ranks[faces],
+        )
+
+    return FaceCollection(
+        vertices,
+        face_sizes,
+        np.repeat(np.arange(count), face_counts),
+        face_layers,
+        face_textures,
+        texture_sets,
+        face_ranks,
+        True,
+    )
+
+
+def pyramid_collection(
+    origins: np.ndarray,
+    sizes: np.ndarray,
+    layers: np.ndarray | int = 1,
+    textures: np.ndarray | None = None,
+    texture_sets: Sequence[Sequence[Texture]] = (),
+) -> FaceCollection:
+    """Builds the faces of many pyramids at once, matching Pyramid.
+
+    `sizes` holds the (width, depth, height) of each pyramid. `layers` and `textures`
+    (texture set ids, -1 for none) are given per pyramid or, as (N, 4) arrays, for each side
+    face. As with Pyramid, they only apply to the sides.
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    count = len(origins)
+    sizes = np.broadcast_to(np.asarray(sizes, dtype=np.float64), (count, 3))
+    bottom = _rect_vertices_many(origins, sizes[:, 0], sizes[:, 1], Plane.XY)
+    peaks = origins.copy()
+    peaks[:, 2] += sizes[:, 2]
+
+    following = (np.arange(4) + 1) % 4
+    peak_column = np.repeat(peaks[:, np.newaxis, :], 4, axis=1)
+    side_faces = np.stack([bottom, bottom[:, following], peak_column], axis=2)
+
+    face_layers = np.ones((count, 5), dtype=np.int64)
+    face_layers[:, 1:] = _per_face(layers, count, 4, np.int64)
+    face_textures = np.full((count, 5), -1, dtype=np.intp)
+    face_textures[:, 1:] = _per_face(-1 if textures is None else textures, count, 4, np.intp)
+
+    return FaceCollection(
+        np.concatenate([bottom, side_faces.reshape(count, -1, 3)], axis=1),
+        np.tile([4, 3, 3, 3, 3], count),
+        np.repeat(np.arange(count), 5),
+        face_layers.reshape(-1),
+        face_textures.reshape(-1),
+        texture_sets,
+        np.tile([0, 1, 1, 1, 1], count),
+        True,
+    )
+
+
+def polygon_collection(
+    vertices: np.ndarray,
+    sizes: np.ndarray,
+    layers: np.ndarray | int = 1,
+    textures: np.ndarray | None = None,
+    texture_sets: Sequence[Sequence[Texture]] = (),
+) -> FaceCollection:
+    """Builds many polygons at once, each drawn as a volume of its own.
+
+    `vertices` holds the vertices of all polygons, one after the other, and `sizes` the
+    number of vertices of each polygon.
+    """
+    sizes = np.asarray(sizes, dtype=np.intp).reshape(-1)
+    count = len(sizes)
+    return FaceCollection(
+        vertices,
+        sizes,
+        np.arange(count),
+        _column(layers, count, np.int64),
+        _column(-1 if textures is None else textures, count, np.intp),
+        texture_sets,
+        None,
+        False,
+    )
@@ -0,0 +1,285 @@
+import heapq
+
+import numpy as np
+import shapely
+
+from .collection import FaceCollection
+from .instance import InstancedGroup
+from .render import RenderContext, project_points
+from .shape import Group, Renderable
+
+
+def depth_keys(
+    vertex_arrays: list[np.ndarray], render_context: RenderContext
+) -> np.ndarray:
+    """Computes a depth key for each (N, 3) array of vertices in a single batch.
+
+    The key is the largest projected screen y of the vertices: the lower a shape reaches on
+    screen, the closer it appears to the viewer. Ordering by ascending key therefore orders
+    shapes from back to front. Arrays without vertices are placed at the very back.
+    """
+    keys = np.full(len(vertex_arrays), -np.inf)
+    sizes = np.array([len(vertices) for vertices in vertex_arrays], dtype=np.intp)
+    non_empty = np.flatnonzero(sizes)
+    if len(non_empty) == 0:
+        return keys
+
+    vertices = np.concatenate([vertex_arrays[i] for i in non_empty])
+    projection_y = render_context.projection_matrix[1]
+    screen_y = vertices @ projection_y + render_context.origin[1]
+    offsets = np.concatenate([[0], np.cumsum(sizes[non_empty])[:-1]])
+    keys[non_empty] = np.maximum.reduceat(screen_y, offsets)
+
+    return keys
+
+
+def view_depth_keys(
+    vertex_arrays: list[np.ndarray], render_context: RenderContext
+) -> np.ndarray:
+    """Computes the distance towards the viewer of the centroid of each array of vertices.
+
+    Unlike depth_keys, this measures true isometric depth in 3D. It is only a heuristic for
+    faces of different sizes (a large floor is centered behind a small box resting on it);
+    painter_order() uses it to break ties. Ascending keys order shapes from back to front.
+    Arrays without vertices are placed at the very back.
+    """
+    keys = np.full(len(vertex_arrays), -np.inf)
+    sizes = np.array([len(vertices) for vertices in vertex_arrays], dtype=np.intp)
+    non_empty = np.flatnonzero(sizes)
+    if len(non_empty) == 0:
+        return keys
+
+    vertices = np.concatenate([vertex_arrays[i] for i in non_empty])
+    distances = vertices @ render_context.view_direction
+    offsets = np.concatenate([[0], np.cumsum(sizes[non_empty])[:-1]])
+    keys[non_empty] = np.add.reduceat(distances, offsets) / sizes[non_empty]
+
+    return keys
+
+
+def _ragged_indices(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenates the index ranges [start, start + count) of every run."""
+    ends = np.cumsum(counts)
+    return np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - ends + counts, counts)
+
+
+def _occlusion_edges(
+    vertex_arrays: list[np.ndarray], render_context: RenderContext
+) -> tuple[np.ndarray, np.ndarray]:
+    """Finds pairs of planar faces that overlap on screen and which of each pair is behind.
+
+    Returns two arrays of face indices: each face in the first must be drawn before the
+    face at the same position in the second. Each pair is ordered with Newell's separating
+    plane tests: a face is behind another if it lies entirely behind the other's plane, or
+    the other lies entirely in front of its own. When neither plane separates the faces
+    (they intersect), the one nearer the viewer at a point where they overlap on screen is
+    drawn last. Faces that are not planar polygons are left out.
+    """
+    empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp))
+    sizes = np.array([len(vertices) for vertices in vertex_arrays], dtype=np.intp)
+    faces = np.flatnonzero(sizes >= 3)
+    if len(faces) < 2:
+        return empty
+
+    vertices = np.concatenate([vertex_arrays[i] for i in faces])
+    face_sizes = sizes[faces]
+    starts = np.concatenate([[0], np.cumsum(face_sizes)[:-1]])
+    vertex_faces = np.repeat(np.arange(len(faces)), face_sizes)
+
+    # Newell normals, turned towards the viewer
+    following = np.arange(len(vertices)) + 1
+    following[starts + face_sizes - 1] = starts
+    normals = np.add.reduceat(np.cross(vertices, vertices[following]), starts)
+    lengths = np.linalg.norm(normals, axis=1)
+    normals[lengths > 0] /= lengths[lengths > 0, np.newaxis]
+    view_direction = render_context.view_direction
+    facing = normals @ view_direction
+    normals[facing < 0] *= -1
+    centers = np.add.reduceat(vertices, starts) / face_sizes[:, np.newaxis]
+
+    # Only planar faces that are not seen edge-on have a plane to test against
+    tolerance = 1e-9 * max(1.0, float(np.abs(vertices).max()))
+    offsets = np.einsum(
+        "ij,ij->i", vertices - centers[vertex_faces], normals[vertex_faces]
+    )
+    usable = np.flatnonzero(
+        (lengths > 0)
+        & (np.abs(facing) > 1e-9 * np.linalg.norm(view_direction))
+        & (np.maximum.reduceat(np.abs(offsets), starts) <= tolerance)
+    )
+    if len(usable) < 2:
+        return empty
+
+    rings = shapely.linearrings(
+        project_points(vertices, render_context), indices=vertex_faces
+    )
+    outlines = shapely.polygons(rings)[usable]
+    first, second = shapely.STRtree(outlines).query(outlines, predicate="intersects")
+    keep = first < second
+    first, second = first[keep], second[keep]
+    # Faces that only share edges or corners do not hide each other
+    keep = shapely.relate_pattern(outlines[first], outlines[second], "T********")
+    first, second = usable[first[keep]], usable[second[keep]]
+    if len(first) == 0:
+        return empty
+
+    def plane_sides(a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Whether all vertices of each face b lie in front of, or behind, the plane of a."""
+        counts = face_sizes[b]
+        pair_vertices = vertices[_ragged_indices(starts[b], counts)]
+        pairs = np.repeat(np.arange(len(a)), counts)
+        distances = np.einsum(
+            "ij,ij->i", pair_vertices - centers[a][pairs], normals[a][pairs]
+        )
+        pair_starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        return (
+            np.minimum.reduceat(distances, pair_starts) >= -tolerance,
+            np.maximum.reduceat(distances, pair_starts) <= tolerance,
+        )
+
+    second_in_front, second_behind = plane_sides(first, second)
+    first_in_front, first_behind = plane_sides(second, first)
+    first_back = second_in_front | first_behind
+    second_back = first_in_front | second_behind
+    before = np.where(first_back, first, second)
+    after = np.where(first_back, second, first)
+
+    # Intersecting faces and overlapping coplanar faces are compared at a shared point
+    ambiguous = np.flatnonzero(first_back == second_back)
+    if len(ambiguous):
+        a, b = first[ambiguous], second[ambiguous]
+        point_index = np.searchsorted(usable, np.concatenate([a, b]))
+        outline_a, outline_b = np.split(outlines[point_index], 2)
+        points = shapely.get_coordinates(
+            shapely.point_on_surface(shapely.intersection(outline_a, outline_b))
+        )
+        screen = (points - render_context.origin).T
+        grid_xy = np.linalg.solve(render_context.projection_matrix[:, :2], screen).T
+        grid_points = np.column_stack([grid_xy, np.zeros(len(grid_xy))])
+
+        def depth(face: np.ndarray) -> np.ndarray:
+            # How far along the view direction the face is at each shared point
+            return np.einsum(
+                "ij,ij->i", normals[face], centers[face] - grid_points
+            ) / (normals[face] @ view_direction)
+
+        depth_a, depth_b = depth(a), depth(b)
+        before[ambiguous] = np.where(depth_a <= depth_b, a, b)
+        after[ambiguous] = np.where(depth_a <= depth_b, b, a)
+        # Coplanar faces are left in the order of their keys
+        separated = np.ones(len(first), dtype=bool)
+        separated[ambiguous] = np.abs(depth_a - depth_b) > tolerance
+        before, after = before[separated], after[separated]
+
+    return faces[before], faces[after]
+
+
+def painter_order(vertex_arrays: list[np.ndarray], render_context: RenderContext) -> np.ndarray:
+    """Orders faces from back to front, so that each face is drawn after those it hides.
+
+    Only faces that overlap on screen constrain each other (see _occlusion_edges); the
+    order is a topological sort of those constraints, taking the face farthest from the
+    viewer by view_depth_keys first whenever there is a choice. Faces caught in a cycle of
+    mutual overlaps, which no order can paint correctly, are also taken by that key.
+    Returns the indices of the faces in drawing order.
+    """
+    count = len(vertex_arrays)
+    keys = view_depth_keys(vertex_arrays, render_context).tolist()
+    before, after = _occlusion_edges(vertex_arrays, render_context)
+    successors = [[] for _ in range(count)]
+    indegree = [0] * count
+    for i, j in zip(before.tolist(), after.tolist()):
+        successors[i].append(j)
+        indegree[j] += 1
+
+    by_key = sorted(range(count), key=lambda i: (keys[i], i))
+    ready = [(keys[i], i) for i in range(count) if indegree[i] == 0]
+    heapq.heapify(ready)
+    drawn = [False] * count
+    order = []
+    next_by_key = 0
+    while len(order) < count:
+        if not ready:
+            # Break a cycle at its farthest face
+            while drawn[by_key[next_by_key]]:
+                next_by_key += 1
+            i = by_key[next_by_key]
+            ready.append((keys[i], i))
+
+        _, i = heapq.heappop(ready)
+        if drawn[i]:
+            continue
+
+        drawn[i] = True
+        order.append(i)
+        for j in successors[i]:
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                heapq.heappush(ready, (keys[j], j))
+
+    return np.array(order, dtype=np.intp)
+
+
+def volume_depth_keys(
+    vertex_arrays: list[np.ndarray], render_context: RenderContext
+) -> np.ndarray:
+    """Computes the distance towards the viewer of the center of each array's 3D bounds.
+
+    This orders whole shapes and volumes against each other, including shapes stacked on
+    top of one another, which depth_keys puts behind the shape they rest on. The center of
+    the bounds does not depend on which faces a volume has, so volumes of different kinds
+    are ordered consistently. Ascending keys order shapes from back to front. Arrays without
+    vertices are placed at the very back.
+    """
+    keys = np.full(len(vertex_arrays), -np.inf)
+    sizes = np.array([len(vertices) for vertices in vertex_arrays], dtype=np.intp)
+    non_empty = np.flatnonzero(sizes)
+    if len(non_empty) == 0:
+        return keys
+
+    vertices = np.concatenate([vertex_arrays[i] for i in non_empty])
+    offsets = np.concatenate([[0], np.cumsum(sizes[non_empty])[:-1]])
+    centers = (
+        np.minimum.reduceat(vertices, offsets) + np.maximum.reduceat(vertices, offsets)
+    ) / 2
+    keys[non_empty] = centers @ render_context.view_direction
+
+    return keys
+
+
+def sort_back_to_front(
+    items: list, vertex_arrays: list[np.ndarray], render_context: RenderContext
+) -> list:
+    """Sorts items from back to front given the vertices of each, keeping ties in order."""
+    order = np.argsort(depth_keys(vertex_arrays, render_context), kind="stable")
+    return [items[i] for i in order]
+
+
+def renderable_vertex_array(renderable: Renderable | Group | InstancedGroup) -> np.ndarray:
+    """Gathers every 3D vertex of a shape, group or instanced group into one (N, 3) array."""
+    if isinstance(renderable, InstancedGroup):
+        prototype = renderable_vertex_array(renderable.prototype)
+        instances = prototype[np.newaxis, :, :] + renderable.translations[:, np.newaxis, :]
+        return instances.reshape(-1, 3)
+
+    if isinstance(renderable, Group):
+        children = [renderable_vertex_array(child) for child in renderable.children]
+        return np.concatenate(children) if children else np.empty((0, 3))
+
+    return renderable.vertex_array
+
+
+def flatten_faces(
+    renderable: Renderable | Group | InstancedGroup | FaceCollection,
+    render_context: RenderContext,
+) -> list:
+    """Expands groups (including volumes such as Box and Prism) and face collections into
+    their visible faces.
+
+    Faces are returned in the group's draw order. Shapes and instanced groups are returned
+    as they are.
+    """
+    if isinstance(renderable, (Group, FaceCollection)):
+        return renderable.draw_order(render_context)
+
+    return [renderable]
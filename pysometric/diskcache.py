@@ -0,0 +1,223 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import shapely
+
+from .collection import FaceCollection
+from .instance import InstancedGroup
+from .render import RenderableGeometry
+from .shape import Group, Polygon, Renderable
+
+# Bumped whenever the file layout or the compiled output of existing scenes changes, so
+# that stale entries are never read back
+CACHE_VERSION = 1
+
+_MAGIC = b"PYSOGEOM"
+_HEADER_SIZE = 16
+_SUFFIX = ".pysc"
+
+
+def fingerprint(renderable: Renderable | Group | InstancedGroup, hasher) -> None:
+    """Feeds everything that determines the compiled output of a renderable into a hasher.
+
+    Polygons contribute their (already rotated) vertices, layer and texture parameters;
+    groups their type and children; instanced groups their prototype and translations; face
+    collections their arrays and texture sets. Any other renderable contributes its type,
+    vertices and layer.
+    """
+    cls = type(renderable)
+    hasher.update(f"{cls.__module__}.{cls.__qualname__}".encode())
+    if isinstance(renderable, InstancedGroup):
+        fingerprint(renderable.prototype, hasher)
+        hasher.update(renderable.translations.tobytes())
+    elif isinstance(renderable, Group):
+        hasher.update(len(renderable.children).to_bytes(8, "little"))
+        for child in renderable.children:
+            fingerprint(child, hasher)
+    elif isinstance(renderable, FaceCollection):
+        for array in (
+            renderable.vertex_array,
+            renderable.face_sizes,
+            renderable.face_volumes,
+            renderable.face_layers,
+            renderable.face_textures,
+            renderable.face_ranks,
+            renderable.cull_back_faces,
+        ):
+            hasher.update(len(array).to_bytes(8, "little"))
+            hasher.update(np.ascontiguousarray(array).tobytes())
+        for textures in renderable.texture_sets:
+            hasher.update(len(textures).to_bytes(8, "little"))
+            _fingerprint_textures(textures, hasher)
+    else:
+        hasher.update(np.ascontiguousarray(renderable.vertex_array).tobytes())
+        hasher.update(repr(renderable.layer).encode())
+        if isinstance(renderable, Polygon):
+            _fingerprint_textures(renderable.textures, hasher)
+
+
+def _fingerprint_textures(textures, hasher) -> None:
+    for texture in textures:
+        texture_cls = type(texture)
+        hasher.update(
+            repr((texture_cls.__qualname__, texture._parameters(), texture.layer)).encode()
+        )
+
+
+def _write(path: Path, renderables: list[RenderableGeometry]):
+    """Writes geometries as a header, a layer array, a WKB offset array and the WKB data.
+
+    The file is written to a temporary name and renamed, so readers never see partial files.
+    """
+    wkbs = shapely.to_wkb([r.geometry for r in renderables])
+    layers = np.array([r.layer for r in renderables], dtype=np.int64)
+    offsets = np.zeros(len(wkbs) + 1, dtype=np.uint64)
+    np.cumsum([len(wkb) for wkb in wkbs], out=offsets[1:])
+
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb", buffering=1 << 20) as f:
+            f.write(_MAGIC)
+            f.write(np.uint64(len(wkbs)).tobytes())
+            f.write(layers.tobytes())
+            f.write(offsets.tobytes())
+            f.writelines(wkbs)
+
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _read(path: Path) -> list[RenderableGeometry] | None:
+    """Reads geometries from a memory-mapped cache file, or returns None if it is invalid.
+
+    The layer and offset arrays are viewed in place in the mapping, and the file size is
+    checked against them before anything is decoded. Each WKB record is copied out of the
+    mapping, and all of them are decoded in a single vectorized call. Files that are
+    truncated or fail to decode are treated as invalid.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _HEADER_SIZE:
+            return None
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            layers = offsets = None
+            try:
+                if mapped[:8] != _MAGIC:
+                    return None
+
+                count = int(np.frombuffer(mapped, np.uint64, 1, 8)[0])
+                start = _HEADER_SIZE + 8 * count + 8 * (count + 1)
+                if size < start:
+                    return None
+
+                layers = np.frombuffer(mapped, np.int64, count, _HEADER_SIZE)
+                offsets = np.frombuffer(mapped, np.uint64, count + 1, _HEADER_SIZE + 8 * count)
+                if offsets[0] != 0 or np.any(offsets[1:] < offsets[:-1]):
+                    return None
+                if start + int(offsets[-1]) != size:
+                    return None
+
+                bounds = (offsets + start).tolist()
+                geometries = shapely.from_wkb(
+                    [mapped[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+                )
+                return [
+                    RenderableGeometry(geometry, layer)
+                    for geometry, layer in zip(geometries, layers.tolist())
+                ]
+            except (ValueError, shapely.errors.GEOSException):
+                return None
+            finally:
+                # Release the views into the mapping before it is closed, even on errors
+                del layers, offsets
+
+
+class DiskCache:
+    """A persistent, content-addressed cache of compiled scenes.
+
+    Each entry is a single file named by the scene's cache key (see Scene.cache_key()),
+    holding the compiled geometries as WKB along with their layers. Entries are evicted
+    least recently used first once their total size exceeds `max_bytes`. Several processes
+    may share a cache directory: entries are written atomically and never modified.
+
+    Parameters
+    ----------
+    directory : str | os.PathLike
+        The directory holding the cache files, created if needed.
+    max_bytes : int
+        The maximum total size of the cache files.
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int = 1 << 30) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def size(self) -> int:
+        """The total size of the cache files, in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def get(self, key: str) -> list[RenderableGeometry] | None:
+        """Returns the compiled geometries stored under a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            renderables = _read(path)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        return renderables
+
+    def put(self, key: str, renderables: list[RenderableGeometry]):
+        """Stores compiled geometries under a key, evicting old entries to stay within size."""
+        _write(self._path(key), renderables)
+        self._evict()
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        for path, _, _ in self._entries():
+            path.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self._directory / f"{key}{_SUFFIX}"
+
+    def _entries(self) -> list[tuple[Path, int, float]]:
+        entries = []
+        for path in self._directory.glob(f"*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            entries.append((path, stat.st_size, stat.st_mtime))
+
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def new_hasher():
+    """Returns the hasher used for cache keys, seeded with the cache version."""
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(CACHE_VERSION.to_bytes(4, "little"))
+    return hasher
@@ -1,23 +1,177 @@
-from math import radians, tan, pi
+from math import ceil, pi, radians, tan
 
 import numpy as np
-from shapely import Geometry, LineString, MultiLineString, bounds
+import shapely
+from shapely import Geometry, MultiLineString, bounds
+
+from .cache import CacheInfo, LRUCache
+from .render import line_parts
 
 DEFAULT_HATCH_ANGLE = radians(45)
 
+# Bounds are rounded to this many decimals when looking up cached hatch patterns, so
+# that faces of the same size share a pattern despite floating point noise.
+HATCH_BOUNDS_DECIMALS = 6
+
+_hatch_cache = LRUCache(256)
+
+PEN_FILL_STYLES = {"zigzag", "concentric"}
+
+# Zig-zag rows are joined into a single stroke when the pen travels less than this many
+# pen widths between them
+_ZIGZAG_JOIN_DISTANCE = 5
+
+_LINESTRING_TYPE_ID = 1
+
+
+def set_hatch_cache_size(maxsize: int):
+    """Sets the maximum number of unclipped hatch patterns kept in memory (0 disables caching)."""
+    _hatch_cache.maxsize = maxsize
+
+
+def clear_hatch_cache():
+    _hatch_cache.clear()
+
+
+def hatch_cache_info() -> CacheInfo:
+    return _hatch_cache.info()
+
+
+def _hatch_pattern(
+    pitch: float, angle: float, width: float, height: float
+) -> MultiLineString:
+    """Generates the unclipped hatch lines covering a width x height box anchored at (0, 0)."""
+    if angle % pi == 0:
+        ys = np.arange(0, height, pitch)
+        starts = np.column_stack([np.zeros_like(ys), ys])
+        ends = np.column_stack([np.full_like(ys, width), ys])
+    else:
+        hatch_width = 0 if angle == radians(90) else abs(height / tan(angle))
+        xs = np.arange(-hatch_width, width + hatch_width, pitch)
+        starts = np.column_stack([xs, np.full_like(xs, height)])
+        ends = np.column_stack([xs + height / tan(angle), np.zeros_like(xs)])
+
+    return shapely.multilinestrings(shapely.linestrings(np.stack([starts, ends], axis=1)))
+
+
 def hatch_fill(
     geometry: Geometry, pitch: float, angle=DEFAULT_HATCH_ANGLE
 ) -> MultiLineString:
-    hatches = []
+    if geometry.is_empty:
+        return MultiLineString()
+
     min_x, min_y, max_x, max_y = bounds(geometry)
+    width = round(max_x - min_x, HATCH_BOUNDS_DECIMALS)
+    height = round(max_y - min_y, HATCH_BOUNDS_DECIMALS)
+
+    key = (pitch, angle, width, height)
+    pattern = _hatch_cache.get(key)
+    if pattern is None:
+        pattern = _hatch_pattern(pitch, angle, width, height)
+        _hatch_cache.put(key, pattern)
+
+    hatches = shapely.transform(pattern, lambda coords: coords + (min_x, min_y))
+    return hatches.intersection(geometry)
+
+
+def _zigzag_lines(polygon: Geometry, pen_width: float) -> np.ndarray:
+    """Fills a polygon with horizontal rows a pen width apart, joined into zig-zag strokes."""
+    min_x, min_y, max_x, max_y = bounds(polygon)
     height = max_y - min_y
+    row_count = ceil(height / pen_width) + 1
+    ys = min_y + (height - (row_count - 1) * pen_width) / 2 + pen_width * np.arange(row_count)
+    starts = np.column_stack([np.full_like(ys, min_x), ys])
+    ends = np.column_stack([np.full_like(ys, max_x), ys])
+    rows = shapely.linestrings(np.stack([starts, ends], axis=1))
 
-    if angle % pi == 0:
-        for i in np.arange(min_y, max_y, pitch):
-            hatches.append(LineString([(min_x, i), (max_x, i)]))
+    inner = shapely.buffer(polygon, -pen_width / 2, join_style="mitre", mitre_limit=10.0)
+    shapely.prepare(inner)
+    segments, row = shapely.get_parts(shapely.intersection(rows, inner), return_index=True)
+    is_line = (shapely.get_type_id(segments) == _LINESTRING_TYPE_ID) & ~shapely.is_empty(
+        segments
+    )
+    segments, row = segments[is_line], row[is_line]
+    if len(segments) == 0:
+        return segments
+
+    # Number the segments of each row from left to right, so that every such lane is
+    # drawn as its own zig-zag
+    ends = np.stack(
+        [
+            shapely.get_coordinates(shapely.get_point(segments, 0)),
+            shapely.get_coordinates(shapely.get_point(segments, -1)),
+        ],
+        axis=1,
+    )
+    ends.sort(axis=1)
+    order = np.lexsort((ends[:, 0, 0], row))
+    ends, row = ends[order], row[order]
+    row_starts = np.flatnonzero(np.r_[True, np.diff(row) != 0])
+    lane = np.arange(len(row)) - np.repeat(row_starts, np.diff(np.r_[row_starts, len(row)]))
+
+    # Draw even rows left to right and odd rows right to left
+    reverse = row % 2 == 1
+    ends[reverse] = ends[reverse, ::-1]
+    order = np.lexsort((row, lane))
+    ends, row, lane = ends[order], row[order], lane[order]
+
+    # Join consecutive segments of a lane whose ends are close together
+    gaps = np.linalg.norm(ends[1:, 0] - ends[:-1, 1], axis=1)
+    joined = (
+        (np.diff(lane) == 0)
+        & (np.diff(row) == 1)
+        & (gaps <= _ZIGZAG_JOIN_DISTANCE * pen_width)
+    )
+    strokes = np.concatenate([[0], np.cumsum(~joined)])
+    return shapely.linestrings(ends.reshape(-1, 2), indices=np.repeat(strokes, 2))
+
+
+def _concentric_lines(polygon: Geometry, pen_width: float) -> np.ndarray:
+    """Fills a polygon with inset rings a pen width apart."""
+    min_x, min_y, max_x, max_y = bounds(polygon)
+    ring_count = ceil(min(max_x - min_x, max_y - min_y) / (2 * pen_width)) + 1
+    insets = shapely.buffer(
+        polygon, -pen_width * np.arange(1, ring_count), join_style="mitre", mitre_limit=10.0
+    )
+    return line_parts(insets)
+
+
+def pen_fill(
+    geometry: Geometry,
+    pen_width: float,
+    style="zigzag",
+    stroke_width=1.0,
+    tolerance: float | None = None,
+) -> MultiLineString:
+    """Generates strokes that fill a geometry solid when drawn with a pen of the given width.
+
+    The geometry is first inset by half the stroke width and its outline drawn. The inside
+    is then covered either by horizontal rows joined into zig-zag strokes ("zigzag"), or by
+    rings inset a pen width apart ("concentric"). With a `tolerance`, given as a fraction of
+    the pen width, the strokes are simplified so that their vertex count adapts to the pen.
+    """
+    if style not in PEN_FILL_STYLES:
+        raise ValueError(f"Unsupported fill style: {style}")
+
+    if geometry.is_empty:
+        return MultiLineString()
+
+    polygon = geometry
+    if stroke_width > 0:
+        polygon = shapely.buffer(
+            geometry, -stroke_width / 2, join_style="mitre", mitre_limit=10.0
+        )
+
+    if polygon.is_empty:
+        return MultiLineString()
+
+    if style == "zigzag":
+        fill = _zigzag_lines(polygon, pen_width)
     else:
-        hatch_width = 0 if angle == radians(90) else abs(height / tan(angle))
-        for i in np.arange(min_x - hatch_width, max_x + hatch_width, pitch):
-            hatches.append(LineString([(i, max_y), (i + height / tan(angle), min_y)]))
+        fill = _concentric_lines(polygon, pen_width)
+
+    lines = np.concatenate([fill, line_parts(polygon)])
+    if tolerance is not None:
+        lines = shapely.simplify(lines, tolerance * pen_width, preserve_topology=False)
 
-    return MultiLineString(hatches).intersection(geometry)
+    return shapely.multilinestrings(lines)
@@ -0,0 +1,98 @@
+from typing import Iterable
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from .render import RenderableGeometry, line_parts
+
+
+def _sort_paths(lines: np.ndarray) -> np.ndarray:
+    """Orders lines greedily so that each starts at the free endpoint nearest to where the
+    previous one ended, reversing lines where that shortens the pen-up travel.
+
+    The search starts at (0, 0) and uses a spatial index of all endpoints, so each step only
+    looks at the endpoints around the pen position.
+    """
+    count = len(lines)
+    if count < 2:
+        return lines
+
+    starts = shapely.get_coordinates(shapely.get_point(lines, 0))
+    ends = shapely.get_coordinates(shapely.get_point(lines, -1))
+    endpoints = np.concatenate([starts, ends])
+    tree = STRtree(shapely.points(endpoints))
+
+    remaining = np.ones(count, dtype=bool)
+    order = np.empty(count, dtype=np.intp)
+    reverse = np.zeros(count, dtype=bool)
+    position = np.zeros(2)
+    min_x, min_y = endpoints.min(axis=0)
+    max_x, max_y = endpoints.max(axis=0)
+    radius = max(max_x - min_x, max_y - min_y, 1.0) / np.sqrt(count)
+    for step in range(count):
+        # Grow the search box until it holds a free endpoint, then look again within the
+        # distance of the closest one found, which may have been in a corner of the box
+        while True:
+            hits = tree.query(shapely.box(*(position - radius), *(position + radius)))
+            hits = hits[remaining[hits % count]]
+            if len(hits) > 0:
+                break
+
+            radius *= 2
+
+        distance = np.linalg.norm(endpoints[hits] - position, axis=1).min()
+        hits = tree.query(shapely.box(*(position - distance), *(position + distance)))
+        hits = hits[remaining[hits % count]]
+        distances = np.linalg.norm(endpoints[hits] - position, axis=1)
+        nearest = hits[np.argmin(distances)]
+
+        line = nearest % count
+        remaining[line] = False
+        order[step] = line
+        reverse[step] = nearest >= count
+        position = starts[line] if reverse[step] else ends[line]
+        radius = max(distances.min(), radius / 2, 1e-9)
+
+    ordered = lines[order]
+    ordered[reverse] = shapely.reverse(ordered[reverse])
+    return ordered
+
+
+def batch_by_layer(
+    renderables: Iterable[RenderableGeometry], merge_lines=False, sort_paths=False
+) -> list[RenderableGeometry]:
+    """Groups compiled geometries into a single MultiLineString per layer.
+
+    Polygons are reduced to their outlines, which is what gets drawn, and geometries on layer
+    0 are dropped since they are never drawn. Layers are returned in ascending order, so a
+    plotter only changes pens once per layer.
+
+    With `merge_lines`, lines of a layer sharing an endpoint are joined into longer lines.
+    With `sort_paths`, the lines of each layer are ordered (and reversed when needed) to
+    shorten the pen-up travel between them. Together these replace vpype's `linemerge` and
+    `linesort` commands.
+    """
+    layers: dict[int, list[shapely.Geometry]] = {}
+    for renderable in renderables:
+        if renderable.layer == 0:
+            continue
+
+        geometries = layers.setdefault(renderable.layer, [])
+        if isinstance(renderable.geometry, list):
+            geometries.extend(renderable.geometry)
+        else:
+            geometries.append(renderable.geometry)
+
+    batches = []
+    for layer in sorted(layers):
+        lines = line_parts(layers.pop(layer))
+        if merge_lines and len(lines) > 1:
+            lines = shapely.get_parts(shapely.line_merge(shapely.multilinestrings(lines)))
+
+        if sort_paths:
+            lines = _sort_paths(lines)
+
+        batches.append(RenderableGeometry(shapely.multilinestrings(lines), layer))
+
+    return batches
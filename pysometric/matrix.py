@@ -1,9 +1,15 @@
+from functools import lru_cache
 from math import cos, sin
+from typing import TYPE_CHECKING, Iterable
 
 import numpy as np
 
+from .axis import Axis
 from .vector import Vector3
 
+if TYPE_CHECKING:
+    from .shape import Rotation
+
 
 def x_axis_rot_mat(angle: float) -> np.array:
     cosr = cos(angle)
@@ -23,34 +29,62 @@ def z_axis_rot_mat(angle: float) -> np.array:
     return [[cosr, -sinr, 0], [sinr, cosr, 0], [0, 0, 1]]
 
 
-def rotate_x(point: Vector3, angle: float, center: Vector3 = (0, 0, 0)) -> Vector3:
-    px, py, pz = point
-    cx, cy, cz = center
+_AXIS_ROT_MATS = {
+    Axis.X: x_axis_rot_mat,
+    Axis.Y: y_axis_rot_mat,
+    Axis.Z: z_axis_rot_mat,
+}
 
-    translated = (px - cx, py - cy, pz - cz)
-    matrix = x_axis_rot_mat(angle)
-    rx, ry, rz = tuple(np.dot(matrix, translated))
 
-    return (rx + cx, ry + cy, rz + cz)
+@lru_cache(maxsize=1024)
+def rotation_matrix(axis: Axis, angle: float) -> np.ndarray:
+    """Returns the read-only 3x3 matrix rotating around the given axis, cached per axis and angle."""
+    matrix = np.array(_AXIS_ROT_MATS[axis](angle), dtype=np.float64)
+    matrix.flags.writeable = False
+    return matrix
 
 
-def rotate_y(point: Vector3, angle: float, center: Vector3 = (0, 0, 0)) -> Vector3:
-    px, py, pz = point
-    cx, cy, cz = center
+def affine_rotation(axis: Axis, angle: float, center: Vector3 = (0, 0, 0)) -> np.ndarray:
+    """Returns the 4x4 affine matrix rotating around the given axis through `center`."""
+    rotation = rotation_matrix(axis, angle)
+    center = np.asarray(center, dtype=np.float64)
+    matrix = np.identity(4)
+    matrix[:3, :3] = rotation
+    matrix[:3, 3] = center - rotation @ center
+    return matrix
 
-    translated = (px - cx, py - cy, pz - cz)
-    matrix = y_axis_rot_mat(angle)
-    rx, ry, rz = tuple(np.dot(matrix, translated))
 
-    return (rx + cx, ry + cy, rz + cz)
+def compose_rotations(rotations: Iterable["Rotation"]) -> np.ndarray:
+    """Composes rotations, applied in order and each around its own origin, into one 4x4 matrix."""
+    matrix = np.identity(4)
+    for rotation in rotations:
+        matrix = affine_rotation(rotation.axis, rotation.angle, rotation.origin) @ matrix
 
+    return matrix
 
-def rotate_z(point: Vector3, angle: float, center: Vector3 = (0, 0, 0)) -> Vector3:
+
+def transform_points(points: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Applies a 4x4 affine matrix to every row of an (N, 3) array of points."""
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def _rotate(point: Vector3, axis: Axis, angle: float, center: Vector3) -> Vector3:
     px, py, pz = point
     cx, cy, cz = center
 
     translated = (px - cx, py - cy, pz - cz)
-    matrix = z_axis_rot_mat(angle)
-    rx, ry, rz = tuple(np.dot(matrix, translated))
+    rx, ry, rz = rotation_matrix(axis, angle) @ translated
 
     return (rx + cx, ry + cy, rz + cz)
+
+
+def rotate_x(point: Vector3, angle: float, center: Vector3 = (0, 0, 0)) -> Vector3:
+    return _rotate(point, Axis.X, angle, center)
+
+
+def rotate_y(point: Vector3, angle: float, center: Vector3 = (0, 0, 0)) -> Vector3:
+    return _rotate(point, Axis.Y, angle, center)
+
+
+def rotate_z(point: Vector3, angle: float, center: Vector3 = (0, 0, 0)) -> Vector3:
+    return _rotate(point, Axis.Z, angle, center)
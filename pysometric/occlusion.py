@@ -0,0 +1,249 @@
+import math
+from collections import Counter
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from .render import RenderableGeometry
+from .stats import CompileStats
+
+# Shapely type id of a (single) Polygon, the only kind of geometry that occludes others
+_POLYGON_TYPE_ID = 3
+
+# The size of the cells of the coverage masks of the sweep, relative to the typical extent
+# of a polygon. Larger cells mean fewer masks per geometry, but more complex masks.
+_CELL_SCALE = 4.0
+
+
+def _occluders(
+    geometries: np.ndarray, targets: np.ndarray, stats: CompileStats | None = None
+) -> dict[int, np.ndarray]:
+    """Finds, for every target index, the polygons in front of it that it intersects.
+
+    Occluders are returned in ascending (back-to-front) order.
+    """
+    is_polygon = shapely.get_type_id(geometries) == _POLYGON_TYPE_ID
+    tree = STRtree(geometries)
+    source, occluder = tree.query(geometries[targets], predicate="intersects")
+    if stats is not None:
+        stats.count("strtree_hits", len(source))
+
+    source = targets[source]
+    keep = (occluder > source) & is_polygon[occluder]
+    source, occluder = source[keep], occluder[keep]
+    order = np.lexsort((occluder, source))
+    source, occluder = source[order], occluder[order]
+
+    splits = np.flatnonzero(np.diff(source)) + 1
+    return {
+        int(group[0]): occluders
+        for group, occluders in zip(np.split(source, splits), np.split(occluder, splits))
+        if len(group) > 0
+    }
+
+
+def _target_indices(
+    renderables: list[RenderableGeometry], targets: Sequence[int] | None
+) -> np.ndarray:
+    if targets is None:
+        return np.arange(len(renderables))
+
+    return np.asarray(targets, dtype=np.intp).reshape(-1)
+
+
+def occlude_pairwise(
+    renderables: list[RenderableGeometry],
+    targets: Sequence[int] | None = None,
+    stats: CompileStats | None = None,
+) -> list[RenderableGeometry]:
+    """Occludes geometries by subtracting each polygon from every earlier geometry it intersects.
+
+    Renderables are expected in back-to-front order, so every polygon hides the
+    parts of the geometries that precede it. Only the renderables at the `targets`
+    indices (all of them by default) are occluded, and new renderables are returned
+    for them in the same order; the input is left untouched. Spatial index hits and
+    difference operations are counted in `stats`, if given.
+    """
+    targets = _target_indices(renderables, targets)
+    if len(targets) == 0:
+        return []
+
+    geometries = np.array([r.geometry for r in renderables], dtype=object)
+    occluders = _occluders(geometries, targets, stats)
+    if stats is not None:
+        stats.count("difference_calls", sum(len(indices) for indices in occluders.values()))
+
+    occluded = []
+    for target in targets:
+        geometry = geometries[target]
+        for idx in occluders.get(int(target), []):
+            geometry = geometry.difference(geometries[idx])
+
+        occluded.append(RenderableGeometry(geometry, renderables[target].layer))
+
+    return occluded
+
+
+def occlude_sweep(
+    renderables: list[RenderableGeometry],
+    targets: Sequence[int] | None = None,
+    stats: CompileStats | None = None,
+) -> list[RenderableGeometry]:
+    """Occludes geometries against coverage masks grown in painter order.
+
+    Renderables are swept front to back over a grid of cells, each keeping the union of
+    the polygons seen so far that reach into it. Every geometry is clipped against the
+    masks of the cells it overlaps, then its own polygon (if any) is merged into them. The
+    result matches occlude_pairwise up to floating point noise, while the masks stay small
+    however large the scene, so dense scenes pay for few overlay operations per geometry.
+
+    When only some `targets` are requested, each is clipped against the union of the
+    polygons in front of it that it intersects instead. Spatial index hits and difference
+    operations are counted in `stats`, if given.
+    """
+    if targets is not None:
+        return _occlude_targets_against_union(
+            renderables, _target_indices(renderables, targets), stats
+        )
+
+    geometries = np.array([r.geometry for r in renderables], dtype=object)
+    is_polygon = shapely.get_type_id(geometries) == _POLYGON_TYPE_ID
+    bounds = shapely.bounds(geometries[is_polygon])
+    extents = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+    extents = extents[extents > 0]
+    cell_size = _CELL_SCALE * float(np.median(extents)) if len(extents) else None
+
+    occluded = list(occlude_stream(reversed(renderables), stats, cell_size))
+    occluded.reverse()
+    return occluded
+
+
+def occlude_stream(
+    renderables: Iterable[RenderableGeometry],
+    stats: CompileStats | None = None,
+    cell_size: float | None = None,
+) -> Iterator[RenderableGeometry]:
+    """Lazily occludes geometries given in front-to-back order.
+
+    This is the sweep of occlude_sweep run as a generator: every geometry is final as
+    soon as it has been clipped against the polygons before it, so it is yielded right
+    away and only the coverage masks are kept between steps. The masks cover square
+    cells of `cell_size`, or of a few times the extent of the first polygon by default.
+    """
+    masks: dict[tuple[int, int], shapely.Geometry] = {}
+    for renderable in renderables:
+        geometry = renderable.geometry
+        if shapely.is_empty(geometry):
+            yield renderable
+            continue
+
+        is_polygon = shapely.get_type_id(geometry) == _POLYGON_TYPE_ID
+        min_x, min_y, max_x, max_y = shapely.bounds(geometry).tolist()
+        if cell_size is None:
+            if not is_polygon or max(max_x - min_x, max_y - min_y) <= 0:
+                yield renderable
+                continue
+
+            cell_size = _CELL_SCALE * max(max_x - min_x, max_y - min_y)
+
+        cells = [
+            (i, j)
+            for i in range(math.floor(min_x / cell_size), math.floor(max_x / cell_size) + 1)
+            for j in range(math.floor(min_y / cell_size), math.floor(max_y / cell_size) + 1)
+        ]
+        clipped = geometry
+        for cell in cells:
+            mask = masks.get(cell)
+            if mask is not None and shapely.intersects(mask, clipped):
+                clipped = shapely.difference(clipped, mask)
+                if stats is not None:
+                    stats.count("difference_calls")
+
+        # A polygon hidden entirely lies within the masks already, so they are left as is
+        if is_polygon and not shapely.is_empty(clipped):
+            for cell in cells:
+                mask = masks.get(cell)
+                masks[cell] = geometry if mask is None else shapely.union(mask, geometry)
+
+        yield RenderableGeometry(clipped, renderable.layer)
+
+
+def _occlude_targets_against_union(
+    renderables: list[RenderableGeometry],
+    targets: np.ndarray,
+    stats: CompileStats | None = None,
+) -> list[RenderableGeometry]:
+    if len(targets) == 0:
+        return []
+
+    geometries = np.array([r.geometry for r in renderables], dtype=object)
+    occluders = _occluders(geometries, targets, stats)
+    if stats is not None:
+        stats.count("difference_calls", len(occluders))
+
+    occluded = []
+    for target in targets:
+        geometry = geometries[target]
+        if int(target) in occluders:
+            mask = shapely.union_all(geometries[occluders[int(target)]])
+            geometry = shapely.difference(geometry, mask)
+
+        occluded.append(RenderableGeometry(geometry, renderables[target].layer))
+
+    return occluded
+
+
+def hidden_geometries(geometries: list[shapely.Geometry | None]) -> np.ndarray:
+    """Finds the polygons that are entirely covered by the polygons in front of them.
+
+    Geometries are expected in back-to-front order. Polygons with a corner that no polygon
+    after them covers are rejected at once. The others are tested only against the polygons
+    after them that they intersect, subtracting those one by one until no area is left.
+    Entries that are None are never hidden and never occlude. Returns a boolean array
+    flagging the hidden polygons.
+    """
+    hidden = np.zeros(len(geometries), dtype=bool)
+    outlines = np.array(geometries, dtype=object)
+    targets = np.flatnonzero(shapely.get_type_id(outlines) == _POLYGON_TYPE_ID)
+    if len(targets) < 2:
+        return hidden
+
+    # Only polygons whose every corner lies within a polygon in front of them can be hidden.
+    # Corners are moved slightly inwards, so that polygons merely touching do not count.
+    coords, owners = shapely.get_coordinates(outlines[targets], return_index=True)
+    centroids = shapely.get_coordinates(shapely.centroid(outlines[targets]))
+    coords += (centroids[owners] - coords) * 1e-6
+    owners = targets[owners]
+    point, polygon = STRtree(outlines).query(shapely.points(coords), predicate="covered_by")
+    in_front = polygon > owners[point]
+    point, polygon = point[in_front], polygon[in_front]
+    covered = np.zeros(len(coords), dtype=bool)
+    covered[point] = True
+    uncovered = np.zeros(len(outlines), dtype=bool)
+    uncovered[owners[~covered]] = True
+    targets = targets[~uncovered[targets]]
+    if len(targets) == 0:
+        return hidden
+
+    # Polygons covering more corners of an outline are the likeliest to hide it, so they are
+    # subtracted first
+    corner_hits = Counter(zip(owners[point].tolist(), polygon.tolist()))
+    areas = shapely.area(outlines)
+    for target, occluders in _occluders(outlines, targets).items():
+        remaining = outlines[target]
+        for occluder in sorted(occluders.tolist(), key=lambda i: -corner_hits[target, i]):
+            remaining = shapely.difference(remaining, outlines[occluder])
+            # Floating point noise may leave slivers without any area
+            if shapely.area(remaining) <= 1e-9 * areas[target]:
+                hidden[target] = True
+                break
+
+    return hidden
+
+
+OCCLUSION_ENGINES = {
+    "pairwise": occlude_pairwise,
+    "sweep": occlude_sweep,
+}
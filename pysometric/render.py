@@ -1,5 +1,6 @@
 import math
 
+import numpy as np
 import shapely
 
 from .vector import Vector2, Vector3
@@ -30,6 +31,9 @@ class RenderContext:
     grid_pitch : float
     dimetric_angle : float
     origin : Vector2 | str
+    clip_to_frame : bool
+        Whether compiled geometry is clipped to the frame, so that shapes may skip the parts
+        lying entirely outside it.
     """
 
     def __init__(
@@ -38,20 +42,139 @@ class RenderContext:
         grid_pitch: float,
         dimetric_angle: float,
         origin="centroid",
+        clip_to_frame=False,
     ) -> None:
-        self.frame = frame
-        self.grid_pitch = grid_pitch
-        self.dimetric_angle = dimetric_angle
+        self._frame = frame
+        self._grid_pitch = grid_pitch
+        self._dimetric_angle = dimetric_angle
         self._origin = origin
+        self._clip_to_frame = clip_to_frame
+        self._revision = 0
+        self._invalidate()
+
+    @property
+    def frame(self) -> shapely.Polygon:
+        return self._frame
+
+    @frame.setter
+    def frame(self, frame: shapely.Polygon):
+        self._frame = frame
+        self._invalidate()
+
+    @property
+    def frame_bounds(self) -> tuple[float, float, float, float]:
+        """The (min_x, min_y, max_x, max_y) bounds of the frame."""
+        if self._frame_bounds is None:
+            self._frame_bounds = tuple(shapely.bounds(self._frame).tolist())
+
+        return self._frame_bounds
+
+    @property
+    def frame_is_rectangle(self) -> bool:
+        """Whether the frame is an axis-aligned rectangle, filling its own bounds."""
+        if self._frame_is_rectangle is None:
+            self._frame_is_rectangle = bool(
+                shapely.equals(self._frame, shapely.envelope(self._frame))
+            )
+
+        return self._frame_is_rectangle
+
+    @property
+    def grid_pitch(self) -> float:
+        return self._grid_pitch
+
+    @grid_pitch.setter
+    def grid_pitch(self, grid_pitch: float):
+        self._grid_pitch = grid_pitch
+        self._invalidate()
+
+    @property
+    def dimetric_angle(self) -> float:
+        return self._dimetric_angle
+
+    @dimetric_angle.setter
+    def dimetric_angle(self, dimetric_angle: float):
+        self._dimetric_angle = dimetric_angle
+        self._invalidate()
 
     @property
     def origin(self) -> Vector2:
         """The origin of the grid within the rendering frame."""
-        if self._origin == "centroid":
-            p = shapely.centroid(self.frame)
-            return (p.x, p.y)
+        if self._resolved_origin is None:
+            if self._origin == "centroid":
+                p = shapely.centroid(self._frame)
+                self._resolved_origin = (p.x, p.y)
+            else:
+                self._resolved_origin = tuple(self._origin)
+
+        return self._resolved_origin
+
+    @origin.setter
+    def origin(self, origin: Vector2 | str):
+        self._origin = origin
+        self._invalidate()
+
+    @property
+    def clip_to_frame(self) -> bool:
+        return self._clip_to_frame
+
+    @clip_to_frame.setter
+    def clip_to_frame(self, clip_to_frame: bool):
+        self._clip_to_frame = clip_to_frame
+        self._invalidate()
+
+    @property
+    def revision(self) -> int:
+        """A counter incremented whenever any of the context's inputs change."""
+        return self._revision
+
+    @property
+    def angle_cos(self) -> float:
+        """The cosine of the dimetric angle."""
+        if self._angle_cos is None:
+            self._angle_cos = math.cos(self._dimetric_angle)
+
+        return self._angle_cos
+
+    @property
+    def angle_sin(self) -> float:
+        """The sine of the dimetric angle."""
+        if self._angle_sin is None:
+            self._angle_sin = math.sin(self._dimetric_angle)
+
+        return self._angle_sin
+
+    @property
+    def projection_matrix(self) -> np.ndarray:
+        """The 2x3 matrix mapping grid coordinates to screen offsets from the origin."""
+        if self._projection_matrix is None:
+            self._projection_matrix = self._grid_pitch * np.array(
+                [
+                    [self.angle_cos, -self.angle_cos, 0.0],
+                    [-self.angle_sin, -self.angle_sin, -1.0],
+                ]
+            )
+            self._projection_matrix.flags.writeable = False
+
+        return self._projection_matrix
+
+    @property
+    def view_direction(self) -> np.ndarray:
+        """The direction in grid space pointing from the scene towards the viewer.
 
-        return self._origin
+        This is the direction that the projection collapses to a single screen point.
+        """
+        return np.array([-1.0, -1.0, 2 * self.angle_sin])
+
+    def _invalidate(self):
+        """Discards all derived values so they are recomputed on next access."""
+        self._resolved_origin = None
+        self._frame_bounds = None
+        self._frame_is_rectangle = None
+        self._angle_cos = None
+        self._angle_sin = None
+        self._projection_matrix = None
+        self._revision += 1
 
 
 def project_point(point: Vector3, render_context: RenderContext) -> Vector2:
@@ -60,10 +183,9 @@ def project_point(point: Vector3, render_context: RenderContext) -> Vector2:
     """
     origin_x, origin_y = render_context.origin
     grid_pitch = render_context.grid_pitch
-    dimetric_angle = render_context.dimetric_angle
     grid_x, grid_y, grid_z = point
-    angle_cos = math.cos(dimetric_angle)
-    angle_sin = math.sin(dimetric_angle)
+    angle_cos = render_context.angle_cos
+    angle_sin = render_context.angle_sin
 
     screen_x = (
         origin_x - grid_y * grid_pitch * angle_cos + grid_x * grid_pitch * angle_cos
@@ -76,3 +198,49 @@ def project_point(point: Vector3, render_context: RenderContext) -> Vector2:
     )
 
     return (screen_x, screen_y)
+
+
+def project_points(points, render_context: RenderContext) -> np.ndarray:
+    """
+    Given an (N, 3) array of points in 3D space, project them all to 2D screen
+    coordinates at once, returning an (N, 2) array.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    return points @ render_context.projection_matrix.T + render_context.origin
+
+
+def project_bounds(
+    vertex_arrays: list[np.ndarray], render_context: RenderContext
+) -> np.ndarray:
+    """
+    Given a list of (N, 3) arrays of points in 3D space, computes the 2D screen bounds of
+    each projected array in a single batch. Returns an (M, 4) array of
+    (min_x, min_y, max_x, max_y) rows, which are NaN for empty arrays.
+    """
+    bounds = np.full((len(vertex_arrays), 4), np.nan)
+    sizes = np.array([len(vertices) for vertices in vertex_arrays], dtype=np.intp)
+    non_empty = np.flatnonzero(sizes)
+    if len(non_empty) == 0:
+        return bounds
+
+    projected = project_points(
+        np.concatenate([vertex_arrays[i] for i in non_empty]), render_context
+    )
+    offsets = np.concatenate([[0], np.cumsum(sizes[non_empty])[:-1]])
+    bounds[non_empty, :2] = np.minimum.reduceat(projected, offsets)
+    bounds[non_empty, 2:] = np.maximum.reduceat(projected, offsets)
+
+    return bounds
+
+
+def line_parts(geometries) -> np.ndarray:
+    """
+    Given a geometry or an array of geometries, reduces them to the individual lines that
+    draw them: polygons become their outlines, and points and empty lines are dropped.
+    Returns an array of LineStrings and LinearRings.
+    """
+    parts = shapely.get_parts(geometries)
+    dimensions = shapely.get_dimensions(parts)
+    outlines = np.where(dimensions == 2, shapely.boundary(parts), parts)
+    lines = shapely.get_parts(outlines[dimensions > 0])
+    return lines[~shapely.is_empty(lines)]
@@ -1,110 +1,690 @@
+import contextvars
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
 from math import radians
+from typing import IO, TYPE_CHECKING, Iterable, Iterator
 
-import vsketch
-from shapely import GeometryCollection, Polygon, STRtree, intersection
+import numpy as np
+import shapely
+from shapely import GeometryCollection, Polygon, STRtree, intersection, linearrings, polygons
 
-from .render import RenderContext
+from .diskcache import DiskCache, fingerprint, new_hasher
+from .depth import flatten_faces, painter_order, renderable_vertex_array, volume_depth_keys
+from .layers import batch_by_layer
+from .occlusion import OCCLUSION_ENGINES, hidden_geometries, occlude_stream
+from .render import RenderContext, project_bounds, project_points
 from .shape import RenderableGeometry, Renderable
+from .stats import CompileStats, _active_stats, _StageClock, active_stats
+from .svg import SVG_PRECISION, write_svg
+
+if TYPE_CHECKING:
+    import vsketch
 
 DIMETRIC_ANGLE = radians(30)
 
+# A compiled child or face: its 3D vertices (with depth sorting) and its geometries
+_Unit = tuple[np.ndarray | None, list[RenderableGeometry]]
+
+
+def _flatten_compiled(renderables: list[RenderableGeometry]) -> list[RenderableGeometry]:
+    """
+    A compiled shape could contain normal Shapely geometries, or a GeometryCollection.
+    In the case of a GeometryCollection, flatten it to individual geometries.
+    """
+    flattened = []
+    for renderable in renderables:
+        if isinstance(renderable.geometry, GeometryCollection):
+            flattened.extend(
+                list(
+                    map(
+                        lambda g: RenderableGeometry(g, renderable.layer),
+                        renderable.geometry.geoms,
+                    )
+                )
+            )
+        else:
+            flattened.append(renderable)
+
+    return flattened
+
+
+def _clip_to_frame(
+    renderables: list[RenderableGeometry], render_context: RenderContext
+) -> list[RenderableGeometry]:
+    """
+    Given compiled shapes, clip them to the scene rendering frame.
+
+    Bounding boxes are checked first: shapes entirely outside the frame are dropped and,
+    for rectangular frames, shapes entirely inside it are kept without an intersection.
+    """
+    if not renderables:
+        return renderables
+
+    frame = render_context.frame
+    min_x, min_y, max_x, max_y = render_context.frame_bounds
+    bounds = shapely.bounds([renderable.geometry for renderable in renderables])
+    outside = (
+        (bounds[:, 0] > max_x)
+        | (bounds[:, 1] > max_y)
+        | (bounds[:, 2] < min_x)
+        | (bounds[:, 3] < min_y)
+    )
+    inside = render_context.frame_is_rectangle & (
+        (bounds[:, 0] >= min_x)
+        & (bounds[:, 1] >= min_y)
+        & (bounds[:, 2] <= max_x)
+        & (bounds[:, 3] <= max_y)
+    )
+
+    clipped = []
+    for renderable, is_outside, is_inside in zip(renderables, outside, inside):
+        if is_outside:
+            continue
+
+        if not is_inside:
+            renderable.geometry = intersection(frame, renderable.geometry)
+
+        clipped.append(renderable)
+
+    return clipped
+
+
+def _compile_child(
+    child: Renderable,
+    hidden: frozenset[int],
+    render_context: RenderContext,
+    clip_to_frame: bool,
+    depth_sort: bool,
+) -> list[_Unit]:
+    """Compiles a single top-level child and optionally clips the result to the frame.
+
+    The child is returned as a list of (vertices, renderables) units. Without depth sorting
+    the whole child is a single unit without vertices; with it, each face is compiled as its
+    own unit along with its 3D vertices, so that faces of all children can be ordered
+    together by painter_order(). Faces whose index (in the child's draw order) is in
+    `hidden` are skipped.
+
+    Defined at module level so that it can be dispatched to a process pool.
+    """
+    if depth_sort or hidden:
+        faces = [
+            face
+            for i, face in enumerate(flatten_faces(child, render_context))
+            if i not in hidden
+        ]
+    else:
+        faces = [child]
+
+    stats = active_stats()
+    compiled_faces = []
+    for face in faces:
+        compiled = _flatten_compiled(face.compile(render_context))
+        if clip_to_frame:
+            start = perf_counter() if stats is not None else 0.0
+            compiled = _clip_to_frame(compiled, render_context)
+            if stats is not None:
+                stats.add_time("clip", perf_counter() - start)
+
+        compiled_faces.append(compiled)
+
+    if depth_sort:
+        return [
+            (renderable_vertex_array(face), compiled)
+            for face, compiled in zip(faces, compiled_faces)
+        ]
+
+    return [(None, [renderable for compiled in compiled_faces for renderable in compiled])]
+
+
+def _run_in_context(fn, context: contextvars.Context, *args):
+    return context.run(fn, *args)
+
+
+def _unit_renderables(
+    units: list[_Unit]
+) -> list[RenderableGeometry]:
+    return [renderable for _, renderables in units for renderable in renderables]
+
+
+def render_to_sketch(renderables: Iterable[RenderableGeometry], vsk: "vsketch.Vsketch"):
+    """Draws compiled geometries to the given sketch, switching pens by layer.
+
+    Any iterable is accepted, so the geometries may be streamed from Scene.iter_compiled().
+    """
+    for renderable in renderables:
+        if renderable.layer == 0:
+            vsk.noStroke()
+        else:
+            vsk.stroke(renderable.layer)
+
+        if isinstance(renderable.geometry, list):
+            for g in renderable.geometry:
+                vsk.geometry(g)
+        else:
+            vsk.geometry(renderable.geometry)
+
 
 class Scene:
     """Defines a 3D isometric scene.
 
     Scenes may contain zero or more Shape instances describing 3D geometries that can be rendered to 2D.
+
+    Hidden lines are removed by the engine named by `occlusion`: "pairwise" subtracts every
+    polygon from each geometry behind it, while "sweep" clips each geometry against coverage
+    masks grown per screen cell. The sweep is faster when many polygons overlap each
+    geometry, as in tile maps of touching boxes, and pairwise when few do.
+
+    By default the children are drawn in list order, with the first child in front. With
+    `depth_sort` enabled, the faces of all children (including those inside groups and
+    volumes) are instead ordered together so that every face is drawn after the faces it
+    hides, found by testing overlapping faces against each other's planes, so scenes
+    generated in any order occlude correctly. Shapes that pass through each other cannot be
+    drawn correctly in any order.
+
+    Faces of closed volumes that point away from the viewer are never compiled. With
+    `cull_hidden` enabled, faces entirely covered by the faces in front of them are also
+    dropped before compilation, so they never pay for texture generation.
+
+    For very large scenes, iter_compiled() streams the occluded geometries one at a time
+    instead of materializing the whole result.
+
+    Pass a CompileStats as `stats` to record the time spent in each stage of compile(),
+    along with counters per child and layer.
+
+    With a DiskCache as `disk_cache`, compiled scenes are also stored on disk under a hash
+    of their contents (see cache_key()), and compiling an identical scene again, even from
+    another process, loads the stored result without compiling anything.
+
+    Compiled children are cached between calls to compile(). Children added, removed or
+    replaced through the Scene methods (or flagged with mark_dirty() after being changed in
+    place) are recompiled, and only the geometries overlapping their old or new screen
+    footprint are occluded again.
     """
 
     def __init__(
-        self, frame: Polygon, grid_pitch: float, children: list[Renderable], origin="centroid", clip_to_frame=True
+        self,
+        frame: Polygon,
+        grid_pitch: float,
+        children: list[Renderable],
+        origin="centroid",
+        clip_to_frame=True,
+        occlusion="pairwise",
+        depth_sort=False,
+        cull_hidden=False,
+        stats: CompileStats | None = None,
+        disk_cache: DiskCache | None = None,
     ):
         super().__init__()
-        self.render_context = RenderContext(frame, grid_pitch, DIMETRIC_ANGLE, origin)
+        if occlusion not in OCCLUSION_ENGINES:
+            raise ValueError(f"Unsupported occlusion engine: {occlusion}")
+
+        self.render_context = RenderContext(
+            frame, grid_pitch, DIMETRIC_ANGLE, origin, clip_to_frame
+        )
         self._children: list[Renderable] = children
         self.__clips_children_to_frame = clip_to_frame
+        self.__occlusion = occlusion
+        self.__depth_sort = depth_sort
+        self.__cull_hidden = cull_hidden
+        self.stats = stats
+        self.disk_cache = disk_cache
 
-    def compile(self) -> list[RenderableGeometry]:
-        def flatten_compiled(renderables):
-            """
-            A compiled shape could contain normal Shapely geometries, or a GeometryCollection.
-            In the case of a GeometryCollection, flatten it to individual geometries.
-            """
-            flattened = []
-            for renderable in renderables:
-                if isinstance(renderable.geometry, GeometryCollection):
-                    flattened.extend(
-                        list(
-                            map(
-                                lambda g: RenderableGeometry(g, renderable.layer),
-                                renderable.geometry.geoms,
-                            )
-                        )
-                    )
-                else:
-                    flattened.append(renderable)
+        # Incremental compilation state, keyed by the id() of top-level children
+        self.__compiled_children: dict[
+            int,
+            tuple[Renderable, list[_Unit], frozenset[int]],
+        ] = {}
+        self.__dirty: set[int] = set()
+        self.__compiled_revision = None
+        self.__compiled_order: list[int] = []
+        self.__occluded: dict[int, RenderableGeometry] = {}
 
-            return flattened
+    def compile(
+        self, workers: int | None = None, executor: Executor | None = None
+    ) -> list[RenderableGeometry]:
+        """Compile the scene to a list of occluded 2D geometries.
 
-        compiled = []
-        for child in reversed(self._children):
-            clipped_and_compiled = list(
-                map(
-                    self.__clip_to_frame,
-                    flatten_compiled(child.compile(self.render_context)),
+        Each child is projected, textured and clipped to the frame independently, so these
+        stages may run concurrently: pass `workers` to use a thread pool of that size, or
+        provide any `concurrent.futures.Executor` (children must be picklable when using a
+        process pool). Results are always gathered in child order before occlusion, so the
+        output does not depend on scheduling.
+        """
+        key = None
+        if self.disk_cache is not None:
+            key = self.cache_key()
+            cached = self.disk_cache.get(key)
+            if self.stats is not None:
+                self.stats.count("disk_cache_misses" if cached is None else "disk_cache_hits")
+
+            if cached is not None:
+                return cached
+
+        if self.stats is None:
+            compiled = self.__compile(workers, executor, None)
+        else:
+            token = _active_stats.set(self.stats)
+            try:
+                compiled = self.__compile(workers, executor, self.stats)
+            finally:
+                _active_stats.reset(token)
+
+        if key is not None:
+            self.disk_cache.put(key, compiled)
+
+        return compiled
+
+    def cache_key(self) -> str:
+        """Returns a stable hash of everything that determines the compiled scene.
+
+        This covers the render context, the scene options and the contents of every child,
+        including textures, so equal scenes built separately share a key.
+        """
+        self.__resolve_render_context()
+        hasher = new_hasher()
+        hasher.update(shapely.to_wkb(self.render_context.frame))
+        hasher.update(
+            repr(
+                (
+                    self.render_context.grid_pitch,
+                    self.render_context.dimetric_angle,
+                    tuple(self.render_context.origin),
+                    self.__clips_children_to_frame,
+                    self.__occlusion,
+                    self.__depth_sort,
+                    self.__cull_hidden,
+                    len(self._children),
                 )
+            ).encode()
+        )
+        for child in self._children:
+            fingerprint(child, hasher)
+
+        return hasher.hexdigest()
+
+    def iter_compiled(self) -> Iterator[RenderableGeometry]:
+        """Lazily compile the scene, yielding each occluded 2D geometry once it is final.
+
+        Children (or faces, with `depth_sort`) are compiled one at a time from front to back,
+        and every geometry is clipped against the coverage masks of the polygons already seen,
+        as in the "sweep" engine. Geometries are therefore yielded in front-to-back order, and
+        nothing but the masks is retained between them, so the output can be sent straight to
+        a sink without holding the whole scene in memory. Geometries occluded entirely are
+        not yielded. Streaming bypasses the incremental cache used by compile().
+        """
+        self.__resolve_render_context()
+        children = list(reversed(self._children))
+        hidden = self.__hidden_faces(children) if self.__cull_hidden else {}
+        if self.__depth_sort:
+            faces = [
+                face
+                for child in children
+                for i, face in enumerate(flatten_faces(child, self.render_context))
+                if i not in hidden.get(id(child), frozenset())
+            ]
+            order = painter_order(
+                [renderable_vertex_array(face) for face in faces], self.render_context
             )
-            compiled.extend(clipped_and_compiled)
+            items = [(faces[i], frozenset()) for i in order]
+        else:
+            items = [(child, hidden.get(id(child), frozenset())) for child in children]
+
+        outside = (
+            self.__outside_frame([item for item, _ in items])
+            if self.__clips_children_to_frame
+            else [False] * len(items)
+        )
 
-        return self.__occlude(compiled)
+        def compiled_front_to_back() -> Iterator[RenderableGeometry]:
+            for (item, item_hidden), is_outside in zip(reversed(items), reversed(outside)):
+                if is_outside:
+                    continue
 
-    def render(self, vsk: vsketch.Vsketch):
-        """Compile and render the scene to the given sketch."""
-        renderables = self.compile()
-        for renderable in renderables:
-            if renderable.layer == 0:
-                vsk.noStroke()
-            else:
-                vsk.stroke(renderable.layer)
+                units = _compile_child(
+                    item, item_hidden, self.render_context, self.__clips_children_to_frame, False
+                )
+                yield from reversed(_unit_renderables(units))
+
+        for renderable in occlude_stream(compiled_front_to_back()):
+            if not renderable.geometry.is_empty:
+                yield renderable
+
+    def add_child(self, child: Renderable):
+        """Adds a child to the back of the scene."""
+        self._children.append(child)
+        self.mark_dirty(child)
+
+    def insert_child(self, index: int, child: Renderable):
+        """Inserts a child at the given position, where index 0 is the front of the scene."""
+        self._children.insert(index, child)
+        self.mark_dirty(child)
+
+    def remove_child(self, child: Renderable):
+        """Removes a child from the scene."""
+        self._children.remove(child)
+        self.__dirty.discard(id(child))
+
+    def replace_child(self, old_child: Renderable, new_child: Renderable):
+        """Replaces a child with another one at the same position in the scene."""
+        self._children[self._children.index(old_child)] = new_child
+        self.__dirty.discard(id(old_child))
+        self.mark_dirty(new_child)
+
+    def sort_children_by_depth(self):
+        """Reorders the children from front to back by the depth of their 3D bounds.
+
+        This lets callers build scenes in any order instead of sorting children by hand,
+        including children stacked on top of each other.
+        """
+        vertex_arrays = [renderable_vertex_array(child) for child in self._children]
+        keys = volume_depth_keys(vertex_arrays, self.render_context)
+        front_to_back = np.argsort(-keys, kind="stable")
+        self._children[:] = [self._children[i] for i in front_to_back]
+
+    def mark_dirty(self, child: Renderable):
+        """Flags a child that was changed in place so that it is recompiled by the next compile()."""
+        self.__dirty.add(id(child))
+
+    def invalidate(self):
+        """Discards all cached compilation results, forcing a full recompile."""
+        self.__compiled_children.clear()
+        self.__dirty.clear()
+        self.__compiled_order = []
+        self.__occluded = {}
+
+    def render(
+        self,
+        vsk: "vsketch.Vsketch",
+        workers: int | None = None,
+        executor: Executor | None = None,
+        stream: bool = False,
+        merge_lines: bool = False,
+        sort_paths: bool = False,
+    ):
+        """Compile and render the scene to the given sketch.
+
+        Geometries are drawn in a single batch per layer, optionally with their lines merged
+        and ordered to shorten pen-up travel (see batch_by_layer). With `stream` enabled,
+        geometries are instead drawn one at a time as iter_compiled() yields them.
+        """
+        render_to_sketch(self.__output(workers, executor, stream, merge_lines, sort_paths), vsk)
+
+    def write_svg(
+        self,
+        file: str | IO[str],
+        precision: int = SVG_PRECISION,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        stream: bool = False,
+        merge_lines: bool = False,
+        sort_paths: bool = False,
+    ):
+        """Compile the scene and write it to an SVG file or text stream, grouped by layer.
 
-            if isinstance(renderable.geometry, list):
-                for g in renderable.geometry:
-                    vsk.geometry(g)
-            else:
-                vsk.geometry(renderable.geometry)
+        This does not require vsketch. Options are the same as for render().
+        """
+        renderables = self.__output(workers, executor, stream, merge_lines, sort_paths)
+        write_svg(renderables, file, self.render_context.frame_bounds, precision)
 
     @property
     def children(self):
         return self._children
 
-    def __clip_to_frame(self, renderable: RenderableGeometry) -> RenderableGeometry:
-        """
-        Given a shape, clip it to the scene rendering frame.
-        """
-        if not self.__clips_children_to_frame:
-            return renderable
+    def __output(
+        self,
+        workers: int | None,
+        executor: Executor | None,
+        stream: bool,
+        merge_lines: bool,
+        sort_paths: bool,
+    ) -> Iterable[RenderableGeometry]:
+        """Returns the geometries to output, either streamed or batched by layer."""
+        if stream:
+            if merge_lines or sort_paths:
+                raise ValueError("Lines cannot be merged or sorted while streaming")
 
-        renderable.geometry = intersection(
-            self.render_context.frame, renderable.geometry
-        )
-        return renderable
+            return self.iter_compiled()
+
+        return batch_by_layer(self.compile(workers, executor), merge_lines, sort_paths)
 
-    def __occlude(self, renderables: list[RenderableGeometry]) -> list[RenderableGeometry]:
-        geometries = list(map(lambda renderable: renderable.geometry, renderables))
-        tree = STRtree(geometries)
+    def __compile(
+        self, workers: int | None, executor: Executor | None, stats: CompileStats | None
+    ) -> list[RenderableGeometry]:
+        clock = _StageClock(stats)
+        self.__resolve_render_context()
+        if self.__compiled_revision != self.render_context.revision:
+            self.invalidate()
+            self.__compiled_revision = self.render_context.revision
 
-        occluded_geometries = renderables
-        for i, geometry in enumerate(geometries):
-            if not isinstance(geometry, Polygon):
-                continue
+        children = list(reversed(self._children))
+        clock.lap("prepare")
+        hidden = self.__hidden_faces(children) if self.__cull_hidden else {}
+        clock.lap("hidden")
+        stale = [
+            child
+            for child in children
+            if id(child) in self.__dirty
+            or id(child) not in self.__compiled_children
+            or self.__compiled_children[id(child)][2] != hidden.get(id(child), frozenset())
+        ]
+
+        # Children projecting entirely outside the frame compile to nothing, so skip them
+        stale_outside = (
+            self.__outside_frame(stale) if self.__clips_children_to_frame else [False] * len(stale)
+        )
+        visible = [child for child, outside in zip(stale, stale_outside) if not outside]
+        clock.lap("cull")
+        compiled_visible = iter(
+            self.__compile_children(
+                visible,
+                [hidden.get(id(child), frozenset()) for child in visible],
+                workers,
+                executor,
+            )
+        )
 
-            intersecting = list(
-                filter(
-                    lambda idx: idx < i, tree.query(geometry, predicate="intersects")
+        # Compile the stale children, collecting the screen footprints they leave and enter
+        dirty_geometries = []
+        for child, outside in zip(stale, stale_outside):
+            child_hidden = hidden.get(id(child), frozenset())
+            units = [] if outside else next(compiled_visible)
+            if id(child) in self.__compiled_children:
+                dirty_geometries.extend(
+                    _unit_renderables(self.__compiled_children[id(child)][1])
                 )
+
+            self.__compiled_children[id(child)] = (child, units, child_hidden)
+            dirty_geometries.extend(_unit_renderables(units))
+
+        child_ids = {id(child) for child in children}
+        for key in self.__compiled_children.keys() - child_ids:
+            dirty_geometries.extend(_unit_renderables(self.__compiled_children.pop(key)[1]))
+
+        self.__dirty.clear()
+        clock.lap("compile")
+
+        units = [unit for child in children for unit in self.__compiled_children[id(child)][1]]
+        if self.__depth_sort:
+            order = painter_order([vertices for vertices, _ in units], self.render_context)
+            units = [units[i] for i in order]
+
+        compiled = _unit_renderables(units)
+        clock.lap("sort")
+
+        # Occlusion can only be reused if the geometries that were kept are still in the same order
+        fresh = {
+            id(renderable)
+            for child in stale
+            for renderable in _unit_renderables(self.__compiled_children[id(child)][1])
+        }
+        order = [id(renderable) for renderable in compiled]
+        kept = set(order) - fresh
+        reusable = bool(self.__occluded) and [
+            key for key in self.__compiled_order if key in kept
+        ] == [key for key in order if key in kept]
+
+        if reusable:
+            occluded = self.__occlude_incremental(compiled, fresh, dirty_geometries, stats)
+        else:
+            occluded = OCCLUSION_ENGINES[self.__occlusion](compiled, None, stats)
+
+        self.__compiled_order = order
+        self.__occluded = {
+            id(renderable): result for renderable, result in zip(compiled, occluded)
+        }
+        clock.lap("occlude")
+
+        if stats is not None:
+            self.__count_output(stats, children, stale, stale_outside, hidden, occluded)
+
+        return occluded
+
+    def __count_output(
+        self,
+        stats: CompileStats,
+        children: list[Renderable],
+        stale: list[Renderable],
+        stale_outside: list[bool],
+        hidden: dict[int, frozenset[int]],
+        occluded: list[RenderableGeometry],
+    ):
+        """Records what a compile produced, per child and per layer."""
+        stats.count("children_compiled", len(stale) - sum(stale_outside))
+        stats.count("children_culled", sum(stale_outside))
+        stats.count("faces_hidden", sum(len(indices) for indices in hidden.values()))
+
+        index = {id(child): i for i, child in enumerate(self._children)}
+        owner = {
+            id(renderable): index[id(child)]
+            for child in children
+            for renderable in _unit_renderables(self.__compiled_children[id(child)][1])
+        }
+        owners = [owner[key] for key in self.__compiled_order]
+
+        vertices = shapely.get_num_coordinates([r.geometry for r in occluded]).tolist()
+        for child, renderable, count in zip(owners, occluded, vertices):
+            stats.count("geometries", child=child, layer=renderable.layer)
+            stats.count("output_vertices", count, child=child, layer=renderable.layer)
+
+    def __resolve_render_context(self):
+        """Resolves the lazily computed projection terms once, before any workers share them."""
+        self.render_context.origin
+        self.render_context.projection_matrix
+        self.render_context.frame_bounds
+        self.render_context.frame_is_rectangle
+
+    def __compile_children(
+        self,
+        children: list[Renderable],
+        hidden: list[frozenset[int]],
+        workers: int | None,
+        executor: Executor | None,
+    ) -> list[list[_Unit]]:
+        compile_child = partial(
+            _compile_child,
+            render_context=self.render_context,
+            clip_to_frame=self.__clips_children_to_frame,
+            depth_sort=self.__depth_sort,
+        )
+        if executor is not None:
+            if self.stats is not None and isinstance(executor, ThreadPoolExecutor):
+                return list(self.__map_in_context(executor, compile_child, children, hidden))
+
+            return list(executor.map(compile_child, children, hidden))
+
+        if workers is not None and workers > 1 and len(children) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(self.__map_in_context(pool, compile_child, children, hidden))
+
+        return list(map(compile_child, children, hidden))
+
+    def __map_in_context(self, executor: Executor, fn, *iterables):
+        """Maps over a thread pool, running every call in a copy of the current context so
+        that the active stats are visible in the worker threads."""
+        contexts = [contextvars.copy_context() for _ in iterables[0]]
+        return executor.map(partial(_run_in_context, fn), contexts, *iterables)
+
+    def __outside_frame(self, children: list[Renderable]) -> list[bool]:
+        """Flags the children whose projected bounds do not overlap the frame bounds."""
+        if not children:
+            return []
+
+        bounds = project_bounds(
+            [renderable_vertex_array(child) for child in children], self.render_context
+        )
+        min_x, min_y, max_x, max_y = self.render_context.frame_bounds
+        outside = (
+            (bounds[:, 0] > max_x)
+            | (bounds[:, 1] > max_y)
+            | (bounds[:, 2] < min_x)
+            | (bounds[:, 3] < min_y)
+        )
+        return outside.tolist()
+
+    def __hidden_faces(self, children: list[Renderable]) -> dict[int, frozenset[int]]:
+        """Finds the faces of each child that are entirely covered by faces drawn after them.
+
+        Returns the indices of the hidden faces in each child's draw order, keyed by the id()
+        of the child. Only faces of polygons take part; other shapes are never hidden.
+        """
+        faces = [
+            (id(child), i, face)
+            for child in children
+            for i, face in enumerate(flatten_faces(child, self.render_context))
+        ]
+        if self.__depth_sort:
+            order = painter_order(
+                [renderable_vertex_array(face) for _, _, face in faces], self.render_context
+            )
+            faces = [faces[i] for i in order]
+
+        # Project the outline of every polygon face in a single batch
+        outlined = [j for j, (_, _, face) in enumerate(faces) if hasattr(face, "vertex_array")]
+        outlines = [None] * len(faces)
+        if outlined:
+            vertex_arrays = [faces[j][2].vertex_array for j in outlined]
+            rings = linearrings(
+                project_points(np.concatenate(vertex_arrays), self.render_context),
+                indices=np.repeat(np.arange(len(outlined)), [len(v) for v in vertex_arrays]),
             )
-            for idx in intersecting:
-                occluded_geometries[idx].geometry = occluded_geometries[
-                    idx
-                ].geometry.difference(geometry)
+            for j, outline in zip(outlined, polygons(rings)):
+                outlines[j] = outline
+
+        hidden: dict[int, set[int]] = {}
+        for j in np.flatnonzero(hidden_geometries(outlines)):
+            child_id, i, _ = faces[j]
+            hidden.setdefault(child_id, set()).add(i)
+
+        return {child_id: frozenset(indices) for child_id, indices in hidden.items()}
+
+    def __occlude_incremental(
+        self,
+        renderables: list[RenderableGeometry],
+        fresh: set[int],
+        dirty_geometries: list[RenderableGeometry],
+        stats: CompileStats | None = None,
+    ) -> list[RenderableGeometry]:
+        """Occludes only the renderables whose occlusion may differ from the previous compile.
+
+        These are the freshly compiled renderables and any renderable overlapping the old or
+        new footprint of a recompiled or removed child. All others reuse their previous result.
+        """
+        targets = {i for i, renderable in enumerate(renderables) if id(renderable) in fresh}
+        if dirty_geometries and renderables:
+            tree = STRtree([renderable.geometry for renderable in renderables])
+            _, hits = tree.query(
+                [renderable.geometry for renderable in dirty_geometries],
+                predicate="intersects",
+            )
+            targets.update(hits.tolist())
+            if stats is not None:
+                stats.count("strtree_hits", len(hits))
+
+        targets = sorted(targets)
+        occluded = [self.__occluded.get(id(renderable)) for renderable in renderables]
+        engine = OCCLUSION_ENGINES[self.__occlusion]
+        for i, result in zip(targets, engine(renderables, targets, stats)):
+            occluded[i] = result
 
-        return occluded_geometries
+        return occluded
@@ -0,0 +1,275 @@
+import json
+import os
+from typing import IO, Sequence
+
+import numpy as np
+import shapely
+
+from .collection import (
+    FaceCollection,
+    box_collection,
+    polygon_collection,
+    prism_collection,
+    pyramid_collection,
+)
+from .scene import Scene
+from .texture import FillTexture, HatchTexture, Texture
+
+SCENE_FILE_VERSION = 1
+
+# The columns of each table, with their type and the shape of a single row. Columns without
+# a default are required. The "vertices" of polygons hold one row per vertex rather than per
+# polygon, with the number of vertices of each polygon in "sizes".
+_TABLES = {
+    "boxes": {
+        "origin": (np.float64, (3,), None),
+        "size": (np.float64, (3,), None),
+        "layer": (np.int64, (), 1),
+        "textures": (np.int64, (3,), -1),
+    },
+    "prisms": {
+        "origin": (np.float64, (3,), None),
+        "sides": (np.int64, (), None),
+        "radius": (np.float64, (), 1.0),
+        "height": (np.float64, (), 1.0),
+        "layer": (np.int64, (), 1),
+        "textures": (np.int64, (3,), -1),
+    },
+    "pyramids": {
+        "origin": (np.float64, (3,), None),
+        "size": (np.float64, (3,), None),
+        "layer": (np.int64, (), 1),
+        "textures": (np.int64, (), -1),
+    },
+    "polygons": {
+        "sizes": (np.int64, (), None),
+        "vertices": (np.float64, (3,), None),
+        "layer": (np.int64, (), 1),
+        "textures": (np.int64, (), -1),
+    },
+}
+
+# Texture types that can be stored, with the names of their parameters
+_TEXTURE_TYPES = {
+    "hatch": (HatchTexture, ("pitch", "angle", "inset")),
+    "fill": (FillTexture, ("pen_width", "inset", "style", "tolerance")),
+}
+
+
+def _encode_texture(texture: Texture) -> dict:
+    for name, (cls, parameters) in _TEXTURE_TYPES.items():
+        if type(texture) is cls:
+            return {
+                "type": name,
+                "layer": texture.layer,
+                **dict(zip(parameters, texture._parameters())),
+            }
+
+    raise ValueError(f"Unsupported texture type: {type(texture).__name__}")
+
+
+def _decode_texture(spec: dict) -> Texture:
+    spec = dict(spec)
+    try:
+        cls, _ = _TEXTURE_TYPES[spec.pop("type")]
+    except KeyError:
+        raise ValueError(f"Unsupported texture spec: {spec}") from None
+
+    return cls(**spec)
+
+
+def _table_arrays(table: str, columns: dict) -> dict[str, np.ndarray]:
+    """Validates the columns of a table, filling in defaults, and returns them as arrays."""
+    schema = _TABLES[table]
+    unknown = set(columns) - set(schema)
+    if unknown:
+        raise ValueError(f"Unknown {table} columns: {', '.join(sorted(unknown))}")
+
+    count = None
+    arrays = {}
+    for column, (dtype, row_shape, default) in schema.items():
+        if column in columns:
+            array = np.asarray(columns[column], dtype=dtype)
+            if column == "vertices":
+                array = array.reshape(-1, 3)
+        elif default is None:
+            raise ValueError(f"Missing {table} column: {column}")
+        else:
+            array = np.full((count or 0,) + row_shape, default, dtype=dtype)
+
+        if array.shape[1:] != row_shape:
+            raise ValueError(f"Expected rows of shape {row_shape} for {table} {column}")
+        if column == "vertices":
+            if len(array) != arrays["sizes"].sum():
+                raise ValueError("Polygon sizes do not match the number of vertices")
+        elif count is None:
+            count = len(array)
+        elif len(array) != count:
+            raise ValueError(f"Expected {count} rows for {table} {column}")
+
+        arrays[column] = array
+
+    return arrays
+
+
+def save_scene(
+    file: str | os.PathLike | IO[bytes],
+    frame: shapely.Polygon,
+    grid_pitch: float,
+    boxes: dict | None = None,
+    prisms: dict | None = None,
+    pyramids: dict | None = None,
+    polygons: dict | None = None,
+    texture_sets: Sequence[Sequence[Texture]] = (),
+    origin="centroid",
+):
+    """Writes a scene to a file as columnar arrays, one table per kind of shape.
+
+    Each table is a dict mapping column names to arrays with one row per shape:
+
+    - boxes: "origin" (N, 3), "size" (N, 3) as (width, depth, height), "layer" and
+      "textures" (N, 3) for the (top, left, right) faces.
+    - prisms: "origin" (N, 3), "sides", "radius", "height", "layer" and "textures" (N, 3)
+      for the (top, bottom, sides) faces.
+    - pyramids: "origin" (N, 3), "size" (N, 3) as (width, depth, height), "layer" and
+      "textures" for the side faces.
+    - polygons: "sizes" (the number of vertices of each polygon), "vertices" (V, 3) holding
+      the vertices of all polygons one after the other, "layer" and "textures".
+
+    Textures are given as indices into `texture_sets`, a list of lists of textures, with -1
+    for faces without textures. Only HatchTexture and FillTexture can be stored. Layers
+    default to 1 and textures to none.
+
+    The file is a NumPy .npz archive, which load_scene() reads back without creating a
+    Python object per shape.
+    """
+    if isinstance(origin, str) and origin != "centroid":
+        raise ValueError(f"Unsupported origin: {origin}")
+
+    arrays = {
+        "version": np.array(SCENE_FILE_VERSION),
+        "frame": np.frombuffer(shapely.to_wkb(frame), dtype=np.uint8),
+        "grid_pitch": np.array(grid_pitch, dtype=np.float64),
+        "origin": np.array([], dtype=np.float64)
+        if isinstance(origin, str)
+        else np.asarray(origin, dtype=np.float64),
+        "texture_sets": np.array(
+            json.dumps(
+                [[_encode_texture(texture) for texture in textures] for textures in texture_sets]
+            )
+        ),
+    }
+    for table, columns in (
+        ("boxes", boxes),
+        ("prisms", prisms),
+        ("pyramids", pyramids),
+        ("polygons", polygons),
+    ):
+        if columns is None:
+            continue
+
+        for column, array in _table_arrays(table, columns).items():
+            if column == "textures" and np.any(array >= len(texture_sets)):
+                raise ValueError(f"Texture set index out of range for {table}")
+
+            arrays[f"{table}.{column}"] = array
+
+    np.savez(file, **arrays)
+
+
+def load_collection(
+    file: str | os.PathLike | IO[bytes],
+) -> tuple[FaceCollection, dict]:
+    """Reads the shapes of a scene file into a single FaceCollection.
+
+    Returns the collection along with the scene settings ("frame", "grid_pitch" and
+    "origin"). All shapes are built with vectorized array operations, so that loading
+    millions of shapes costs about as much as reading their arrays.
+    """
+    with np.load(file) as data:
+        version = int(data["version"])
+        if version != SCENE_FILE_VERSION:
+            raise ValueError(f"Unsupported scene file version: {version}")
+
+        texture_sets = [
+            [_decode_texture(spec) for spec in textures]
+            for textures in json.loads(str(data["texture_sets"]))
+        ]
+        tables = {
+            table: {
+                column: data[f"{table}.{column}"]
+                for column in schema
+                if f"{table}.{column}" in data.files
+            }
+            for table, schema in _TABLES.items()
+        }
+        origin = data["origin"]
+        settings = {
+            "frame": shapely.from_wkb(data["frame"].tobytes()),
+            "grid_pitch": float(data["grid_pitch"]),
+            "origin": "centroid" if len(origin) == 0 else tuple(origin.tolist()),
+        }
+
+    collections = []
+    if tables["boxes"]:
+        boxes = _table_arrays("boxes", tables["boxes"])
+        collections.append(
+            box_collection(
+                boxes["origin"], boxes["size"], boxes["layer"], boxes["textures"], texture_sets
+            )
+        )
+    if tables["prisms"]:
+        prisms = _table_arrays("prisms", tables["prisms"])
+        collections.append(
+            prism_collection(
+                prisms["origin"],
+                prisms["sides"],
+                prisms["radius"],
+                prisms["height"],
+                prisms["layer"],
+                prisms["textures"],
+                texture_sets,
+            )
+        )
+    if tables["pyramids"]:
+        pyramids = _table_arrays("pyramids", tables["pyramids"])
+        collections.append(
+            pyramid_collection(
+                pyramids["origin"],
+                pyramids["size"],
+                pyramids["layer"],
+                pyramids["textures"],
+                texture_sets,
+            )
+        )
+    if tables["polygons"]:
+        polygons = _table_arrays("polygons", tables["polygons"])
+        collections.append(
+            polygon_collection(
+                polygons["vertices"],
+                polygons["sizes"],
+                polygons["layer"],
+                polygons["textures"],
+                texture_sets,
+            )
+        )
+
+    # Shapes of every kind go into one collection, so that they are depth sorted together
+    collection = FaceCollection.concatenate(collections)
+    return collection, settings
+
+
+def load_scene(file: str | os.PathLike | IO[bytes], **options) -> Scene:
+    """Reads a scene written by save_scene().
+
+    The shapes are loaded as a single FaceCollection child, and any keyword arguments are
+    passed on to Scene (e.g. `occlusion` or `disk_cache`).
+    """
+    collection, settings = load_collection(file)
+    return Scene(
+        settings["frame"],
+        settings["grid_pitch"],
+        [collection],
+        origin=settings["origin"],
+        **options,
+    )
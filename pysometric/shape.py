@@ -1,4 +1,3 @@
-import math
 from abc import abstractmethod
 
 import numpy as np
@@ -7,10 +6,9 @@ import shapely
 from pysometric.vector import Vector3
 
 from .axis import Axis
-from .matrix import rotate_x, rotate_y, rotate_z
+from .matrix import compose_rotations, transform_points
 from .plane import Plane
-from .render import RenderableGeometry, project_point
-from .scene import RenderContext
+from .render import RenderableGeometry, RenderContext, project_points
 from .texture import Texture
 from .vector import Vector2, Vector3
 
@@ -29,45 +27,25 @@ def project_to_plane(point: Vector2, plane: Plane) -> Vector3:
         return (0, x, y)
 
 
-def _rotate_vertices_x(
-    vertices: list[Vector3], angle: float, center: Vector3
-) -> list[Vector3]:
-    """Rotates the list of vertices around the X-axis for the given angle with the given center of rotation."""
-    return list(map(lambda v: rotate_x(v, angle, center), vertices))
-
-
-def _rotate_vertices_y(
-    vertices: list[Vector3], angle: float, center: Vector3
-) -> list[Vector3]:
-    return list(map(lambda v: rotate_y(v, angle, center), vertices))
-
-
-def _rotate_vertices_z(
-    vertices: list[Vector3], angle: float, center: Vector3
-) -> list[Vector3]:
-    return list(map(lambda v: rotate_z(v, angle, center), vertices))
+# The 3D axes that the x and y coordinates of a 2D point map to for each Plane
+_PLANE_AXES = {Plane.XY: (0, 1), Plane.XZ: (0, 2), Plane.YZ: (1, 2)}
 
 
 def _regular_polygon_vertices(
     origin: Vector3, num_vertices: int, radius: float, orientation: Plane
-) -> list[Vector3]:
-    angle = 2 * np.pi / num_vertices
-    vertices = []
-    for i in range(num_vertices):
-        vertices.append((math.cos(i * angle) * radius, math.sin(i * angle) * radius))
+) -> np.ndarray:
+    angles = np.arange(num_vertices) * (2 * np.pi / num_vertices)
+    vertices = np.zeros((num_vertices, 3))
+    x_axis, y_axis = _PLANE_AXES[orientation]
+    vertices[:, x_axis] = np.cos(angles) * radius
+    vertices[:, y_axis] = np.sin(angles) * radius
 
-    def project_and_translate(v):
-        origin_x, origin_y, origin_z = origin
-        x, y, z = project_to_plane(v, orientation)
-        return (x + origin_x, y + origin_y, z + origin_z)
-
-    vertices = list(map(project_and_translate, vertices))
-    return vertices
+    return vertices + np.asarray(origin, dtype=np.float64)
 
 
 def _rect_vertices(
     origin: Vector3, width: float, height: float, orientation: Plane
-) -> list[Vector3]:
+) -> np.ndarray:
     """Returns the vertices for a rectangular plane with an orientation in the given Plane.
 
     Vertices will always be returned in clockwise order starting at the origin.
@@ -77,33 +55,41 @@ def _rect_vertices(
     hh = height / 2.0
 
     if orientation == Plane.YZ:
-        return [
-            (x, y - hw, z - hh),
-            (x, y + hw, z - hh),
-            (x, y + hw, z + hh),
-            (x, y - hw, z + hh),
-        ]
+        return np.array(
+            [
+                (x, y - hw, z - hh),
+                (x, y + hw, z - hh),
+                (x, y + hw, z + hh),
+                (x, y - hw, z + hh),
+            ]
+        )
 
     if orientation == Plane.XZ:
-        return [
-            (x - hw, y, z - hh),
-            (x - hw, y, z + hh),
-            (x + hw, y, z + hh),
-            (x + hw, y, z - hh),
-        ]
+        return np.array(
+            [
+                (x - hw, y, z - hh),
+                (x - hw, y, z + hh),
+                (x + hw, y, z + hh),
+                (x + hw, y, z - hh),
+            ]
+        )
 
     if orientation == Plane.XY:
-        return [
-            (x - hw, y - hh, z),
-            (x - hw, y + hh, z),
-            (x + hw, y + hh, z),
-            (x + hw, y - hh, z),
-        ]
+        return np.array(
+            [
+                (x - hw, y - hh, z),
+                (x - hw, y + hh, z),
+                (x + hw, y + hh, z),
+                (x + hw, y - hh, z),
+            ]
+        )
 
     raise "Unsupported Plane value provided for orientation."
 
 
 class Rotation:
+    __slots__ = ("_axis", "_angle", "_origin")
+
     def __init__(self, axis: Axis, angle: float, origin: Vector3):
         self._axis = axis
         self._angle = angle
@@ -125,10 +111,12 @@ class Rotation:
 class Renderable:
     """Base class for all renderable objects, both individual shapes and groups of shapes."""
 
+    __slots__ = ("_layer", "_rotations", "_vertices")
+
     def __init__(self, rotations: list[Rotation] = [], layer=1):
         self._layer = layer
         self._rotations = rotations
-        self._vertices = []
+        self._vertices = np.empty((0, 3))
 
     @abstractmethod
     def compile(self, render_context: RenderContext) -> list[RenderableGeometry]:
@@ -144,26 +132,33 @@ class Renderable:
 
     @property
     def vertices(self) -> list[Vector3]:
+        """The vertices as a list of (x, y, z) tuples, built on demand from vertex_array."""
+        return list(map(tuple, self._vertices.tolist()))
+
+    @property
+    def vertex_array(self) -> np.ndarray:
+        """The vertices as a read-only, contiguous (N, 3) float64 array."""
         return self._vertices
 
 
 class Polygon(Renderable):
+    __slots__ = ("_textures",)
+
     def __init__(
         self,
-        vertices: list[Vector3],
+        vertices: list[Vector3] | np.ndarray,
         textures: list[Texture] = [],
         rotations: list[Rotation] = [],
         layer=1,
     ):
         super().__init__(rotations, layer)
-        self._vertices = vertices
+        self._vertices = np.array(vertices, dtype=np.float64).reshape(-1, 3)
         self._textures = textures
         self._apply_rotations()
+        self._vertices.flags.writeable = False
 
     def compile(self, render_context: RenderContext) -> list[RenderableGeometry]:
-        polygon2d = shapely.Polygon(
-            list(map(lambda v: project_point(v, render_context), self.vertices))
-        )
+        polygon2d = shapely.Polygon(project_points(self._vertices, render_context))
         compiled_textures: list[RenderableGeometry] = [
             texture.compile(polygon2d, render_context) for texture in self.textures
         ]
@@ -175,27 +170,17 @@ class Polygon(Renderable):
         return self._textures
 
     def _apply_rotations(self):
-        for rotation in self.rotations:
-            match rotation.axis:
-                case Axis.X:
-                    self._vertices = _rotate_vertices_x(
-                        self._vertices, rotation.angle, rotation.origin
-                    )
-
-                case Axis.Y:
-                    self._vertices = _rotate_vertices_y(
-                        self._vertices, rotation.angle, rotation.origin
-                    )
-
-                case Axis.Z:
-                    self._vertices = _rotate_vertices_z(
-                        self._vertices, rotation.angle, rotation.origin
-                    )
+        if self.rotations:
+            self._vertices = transform_points(
+                self._vertices, compose_rotations(self.rotations)
+            )
 
 
 class RegularPolygon(Polygon):
     """Defines a symmetrical polygon in isometric 3D space."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         origin: Vector3,
@@ -217,6 +202,8 @@ class Rectangle(Polygon):
     planes defined in the Plane enumeration.
     """
 
+    __slots__ = ("_width", "_height")
+
     def __init__(
         self,
         origin: Vector3,
@@ -246,6 +233,8 @@ class Rectangle(Polygon):
 
 
 class Circle(Polygon):
+    __slots__ = ()
+
     def __init__(
         self,
         center: Vector3,
@@ -268,9 +257,24 @@ class Group:
     def children(self) -> list[Renderable]:
         return self._children
 
+    def draw_order(self, render_context: RenderContext) -> list[Renderable]:
+        """Returns the shapes of the group, with nested groups expanded, in the order they are drawn.
+
+        Shapes are ordered from back to front. Subclasses may reorder shapes or leave out
+        shapes that can never be seen.
+        """
+        faces = []
+        for child in self.children:
+            if isinstance(child, Group):
+                faces.extend(child.draw_order(render_context))
+            else:
+                faces.append(child)
+
+        return faces
+
     def compile(self, render_context: RenderContext) -> list[RenderableGeometry]:
         compiled = []
-        for child in self.children:
-            compiled = compiled + child.compile(render_context)
+        for face in self.draw_order(render_context):
+            compiled.extend(face.compile(render_context))
 
         return compiled
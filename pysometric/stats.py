@@ -0,0 +1,107 @@
+from collections import defaultdict
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Callable
+
+# The stats collecting for the compile running in the current context, if any. Code deep in
+# the pipeline (texture fills, frame clipping) reports to it without being passed the stats.
+_active_stats: ContextVar["CompileStats | None"] = ContextVar(
+    "pysometric_compile_stats", default=None
+)
+
+
+def active_stats() -> "CompileStats | None":
+    """Returns the stats collecting for the current compile, or None when profiling is off."""
+    return _active_stats.get()
+
+
+class CompileStats:
+    """Records where the time goes when a Scene is compiled.
+
+    Attach an instance to a Scene to profile every call to compile(); stats accumulate over
+    calls until reset(). All methods are thread-safe.
+
+    The stages of compile() are timed in wall-clock seconds: "prepare" (resolving the render
+    context), "hidden" (finding hidden faces), "cull" (skipping children outside the frame),
+    "compile" (projecting, texturing and clipping children), "sort" and "occlude". Within
+    "compile", the time spent generating texture fills ("texture") and clipping to the frame
+    ("clip") is summed over the children; it is not collected from process pool workers.
+
+    Attributes
+    ----------
+    stages : dict[str, float]
+        The accumulated seconds spent in each stage.
+    counters : dict[str, int]
+        Totals such as compiled geometries, STRtree query hits, difference operations and
+        output vertices.
+    children : dict[int, dict[str, int]]
+        Geometry and output vertex counts per top-level child, keyed by its index in the
+        scene's children.
+    layers : dict[int, dict[str, int]]
+        Geometry and output vertex counts per layer.
+    callback : Callable[[str, float], None] | None
+        Called with the name and duration of every stage as it completes, e.g. to forward
+        timings to a metrics system.
+    """
+
+    def __init__(self, callback: Callable[[str, float], None] | None = None) -> None:
+        self.callback = callback
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """Discards all recorded timings and counters."""
+        with self._lock:
+            self.stages: dict[str, float] = defaultdict(float)
+            self.counters: dict[str, int] = defaultdict(int)
+            self.children: dict[int, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            self.layers: dict[int, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add_time(self, stage: str, seconds: float):
+        """Adds time spent in a stage."""
+        with self._lock:
+            self.stages[stage] += seconds
+
+        if self.callback is not None:
+            self.callback(stage, seconds)
+
+    def count(
+        self, counter: str, n: int = 1, child: int | None = None, layer: int | None = None
+    ):
+        """Increments a counter in total and, optionally, for a child and a layer."""
+        with self._lock:
+            self.counters[counter] += n
+            if child is not None:
+                self.children[child][counter] += n
+            if layer is not None:
+                self.layers[layer][counter] += n
+
+    def as_dict(self) -> dict:
+        """Returns all recorded values as plain dictionaries, e.g. for JSON export."""
+        with self._lock:
+            return {
+                "stages": dict(self.stages),
+                "counters": dict(self.counters),
+                "children": {key: dict(value) for key, value in self.children.items()},
+                "layers": {key: dict(value) for key, value in self.layers.items()},
+            }
+
+
+class _StageClock:
+    """Times consecutive stages, doing nothing at all when there are no stats to report to."""
+
+    __slots__ = ("_stats", "_last")
+
+    def __init__(self, stats: CompileStats | None) -> None:
+        self._stats = stats
+        self._last = perf_counter() if stats is not None else 0.0
+
+    def lap(self, stage: str):
+        """Records the time since the previous lap as spent in `stage`."""
+        if self._stats is None:
+            return
+
+        now = perf_counter()
+        self._stats.add_time(stage, now - self._last)
+        self._last = now
@@ -0,0 +1,156 @@
+import shutil
+from tempfile import SpooledTemporaryFile
+from typing import IO, Iterable
+
+import numpy as np
+import shapely
+
+from .render import RenderableGeometry, line_parts
+
+SVG_PRECISION = 3
+
+# Layer buffers are kept in memory up to this many characters before spilling to disk
+_LAYER_SPOOL_SIZE = 1 << 22
+
+
+def _path_data(geometries: list[shapely.Geometry], precision: int) -> str:
+    """Formats the line work of a batch of geometries as SVG path data, one subpath per line."""
+    coords, index = shapely.get_coordinates(line_parts(geometries), return_index=True)
+    if len(coords) == 0:
+        return ""
+
+    formatted = np.char.mod(f"%.{precision}f", coords)
+    points = np.char.add(np.char.add(formatted[:, 0], ","), formatted[:, 1])
+    starts = np.ones(len(index), dtype=bool)
+    starts[1:] = index[1:] != index[:-1]
+    return " ".join(np.char.add(np.where(starts, "M", ""), points).tolist())
+
+
+class SvgWriter:
+    """Writes compiled geometries to an SVG document without going through vsketch.
+
+    Geometries are grouped by layer into Inkscape layers, so that the document can be
+    plotted (or processed by vpype) one pen at a time. Polygons are drawn as their outlines
+    and geometries on layer 0 are not drawn, as with Scene.render().
+
+    Geometries may be written one at a time, as they are streamed from Scene.iter_compiled().
+    They are formatted in batches of `batch_size` per layer, each becoming a single path.
+    Formatted paths are spooled per layer (to temporary files once they grow large) and the
+    document is assembled when the writer is closed.
+
+    Parameters
+    ----------
+    file : str | IO[str]
+        The path of the SVG file to create, or an open text stream.
+    bounds : tuple[float, float, float, float]
+        The (min_x, min_y, max_x, max_y) region of the drawing, usually the scene frame bounds.
+    precision : int
+        The number of decimals written for each coordinate.
+    batch_size : int
+        The number of geometries of a layer formatted together.
+    """
+
+    def __init__(
+        self,
+        file: str | IO[str],
+        bounds: tuple[float, float, float, float],
+        precision: int = SVG_PRECISION,
+        batch_size: int = 4096,
+    ) -> None:
+        self._file = file
+        self._bounds = bounds
+        self._precision = precision
+        self._batch_size = batch_size
+        self._pending: dict[int, list[shapely.Geometry]] = {}
+        self._layers: dict[int, SpooledTemporaryFile] = {}
+        self._closed = False
+
+    def write(self, renderable: RenderableGeometry):
+        """Adds a compiled geometry to the document."""
+        if renderable.layer == 0:
+            return
+
+        pending = self._pending.setdefault(renderable.layer, [])
+        if isinstance(renderable.geometry, list):
+            pending.extend(renderable.geometry)
+        else:
+            pending.append(renderable.geometry)
+
+        if len(pending) >= self._batch_size:
+            self._flush(renderable.layer)
+
+    def write_all(self, renderables: Iterable[RenderableGeometry]):
+        """Adds every compiled geometry of an iterable to the document."""
+        for renderable in renderables:
+            self.write(renderable)
+
+    def close(self):
+        """Writes the document and releases the layer buffers."""
+        if self._closed:
+            return
+
+        self._closed = True
+        for layer in list(self._pending):
+            self._flush(layer)
+
+        if isinstance(self._file, str):
+            with open(self._file, "w", encoding="utf-8", buffering=1 << 16) as f:
+                self._write_document(f)
+        else:
+            self._write_document(self._file)
+
+        for spool in self._layers.values():
+            spool.close()
+
+        self._layers.clear()
+
+    def __enter__(self) -> "SvgWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _flush(self, layer: int):
+        data = _path_data(self._pending.pop(layer), self._precision)
+        if not data:
+            return
+
+        if layer not in self._layers:
+            self._layers[layer] = SpooledTemporaryFile(
+                max_size=_LAYER_SPOOL_SIZE, mode="w+", encoding="utf-8"
+            )
+
+        self._layers[layer].write(f'<path d="{data}"/>\n')
+
+    def _write_document(self, f: IO[str]):
+        min_x, min_y, max_x, max_y = self._bounds
+        width, height = max_x - min_x, max_y - min_y
+        f.write(
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            'xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape" '
+            f'width="{width:g}" height="{height:g}" '
+            f'viewBox="{min_x:g} {min_y:g} {width:g} {height:g}">\n'
+        )
+        for layer in sorted(self._layers):
+            spool = self._layers[layer]
+            spool.seek(0)
+            f.write(
+                f'<g id="layer{layer}" inkscape:groupmode="layer" inkscape:label="{layer}" '
+                'fill="none" stroke="black">\n'
+            )
+            shutil.copyfileobj(spool, f)
+            f.write("</g>\n")
+
+        f.write("</svg>\n")
+
+
+def write_svg(
+    renderables: Iterable[RenderableGeometry],
+    file: str | IO[str],
+    bounds: tuple[float, float, float, float],
+    precision: int = SVG_PRECISION,
+):
+    """Writes compiled geometries to an SVG document, grouped by layer."""
+    with SvgWriter(file, bounds, precision) as writer:
+        writer.write_all(renderables)
@@ -0,0 +1,205 @@
+import numpy as np
+import pytest
+import shapely
+
+from ..collection import (
+    FaceCollection,
+    box_collection,
+    polygon_collection,
+    prism_collection,
+    pyramid_collection,
+)
+from ..depth import flatten_faces
+from ..render import RenderContext
+from ..scene import DIMETRIC_ANGLE, Scene
+from ..shape import Polygon
+from ..texture import HatchTexture
+from ..volume import Box, Prism, Pyramid
+
+
+@pytest.fixture
+def frame():
+    return shapely.box(0, 0, 500, 500)
+
+
+@pytest.fixture
+def render_context(frame):
+    return RenderContext(frame, 20, DIMETRIC_ANGLE)
+
+
+def _compile_faces(group, render_context):
+    compiled = []
+    for face in group.draw_order(render_context):
+        result = face.compile(render_context)
+        compiled.extend(result if isinstance(result, list) else [result])
+    return compiled
+
+
+def _assert_same(compiled, expected):
+    assert [r.layer for r in compiled] == [r.layer for r in expected]
+    for a, b in zip(compiled, expected):
+        assert shapely.equals_exact(a.geometry, b.geometry, 1e-9)
+
+
+class TestFaceCollection:
+    def test_box_faces(self, render_context):
+        """Test that the faces of a box collection match those of Box"""
+        hatch = HatchTexture(4, layer=2)
+        box = Box((1, 2, 0.5), 2, 1, 3, top={"textures": [hatch]})
+        collection = box_collection(
+            [(1, 2, 0.5)], [(2, 1, 3)], textures=[[0, -1, -1]], texture_sets=[[hatch]]
+        )
+
+        assert len(collection) == 1
+        assert [face.vertex_array.tolist() for face in box.children] == [
+            face.vertex_array.tolist() for face in collection.draw_order(render_context)
+        ]
+        compiled = collection.compile(render_context)
+        assert [r.layer for r in compiled] == [1, 1, 1, 2]
+
+    @pytest.mark.parametrize("num_sides", [3, 4, 6, 8])
+    def test_prism_faces(self, render_context, num_sides):
+        """Test that a prism collection compiles like Prism, with back faces culled"""
+        hatch = HatchTexture(4)
+        prism = Prism((1, -1, 0), num_sides, 1.5, 2, top={"textures": [hatch]})
+        collection = prism_collection(
+            [(1, -1, 0)], num_sides, 1.5, 2, textures=[[0, -1, -1]], texture_sets=[[hatch]]
+        )
+
+        _assert_same(
+            collection.compile(render_context), _compile_faces(prism, render_context)
+        )
+
+    def test_pyramid_faces(self, render_context):
+        """Test that a pyramid collection compiles like Pyramid, with back faces culled"""
+        hatch = HatchTexture(4)
+        pyramid = Pyramid((0, 0, 0), 2, 3, 2, sides=[{"textures": [hatch]}] * 4, layer=2)
+        collection = pyramid_collection([(0, 0, 0)], [(2, 3, 2)], 2, 0, [[hatch]])
+
+        _assert_same(
+            collection.compile(render_context), _compile_faces(pyramid, render_context)
+        )
+
+    def test_mixed_side_counts(self, render_context):
+        """Test that prisms with different side counts keep their order and attributes"""
+        origins = [(0, 0, 0), (3, 0, 0), (0, 3, 0)]
+        collection = prism_collection(origins, [6, 3, 4], layers=[1, 2, 3])
+
+        expected = [
+            Prism(origin, sides).faces for origin, sides in zip(origins, [6, 3, 4])
+        ]
+        vertices = np.concatenate([face.vertex_array for faces in expected for face in faces])
+        assert np.array_equal(collection.vertex_array, vertices)
+        assert collection.face_sizes.tolist() == [
+            face.vertex_array.shape[0] for faces in expected for face in faces
+        ]
+        assert collection.face_layers.tolist() == [1] * 8 + [2] * 5 + [3] * 6
+
+    def test_depth_order(self, frame):
+        """Test that volumes are drawn back to front whatever their order in the collection"""
+        origins = np.array([(0, 0, 0), (1, 1, 0), (-1, -1, 0), (1, 0, 0)])
+        collection = box_collection(origins, (1, 1, 1))
+        boxes = Scene(frame, 20, [Box(tuple(origin)) for origin in origins])
+        boxes.sort_children_by_depth()
+
+        compiled = Scene(frame, 20, [collection]).compile()
+        expected = boxes.compile()
+        assert shapely.union_all([r.geometry for r in compiled]).equals(
+            shapely.union_all([r.geometry for r in expected])
+        )
+        assert len(compiled) == len(expected)
+
+    def test_stacked_depth_order(self, frame):
+        """Test that a volume stacked on top of another is drawn in front of it"""
+        collection = box_collection([(0, 0, 0), (0, 0, 1)], (1, 1, 1))
+        expected = Scene(frame, 20, [Box((0, 0, 1)), Box((0, 0, 0))]).compile()
+
+        compiled = Scene(frame, 20, [collection]).compile()
+        assert shapely.union_all([r.geometry for r in compiled]).equals(
+            shapely.union_all([r.geometry for r in expected])
+        )
+        assert sum(r.geometry.length for r in compiled) == pytest.approx(
+            sum(r.geometry.length for r in expected)
+        )
+
+    def test_polygons(self, render_context):
+        """Test that polygons of different sizes compile with their layers"""
+        triangle = [(0, 0, 0), (1, 0, 0), (0, 1, 0)]
+        square = [(3, 0, 0), (4, 0, 0), (4, 1, 0), (3, 1, 0)]
+        collection = polygon_collection(triangle + square, [3, 4], layers=[2, 3])
+
+        compiled = collection.compile(render_context)
+        expected = Polygon(triangle, layer=2).compile(render_context) + Polygon(
+            square, layer=3
+        ).compile(render_context)
+        assert sorted(r.layer for r in compiled) == [2, 3]
+        for r in compiled:
+            match = [e for e in expected if e.layer == r.layer][0]
+            assert r.geometry.equals(match.geometry)
+
+    def test_concatenate(self, render_context):
+        """Test that concatenated collections keep their textures and layers"""
+        hatch = HatchTexture(4, layer=2)
+        boxes = box_collection([(0, 0, 0)], (1, 1, 1), textures=0, texture_sets=[[hatch]])
+        prisms = prism_collection([(3, 3, 0)], 4, layers=3)
+        collection = FaceCollection.concatenate([prisms, boxes])
+
+        assert len(collection) == 2
+        assert collection.face_textures.tolist() == [-1] * 6 + [0] * 3
+        assert len(collection.compile(render_context)) == len(
+            prisms.compile(render_context)
+        ) + len(boxes.compile(render_context))
+
+    def test_flatten_faces(self, render_context):
+        """Test that collections expand into their visible faces"""
+        collection = prism_collection([(0, 0, 0)], 4)
+        faces = flatten_faces(collection, render_context)
+
+        assert all(isinstance(face, Polygon) for face in faces)
+        assert len(faces) == len(Prism((0, 0, 0), 4).draw_order(render_context))
+
+    def test_scene_options(self, frame):
+        """Test that collections compile in depth sorted and hidden face culling scenes"""
+        collection = box_collection([(0, 0, 0), (0.5, 0.5, 0)], (1, 1, 1))
+        plain = Scene(frame, 20, [collection]).compile()
+        sorted_faces = Scene(frame, 20, [collection], depth_sort=True, cull_hidden=True)
+
+        assert shapely.union_all([r.geometry for r in plain]).equals(
+            shapely.union_all([r.geometry for r in sorted_faces.compile()])
+        )
+
+    @pytest.mark.parametrize(
+        "build",
+        [
+            lambda origins, sets: box_collection(
+                origins, (1, 1, 1), textures=0, texture_sets=sets
+            ),
+            lambda origins, sets: prism_collection(origins, 6, textures=0, texture_sets=sets),
+            lambda origins, sets: pyramid_collection(origins, (1, 1, 1), 1, 0, sets),
+        ],
+        ids=["box", "prism", "pyramid"],
+    )
+    def test_outside_frame(self, frame, build):
+        """Test that volumes outside the frame are skipped when the scene clips to it"""
+        texture_sets = [[HatchTexture(4, layer=2)]]
+        collection = build([(0, 0, 0), (100, 0, 0)], texture_sets)
+        render_context = RenderContext(frame, 20, DIMETRIC_ANGLE, clip_to_frame=True)
+
+        compiled = collection.compile(render_context)
+        expected = build([(0, 0, 0)], texture_sets).compile(render_context)
+        _assert_same(compiled, expected)
+        assert len(collection.draw_order(render_context)) == len(
+            build([(0, 0, 0)], texture_sets).draw_order(render_context)
+        )
+
+        render_context.clip_to_frame = False
+        assert len(collection.compile(render_context)) == 2 * len(expected)
+        unclipped = Scene(frame, 20, [collection], clip_to_frame=False).compile()
+        assert any(not r.geometry.intersects(frame) for r in unclipped)
+
+    def test_empty(self, render_context):
+        """Test that empty collections compile to nothing"""
+        collection = box_collection(np.empty((0, 3)), (1, 1, 1))
+
+        assert len(collection) == 0
+        assert collection.compile(render_context) == []
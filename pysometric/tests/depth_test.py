@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+import pytest
+import shapely
+
+from ..depth import depth_keys, painter_order, renderable_vertex_array, sort_back_to_front
+from ..instance import InstancedGroup
+from ..render import RenderContext
+from ..scene import DIMETRIC_ANGLE, Scene
+from ..volume import Box, Prism
+
+
+@pytest.fixture
+def render_context():
+    return RenderContext(shapely.box(0, 0, 100, 100), 10, DIMETRIC_ANGLE)
+
+
+def test_depth_keys(render_context):
+    """Test that depth keys are the largest projected y of each vertex array"""
+    arrays = [
+        np.array([(0, 0, 0), (1, 0, 0)], dtype=np.float64),
+        np.empty((0, 3)),
+        np.array([(-1, -1, 0)], dtype=np.float64),
+    ]
+    keys = depth_keys(arrays, render_context)
+    assert keys[0] == pytest.approx(50)
+    assert keys[1] == -math.inf
+    assert keys[2] == pytest.approx(50 + 20 * math.sin(DIMETRIC_ANGLE))
+
+
+def test_sort_back_to_front(render_context):
+    arrays = [
+        np.array([(0, 0, 0)], dtype=np.float64),
+        np.array([(2, 2, 0)], dtype=np.float64),
+        np.array([(-2, -2, 0)], dtype=np.float64),
+    ]
+    assert sort_back_to_front(["middle", "back", "front"], arrays, render_context) == [
+        "back",
+        "middle",
+        "front",
+    ]
+
+
+def test_painter_order(render_context):
+    """Test that overlapping faces are ordered by which hides which, not by their centers"""
+    floor = np.array([(-5, -5, 0), (-5, 5, 0), (5, 5, 0), (5, -5, 0)], dtype=np.float64)
+    wall = np.array([(2, 1, 0), (2, 1, 2), (2, 3, 2), (2, 3, 0)], dtype=np.float64)
+    far = np.array([(9, 9, 0), (9, 9, 1), (9, 10, 1)], dtype=np.float64)
+
+    assert painter_order([wall, floor, far], render_context).tolist() == [2, 1, 0]
+
+
+def test_painter_order_cycle(render_context):
+    """Test that faces overlapping each other in a cycle are all drawn once"""
+    # Three slanted planks, each resting on the next
+    planks = [
+        np.array([(0, 0, 0), (4, 0, 1), (4, 1, 1), (0, 1, 0)], dtype=np.float64),
+        np.array([(3, -1, 0.5), (3, 3, 1.5), (4, 3, 1.5), (4, -1, 0.5)], dtype=np.float64),
+        np.array([(4, 2, 0.5), (0, 2, 1.5), (0, 3, 1.5), (4, 3, 0.5)], dtype=np.float64),
+    ]
+    assert sorted(painter_order(planks, render_context).tolist()) == [0, 1, 2]
+    assert painter_order([], render_context).tolist() == []
+
+
+def test_renderable_vertex_array():
+    box = Box((0, 0, 0))
+    assert renderable_vertex_array(box).shape == (12, 3)
+    instanced = InstancedGroup(box, [(0, 0, 0), (1, 0, 0)])
+    assert renderable_vertex_array(instanced).shape == (24, 3)
+
+
+def test_prism_side_faces_sorted():
+    """Test that Prism sides compile back to front"""
+    render_context = RenderContext(shapely.box(0, 0, 100, 100), 10, DIMETRIC_ANGLE)
+    prism = Prism((0, 0, 0), 100)
+    sides = [face for face in prism.draw_order(render_context) if face in prism.side_faces]
+    keys = depth_keys([face.vertex_array for face in sides], render_context)
+    assert np.all(np.diff(keys) >= 0)
+
+
+def test_scene_sort_children_by_depth():
+    """Test that scene children are reordered from front to back"""
+    back, middle, front = Box((2, 2, 0)), Box((0, 0, 0)), Box((-2, -2, 0))
+    scene = Scene(shapely.box(0, 0, 500, 500), 20, [middle, back, front])
+    scene.sort_children_by_depth()
+    assert scene.children == [front, middle, back]
+
+
+def test_scene_sort_stacked_children_by_depth():
+    """Test that a child stacked on another is sorted in front of it"""
+    frame = shapely.box(0, 0, 500, 500)
+    bottom, middle, top = Box((0, 0, 0)), Box((0, 0, 1)), Box((0, 0, 2))
+    scene = Scene(frame, 20, [bottom, top, middle])
+    scene.sort_children_by_depth()
+    assert scene.children == [top, middle, bottom]
+
+    expected = Scene(frame, 20, [Box((0, 0, 2)), Box((0, 0, 1)), Box((0, 0, 0))])
+    assert sum(r.geometry.length for r in scene.compile()) == pytest.approx(
+        sum(r.geometry.length for r in expected.compile())
+    )
+
+
+def test_prism_back_faces_culled(render_context):
+    """Test that the bottom and rear sides of a prism are not drawn"""
+    prism = Prism((0, 0, 0), 6)
+    faces = prism.draw_order(render_context)
+    assert prism.bottom_face not in faces
+    assert prism.top_face in faces
+    assert 0 < len([face for face in faces if face in prism.side_faces]) < 6
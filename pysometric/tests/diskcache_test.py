@@ -0,0 +1,114 @@
+import pytest
+import shapely
+
+from ..diskcache import DiskCache
+from ..render import RenderableGeometry
+from ..scene import Scene
+from ..stats import CompileStats
+from ..texture import HatchTexture
+from ..volume import Box, Prism
+
+
+@pytest.fixture
+def frame():
+    return shapely.box(0, 0, 500, 500)
+
+
+def _children():
+    return [
+        Box((0, 0, 0), top={"textures": [HatchTexture(5, layer=2)]}),
+        Prism((1.5, -1, 0), 6, 0.5),
+    ]
+
+
+class TestDiskCache:
+    def test_round_trip(self, tmp_path):
+        """Test that stored geometries and layers are read back unchanged"""
+        cache = DiskCache(tmp_path)
+        renderables = [
+            RenderableGeometry(shapely.box(0, 0, 1, 1), 1),
+            RenderableGeometry(shapely.MultiLineString([[(0, 0), (1, 1)], [(2, 2), (3, 1)]]), 3),
+            RenderableGeometry(shapely.Polygon(), 2),
+        ]
+        cache.put("key", renderables)
+        loaded = cache.get("key")
+
+        assert [r.layer for r in loaded] == [1, 3, 2]
+        for a, b in zip(loaded, renderables):
+            assert shapely.equals_exact(a.geometry, b.geometry, 0) or (
+                a.geometry.is_empty and b.geometry.is_empty
+            )
+
+        assert cache.get("missing") is None
+
+    def test_invalid_files(self, tmp_path):
+        """Test that truncated and corrupted entries are read as misses"""
+        cache = DiskCache(tmp_path)
+        renderables = [
+            RenderableGeometry(shapely.box(0, 0, 1, 1), 1),
+            RenderableGeometry(shapely.LineString([(0, 0), (1, 1)]), 2),
+        ]
+        cache.put("key", renderables)
+        path = cache.directory / "key.pysc"
+        data = path.read_bytes()
+
+        for size in range(len(data)):
+            path.write_bytes(data[:size])
+            assert cache.get("key") is None
+
+        # An unknown geometry type in the first WKB record
+        corrupted = bytearray(data)
+        corrupted[len(data) - sum(len(shapely.to_wkb(r.geometry)) for r in renderables) + 1] = 99
+        path.write_bytes(bytes(corrupted))
+        assert cache.get("key") is None
+
+        path.write_bytes(data)
+        assert len(cache.get("key")) == 2
+
+    def test_eviction(self, tmp_path):
+        """Test that the least recently used entries are evicted beyond the size limit"""
+        renderables = [RenderableGeometry(shapely.box(0, 0, 1, 1))]
+        cache = DiskCache(tmp_path)
+        cache.put("a", renderables)
+        entry_size = cache.size
+
+        cache.max_bytes = 2 * entry_size
+        cache.put("b", renderables)
+        cache.put("c", renderables)
+
+        assert cache.size <= cache.max_bytes
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+
+        cache.clear()
+        assert cache.size == 0
+
+
+class TestSceneDiskCache:
+    def test_cache_key(self, frame):
+        """Test that keys match for equal scenes and differ when anything changes"""
+        key = Scene(frame, 50, _children()).cache_key()
+
+        assert Scene(frame, 50, _children()).cache_key() == key
+        assert Scene(frame, 40, _children()).cache_key() != key
+        assert Scene(frame, 50, _children(), occlusion="sweep").cache_key() != key
+        assert Scene(frame, 50, _children()[::-1]).cache_key() != key
+
+        retextured = _children()
+        retextured[0] = Box((0, 0, 0), top={"textures": [HatchTexture(4, layer=2)]})
+        assert Scene(frame, 50, retextured).cache_key() != key
+
+    def test_compile_hits(self, frame, tmp_path):
+        """Test that compiling an identical scene loads the stored result"""
+        expected = Scene(frame, 50, _children(), disk_cache=DiskCache(tmp_path)).compile()
+
+        stats = CompileStats()
+        scene = Scene(frame, 50, _children(), stats=stats, disk_cache=DiskCache(tmp_path))
+        actual = scene.compile()
+
+        assert stats.counters["disk_cache_hits"] == 1
+        assert "compile" not in stats.stages
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert a.layer == e.layer
+            assert shapely.equals_exact(a.geometry, e.geometry, 0)
@@ -0,0 +1,107 @@
+from math import radians
+
+import pytest
+import shapely
+
+from ..fill import (
+    clear_hatch_cache,
+    hatch_cache_info,
+    hatch_fill,
+    pen_fill,
+    set_hatch_cache_size,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_hatch_cache()
+    yield
+    set_hatch_cache_size(256)
+    clear_hatch_cache()
+
+
+def test_hatch_fill_horizontal():
+    """Test that horizontal hatches are spaced by the pitch"""
+    hatches = hatch_fill(shapely.box(0, 0, 10, 10), 2, 0)
+    assert len(hatches.geoms) == 5
+    assert hatches.length == pytest.approx(50)
+
+
+def test_hatch_fill_diagonal():
+    """Test that diagonal hatches are clipped to the geometry"""
+    geometry = shapely.box(0, 0, 10, 10)
+    hatches = hatch_fill(geometry, 1, radians(45))
+    assert geometry.buffer(1e-9).contains(hatches)
+    assert hatches.length > 0
+
+
+def test_hatch_fill_empty():
+    assert hatch_fill(shapely.Polygon(), 1).is_empty
+
+
+def test_hatch_fill_reuses_pattern_for_same_size():
+    """Test that same-size geometries share a cached hatch pattern"""
+    first = hatch_fill(shapely.box(0, 0, 10, 5), 1)
+    second = hatch_fill(shapely.box(20, 30, 30, 35), 1)
+    assert hatch_cache_info().hits == 1
+    assert hatch_cache_info().misses == 1
+    assert second.length == pytest.approx(first.length)
+    assert shapely.box(20, 30, 30, 35).buffer(1e-9).contains(second)
+
+
+def test_set_hatch_cache_size():
+    set_hatch_cache_size(1)
+    hatch_fill(shapely.box(0, 0, 10, 5), 1)
+    hatch_fill(shapely.box(0, 0, 5, 5), 1)
+    assert hatch_cache_info().currsize == 1
+
+    set_hatch_cache_size(0)
+    hatch_fill(shapely.box(0, 0, 5, 5), 1)
+    assert hatch_cache_info().currsize == 0
+
+
+def test_pen_fill_zigzag():
+    """Test that a convex polygon is filled with a single zig-zag stroke inside its outline"""
+    geometry = shapely.box(0, 0, 10, 6)
+    fill = pen_fill(geometry, 0.5)
+    assert len(fill.geoms) == 2
+    assert geometry.buffer(-0.5 + 1e-9).contains(fill)
+
+    outline, zigzag = fill.geoms[-1], fill.geoms[0]
+    assert shapely.equals(outline, shapely.box(0.5, 0.5, 9.5, 5.5).exterior)
+    assert shapely.get_num_coordinates(zigzag) == 2 * 9
+
+
+def test_pen_fill_zigzag_around_holes():
+    """Test that rows split by a hole are drawn as separate zig-zags without crossing it"""
+    hole = shapely.box(3, 3, 6, 6)
+    fill = pen_fill(shapely.box(0, 0, 10, 10).difference(hole), 0.5)
+    assert not fill.intersects(hole.buffer(-0.5))
+    assert len(fill.geoms) < 10
+
+
+def test_pen_fill_concentric():
+    """Test that concentric fills are rings inset by the pen width"""
+    fill = pen_fill(shapely.box(0, 0, 10, 10), 1, "concentric")
+    assert len(fill.geoms) == 5
+    assert all(ring.is_ring for ring in fill.geoms)
+    assert fill.length == pytest.approx(4 * (9 + 7 + 5 + 3 + 1))
+
+
+def test_pen_fill_tolerance():
+    """Test that a tolerance simplifies the fill strokes"""
+    circle = shapely.Point(0, 0).buffer(20, quad_segs=64)
+    exact = pen_fill(circle, 0.5, "concentric")
+    simplified = pen_fill(circle, 0.5, "concentric", tolerance=0.25)
+    assert shapely.get_num_coordinates(simplified) < shapely.get_num_coordinates(exact)
+    assert shapely.hausdorff_distance(simplified, exact) <= 0.125 + 1e-9
+
+
+def test_pen_fill_empty():
+    assert pen_fill(shapely.Polygon(), 1).is_empty
+    assert pen_fill(shapely.box(0, 0, 0.5, 0.5), 1).is_empty
+
+
+def test_pen_fill_unsupported_style():
+    with pytest.raises(ValueError):
+        pen_fill(shapely.box(0, 0, 1, 1), 1, "spiral")
@@ -0,0 +1,13 @@
+import subprocess
+import sys
+
+
+def test_import_does_not_load_vsketch():
+    """Test that importing the package leaves optional rendering backends unloaded"""
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, pysometric; print('vsketch' in sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
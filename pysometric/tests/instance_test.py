@@ -0,0 +1,67 @@
+import pytest
+import shapely
+
+from ..instance import InstancedGroup
+from ..scene import Scene
+from ..texture import HatchTexture
+from ..volume import Box
+
+
+@pytest.fixture
+def frame():
+    return shapely.box(0, 0, 500, 500)
+
+
+class TestInstancedGroup:
+    def test_compile_matches_individual_shapes(self, frame):
+        """Test that instances compile to the same geometry as individually built shapes"""
+        hatched = {"textures": [HatchTexture(5)]}
+        translations = [(0, 0, 0), (2, 0, 0), (0, 2, 1), (-2, -1, 0)]
+        instanced = InstancedGroup(Box((0, 0, 0), top=hatched), translations)
+        # Back-to-front order along the view direction, as the instanced group sorts them
+        boxes = [
+            Box(origin, top=hatched)
+            for origin in [(2, 0, 0), (0, 2, 1), (0, 0, 0), (-2, -1, 0)]
+        ]
+
+        actual = Scene(frame, 20, [instanced]).compile()
+        expected = Scene(frame, 20, list(reversed(boxes))).compile()
+
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert a.layer == e.layer
+            assert shapely.equals_exact(
+                shapely.normalize(a.geometry), shapely.normalize(e.geometry), 1e-6
+            )
+
+    def test_empty(self, frame):
+        assert Scene(frame, 20, [InstancedGroup(Box((0, 0, 0)), [])]).compile() == []
+
+    def test_stacked_instances(self, frame):
+        """Test that an instance stacked on another is drawn in front of it"""
+        instanced = InstancedGroup(Box((0, 0, 0)), [(0, 0, 1), (0, 0, 0), (0, 0, 2)])
+        boxes = [Box((0, 0, 2)), Box((0, 0, 1)), Box((0, 0, 0))]
+
+        actual = Scene(frame, 20, [instanced]).compile()
+        expected = Scene(frame, 20, boxes).compile()
+
+        assert shapely.union_all([r.geometry.boundary for r in actual]).equals(
+            shapely.union_all([r.geometry.boundary for r in expected])
+        )
+        assert sum(r.geometry.length for r in actual) == pytest.approx(
+            sum(r.geometry.length for r in expected)
+        )
+
+    def test_collection_prototype_outside_frame(self, frame):
+        """Test that a collection prototype outside the frame still draws instances inside it"""
+        offset = [(-1000, -1000, 0)]
+        instanced = InstancedGroup(Box.many([(1000, 1000, 0)]), offset)
+        reference = InstancedGroup(Box((1000, 1000, 0)), offset)
+
+        actual = Scene(frame, 20, [instanced]).compile()
+        expected = Scene(frame, 20, [reference]).compile()
+
+        assert len(actual) == len(expected) == 3
+        assert shapely.union_all([r.geometry for r in actual]).equals(
+            shapely.union_all([r.geometry for r in expected])
+        )
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import shapely
+
+from ..layers import batch_by_layer
+from ..render import RenderableGeometry
+
+
+def _travel(lines) -> float:
+    position, travel = np.zeros(2), 0.0
+    for line in lines.geoms:
+        coords = np.asarray(line.coords)
+        travel += np.linalg.norm(coords[0] - position)
+        position = coords[-1]
+
+    return travel
+
+
+class TestBatchByLayer:
+    def test_groups_by_layer(self):
+        """Test that geometries are merged into one MultiLineString per layer, in layer order"""
+        renderables = [
+            RenderableGeometry(shapely.LineString([(0, 0), (1, 1)]), 2),
+            RenderableGeometry(shapely.box(0, 0, 1, 1), 1),
+            RenderableGeometry(shapely.LineString([(2, 2), (3, 3)]), 2),
+            RenderableGeometry(shapely.LineString([(4, 4), (5, 5)]), 0),
+            RenderableGeometry(shapely.Polygon(), 1),
+        ]
+        batches = batch_by_layer(renderables)
+
+        assert [batch.layer for batch in batches] == [1, 2]
+        assert all(batch.geometry.geom_type == "MultiLineString" for batch in batches)
+        assert shapely.equals(batches[0].geometry.geoms[0], shapely.box(0, 0, 1, 1).exterior)
+        assert len(batches[1].geometry.geoms) == 2
+
+    def test_merge_lines(self):
+        """Test that lines sharing endpoints are joined"""
+        renderables = [
+            RenderableGeometry(shapely.LineString([(0, 0), (1, 0)])),
+            RenderableGeometry(shapely.LineString([(2, 0), (1, 0)])),
+            RenderableGeometry(shapely.LineString([(5, 5), (6, 6)])),
+        ]
+        (batch,) = batch_by_layer(renderables, merge_lines=True)
+        assert len(batch.geometry.geoms) == 2
+        assert batch.geometry.length == pytest.approx(2 + np.sqrt(2))
+
+    def test_sort_paths(self):
+        """Test that sorting keeps every line while shortening pen-up travel"""
+        rng = np.random.default_rng(0)
+        starts = rng.uniform(0, 100, (200, 2))
+        lines = shapely.linestrings(np.stack([starts, starts + rng.uniform(-2, 2, (200, 2))], 1))
+        renderables = [RenderableGeometry(line) for line in lines]
+
+        (unsorted,) = batch_by_layer(renderables)
+        (ordered,) = batch_by_layer(renderables, sort_paths=True)
+
+        assert len(ordered.geometry.geoms) == 200
+        assert shapely.equals(
+            shapely.normalize(ordered.geometry), shapely.normalize(unsorted.geometry)
+        )
+        assert _travel(ordered.geometry) < _travel(unsorted.geometry) / 4
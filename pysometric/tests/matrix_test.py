@@ -2,7 +2,16 @@ import pytest
 import numpy as np
 
 from math import radians, sqrt
-from ..matrix import rotate_z, rotate_x
+from ..axis import Axis
+from ..matrix import (
+    compose_rotations,
+    rotate_x,
+    rotate_y,
+    rotate_z,
+    rotation_matrix,
+    transform_points,
+)
+from ..shape import Rotation
 
 def test_rotate_z():
     rotated_point = rotate_z((0, 0, 0), radians(45))
@@ -34,4 +43,24 @@ def test_rotate_x():
     assert rotated_point == pytest.approx((0, -1, 0), 0.01)
 
     rotated_point = rotate_x((1, 1, 0), radians(90))
-    assert rotated_point == pytest.approx((1, 0, 1), 0.01)
\ No newline at end of file
+    assert rotated_point == pytest.approx((1, 0, 1), 0.01)
+
+def test_compose_rotations():
+    """Test that composed rotations match applying each rotation in turn"""
+    rotations = [
+        Rotation(Axis.X, radians(30), (0, 0, 0)),
+        Rotation(Axis.Z, radians(-50), (1, 1, 1)),
+        Rotation(Axis.Y, radians(10), (1, 0, 1)),
+    ]
+    points = np.array([(0, 0, 0), (1, 2, 3), (-1, 0.5, 2)], dtype=np.float64)
+    actual = transform_points(points, compose_rotations(rotations))
+
+    for point, rotated in zip(points, actual):
+        expected = rotate_x(point, radians(30))
+        expected = rotate_z(expected, radians(-50), (1, 1, 1))
+        expected = rotate_y(expected, radians(10), (1, 0, 1))
+        assert tuple(rotated) == pytest.approx(expected)
+
+
+def test_rotation_matrix_cached():
+    assert rotation_matrix(Axis.Z, radians(45)) is rotation_matrix(Axis.Z, radians(45))
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+import shapely
+
+from ..occlusion import hidden_geometries, occlude_pairwise, occlude_stream, occlude_sweep
+from ..render import RenderableGeometry
+
+
+def overlapping_renderables():
+    """Back-to-front squares with a hatch line running through all of them."""
+    return [
+        RenderableGeometry(shapely.box(0, 0, 10, 10)),
+        RenderableGeometry(shapely.LineString([(-5, 5), (25, 5)]), 2),
+        RenderableGeometry(shapely.box(5, 5, 15, 15)),
+        RenderableGeometry(shapely.box(8, 0, 20, 8)),
+    ]
+
+
+def dense_renderables():
+    """Back-to-front overlapping squares spread over many cells, each with a diagonal line."""
+    rng = np.random.default_rng(0)
+    renderables = []
+    for x, y in rng.uniform(0, 100, (200, 2)):
+        renderables.append(RenderableGeometry(shapely.box(x, y, x + 6, y + 6)))
+        renderables.append(RenderableGeometry(shapely.LineString([(x, y), (x + 6, y + 6)]), 2))
+    return renderables
+
+
+def _assert_matches(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        assert a.layer == e.layer
+        assert a.geometry.area == pytest.approx(e.geometry.area, abs=1e-6)
+        assert a.geometry.length == pytest.approx(e.geometry.length, abs=1e-6)
+
+
+def test_occlude_pairwise():
+    occluded = occlude_pairwise(overlapping_renderables())
+    assert occluded[0].geometry.area == pytest.approx(100 - 25 - 16 + 6)
+    assert occluded[1].geometry.length == pytest.approx(15)
+    assert occluded[2].geometry.area == pytest.approx(100 - 21)
+    assert occluded[3].geometry.area == pytest.approx(96)
+
+
+def test_occlude_sweep_matches_pairwise():
+    expected = occlude_pairwise(overlapping_renderables())
+    actual = occlude_sweep(overlapping_renderables())
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        assert a.layer == e.layer
+        assert shapely.equals(a.geometry, e.geometry)
+
+
+def test_occlude_sweep_dense():
+    """Test that the sweep matches pairwise occlusion across many mask cells"""
+    renderables = dense_renderables()
+    _assert_matches(occlude_sweep(renderables), occlude_pairwise(renderables))
+
+
+@pytest.mark.parametrize("cell_size", [None, 1, 50])
+def test_occlude_stream_cell_size(cell_size):
+    """Test that streamed occlusion does not depend on the size of the mask cells"""
+    renderables = dense_renderables()
+    actual = list(occlude_stream(reversed(renderables), cell_size=cell_size))
+    _assert_matches(actual[::-1], occlude_pairwise(renderables))
+
+
+def test_hidden_geometries():
+    """Test that only polygons covered entirely by the polygons in front of them are hidden"""
+    geometries = [
+        shapely.box(19, -1, 31, 11),
+        shapely.box(0, 0, 10, 10),  # covered by the two halves in front of it
+        shapely.box(20, 0, 30, 10),  # covered by a polygon behind it only
+        shapely.box(40, 0, 50, 10),  # partly covered
+        shapely.box(60, 0, 70, 10),  # touched but not covered
+        None,
+        shapely.box(-1, -1, 5, 11),
+        shapely.box(5, -1, 11, 11),
+        shapely.box(45, -1, 51, 11),
+        shapely.box(70, 0, 80, 10),
+    ]
+
+    assert np.flatnonzero(hidden_geometries(geometries)).tolist() == [1]
+
+
+def test_hidden_geometries_dense():
+    """Test that dropping hidden polygons leaves the occluded drawing unchanged"""
+    rng = np.random.default_rng(0)
+    renderables = [
+        RenderableGeometry(shapely.box(x, y, x + size, y + size))
+        for (x, y), size in zip(rng.uniform(0, 40, (300, 2)), rng.uniform(2, 10, 300))
+    ]
+    hidden = hidden_geometries([r.geometry for r in renderables])
+    occluded = occlude_pairwise(renderables)
+
+    assert hidden.any()
+    for i in np.flatnonzero(hidden):
+        assert occluded[i].geometry.area == pytest.approx(0, abs=1e-6)
+    visible = occlude_pairwise([r for r, is_hidden in zip(renderables, hidden) if not is_hidden])
+    expected = shapely.union_all([r.geometry.boundary for r in occluded])
+    actual = shapely.union_all([r.geometry.boundary for r in visible])
+    assert shapely.hausdorff_distance(actual, expected) < 1e-6
@@ -3,7 +3,7 @@ import math
 import pytest
 import shapely
 
-from ..render import RenderContext, project_point
+from ..render import RenderContext, project_point, project_points
 from ..scene import DIMETRIC_ANGLE
 
 
@@ -24,3 +24,30 @@ def test_project_point(frame):
     expected = (50, 31.723)
     actual = project_point(point, render_context)
     assert actual == pytest.approx(expected, 0.001)
+
+
+def test_project_points(frame):
+    """Test that project_points() matches project_point() for every point"""
+    render_context = RenderContext(frame, 100, math.radians(DIMETRIC_ANGLE))
+    points = [(0, 0, 0), (10, 10, 0), (-3, 2, 5), (1.5, -0.5, -2)]
+    actual = project_points(points, render_context)
+    assert actual.shape == (4, 2)
+    for point, projected in zip(points, actual):
+        assert tuple(projected) == pytest.approx(project_point(point, render_context))
+
+
+def test_render_context_invalidation(frame):
+    """Test that derived values are recomputed when their inputs change"""
+    render_context = RenderContext(frame, 1, DIMETRIC_ANGLE)
+    assert render_context.origin == (50, 50)
+    matrix = render_context.projection_matrix
+    assert render_context.projection_matrix is matrix
+
+    render_context.frame = shapely.box(0, 0, 200, 200)
+    assert render_context.origin == (100, 100)
+
+    render_context.grid_pitch = 2
+    assert render_context.projection_matrix == pytest.approx(2 * matrix)
+
+    render_context.origin = (10, 20)
+    assert project_point((0, 0, 0), render_context) == (10, 20)
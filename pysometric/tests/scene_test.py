@@ -1,8 +1,14 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import pytest
 import shapely
 
+from ..plane import Plane
 from ..scene import Scene, RenderableGeometry
-from ..volume import Box
+from ..shape import Rectangle
+from ..stats import CompileStats
+from ..texture import HatchTexture, clear_texture_cache, texture_cache_info
+from ..volume import Box, Prism
 
 @pytest.fixture
 def frame():
@@ -27,3 +33,199 @@ class TestScene:
         result = scene.compile()
         assert len(result) == 3 # 3 faces
         assert all([isinstance(r, RenderableGeometry) for r in result])
+
+    def test_compile_sweep_occlusion(self, frame):
+        """Test that the sweep occlusion engine matches the pairwise engine"""
+        children = [Box((0, 0, 0)), Box((0.5, 0.5, 0.5)), Box((1, 0, 0), 2, 1, 2)]
+        expected = Scene(frame, 50, children).compile()
+        actual = Scene(frame, 50, children, occlusion="sweep").compile()
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert shapely.symmetric_difference(a.geometry, e.geometry).area == pytest.approx(0)
+
+    def test_unsupported_occlusion(self, frame):
+        """Test that an unknown occlusion engine is rejected"""
+        with pytest.raises(ValueError):
+            Scene(frame, 1, [], occlusion="unknown")
+
+    def test_compile_parallel(self, frame):
+        """Test that parallel compilation produces the same output as serial compilation"""
+        hatched = {"textures": [HatchTexture(5)]}
+        children = [
+            Box((i, j, 0), top=hatched, left=hatched) for i in range(-2, 2) for j in range(-2, 2)
+        ] + [Prism((0, 0, 1), 6, 0.5, top=hatched)]
+        expected = Scene(frame, 50, children).compile()
+
+        threaded = Scene(frame, 50, children).compile(workers=4)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            processed = Scene(frame, 50, children).compile(executor=executor)
+
+        for actual in (threaded, processed):
+            assert len(actual) == len(expected)
+            for a, e in zip(actual, expected):
+                assert a.layer == e.layer
+                assert shapely.equals_exact(a.geometry, e.geometry, 0)
+
+    @pytest.mark.parametrize("occlusion", ["pairwise", "sweep"])
+    def test_incremental_compile(self, frame, occlusion):
+        """Test that recompiling after scene edits matches compiling from scratch"""
+        hatched = {"textures": [HatchTexture(5)]}
+        children = [Box((i * 0.6, j * 0.6, 0), top=hatched) for i in range(3) for j in range(3)]
+        scene = Scene(frame, 50, list(children), occlusion=occlusion)
+        scene.compile()
+
+        moved = Box((0.3, 0.3, 0.5), top=hatched)
+        scene.replace_child(children[4], moved)
+        scene.remove_child(children[0])
+        scene.add_child(Box((2, 2, 0)))
+        scene.insert_child(0, Prism((1, 1, 1), 6, 0.5))
+        actual = scene.compile()
+        expected = Scene(frame, 50, list(scene.children), occlusion=occlusion).compile()
+
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert a.layer == e.layer
+            assert shapely.equals(a.geometry, e.geometry) or (
+                shapely.symmetric_difference(a.geometry, e.geometry).area == pytest.approx(0)
+                and a.geometry.length == pytest.approx(e.geometry.length)
+            )
+
+    def test_incremental_compile_reuses_clean_children(self, frame):
+        """Test that clean children are not recompiled"""
+        box = Box((0, 0, 0))
+        scene = Scene(frame, 50, [box, Box((5, 5, 0))])
+        first = scene.compile()
+        second = scene.compile()
+        assert all(a is b for a, b in zip(first, second))
+
+        scene.mark_dirty(box)
+        third = scene.compile()
+        assert len(third) == len(first)
+        assert all(a is not b for a, b in zip(first[3:], third[3:]))
+
+    def test_render_context_change_recompiles(self, frame):
+        """Test that changing the render context invalidates all cached results"""
+        scene = Scene(frame, 50, [Box((0, 0, 0))])
+        before = scene.compile()
+        scene.render_context.grid_pitch = 100
+        after = scene.compile()
+        assert after[0].geometry.area == pytest.approx(4 * before[0].geometry.area)
+
+    def test_depth_sort(self, frame):
+        """Test that depth sorting occludes like a correctly hand-ordered scene"""
+
+        def drawn_lines(renderables):
+            return shapely.union_all(
+                [
+                    r.geometry.boundary if r.geometry.geom_type.endswith("Polygon") else r.geometry
+                    for r in renderables
+                ]
+            )
+
+        # The boxes overlap on screen but not in space, which no drawing order could render
+        front, back = Box((0, 0, 0)), Box((1.1, 1.1, 0.25), 1, 1, 1.5)
+        prism = Prism((1.2, -0.6, 0), 6, 0.5)
+        expected = drawn_lines(Scene(frame, 50, [front, prism, back]).compile())
+        actual = drawn_lines(Scene(frame, 50, [back, front, prism], depth_sort=True).compile())
+
+        assert shapely.symmetric_difference(actual, expected).length == pytest.approx(0, abs=1e-6)
+
+    @pytest.mark.parametrize("reverse", [False, True])
+    def test_depth_sort_ground_plane(self, frame, reverse):
+        """Test that depth sorting draws a box in front of the much larger plane it rests on"""
+        children = [Box((3, 3, 0.5)), Rectangle((0, 0, 0), 10, 10, Plane.XY)]
+        expected = Scene(frame, 20, list(children)).compile()
+        actual = Scene(
+            frame, 20, children[::-1] if reverse else children, depth_sort=True
+        ).compile()
+
+        assert sum(r.geometry.length for r in actual) == pytest.approx(
+            sum(r.geometry.length for r in expected)
+        )
+        assert not any(r.geometry.is_empty for r in actual)
+
+    @pytest.mark.parametrize("depth_sort", [False, True])
+    def test_cull_hidden(self, frame, depth_sort):
+        """Test that faces covered by other faces are dropped without changing the drawing"""
+        hatched = {"textures": [HatchTexture(2)]}
+        front = Box((0, 0, 0), 2, 2, 2)
+        hidden = Box((0.5, 0.5, 0.2), 0.5, 0.5, 0.5, top=hatched, left=hatched)
+        visible = Box((3, 0, 0), top=hatched)
+        children = [front, hidden, visible]
+
+        expected = Scene(frame, 50, list(children), depth_sort=depth_sort).compile()
+        actual = Scene(
+            frame, 50, list(children), depth_sort=depth_sort, cull_hidden=True
+        ).compile()
+
+        visible_expected = [r for r in expected if not r.geometry.is_empty]
+        assert len(actual) == len(visible_expected) < len(expected)
+        for a, e in zip(actual, visible_expected):
+            assert a.layer == e.layer
+            assert shapely.equals(a.geometry, e.geometry)
+
+    def test_frame_culling(self, frame):
+        """Test that children outside the frame are skipped and others are clipped"""
+        clear_texture_cache()
+        hatched = {"textures": [HatchTexture(3)]}
+        outside = Box((100, -100, 0), top=hatched)
+        straddling = Box((2.5, -2.5, 0), top=hatched)
+        inside = Box((-1, -1, 0))
+        result = Scene(frame, 50, [inside, straddling, outside]).compile()
+
+        assert texture_cache_info().misses == 1
+        assert len(result) == 7
+        assert all(frame.buffer(1e-9).contains(r.geometry) for r in result)
+        assert any(r.geometry.bounds[2] == pytest.approx(500) for r in result)
+
+    @pytest.mark.parametrize("depth_sort", [False, True])
+    def test_iter_compiled(self, frame, depth_sort):
+        """Test that streaming compilation yields the visible geometries of compile()"""
+        hatched = {"textures": [HatchTexture(5)]}
+        children = [
+            Box((0, 0, 0), top=hatched),
+            Prism((1.2, -0.6, 0), 6, 0.5, top=hatched),
+            Box((0.5, 0.5, 0.2), 1, 1, 1.5, left=hatched),
+            Box((100, -100, 0)),
+        ]
+        scene = Scene(frame, 50, children, depth_sort=depth_sort)
+        expected = [r for r in scene.compile() if not r.geometry.is_empty]
+        streamed = scene.iter_compiled()
+        assert not isinstance(streamed, list)
+
+        actual = list(streamed)[::-1]
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert a.layer == e.layer
+            assert shapely.symmetric_difference(a.geometry, e.geometry).area == pytest.approx(0)
+            assert shapely.symmetric_difference(a.geometry, e.geometry).length == pytest.approx(
+                0, abs=1e-6
+            )
+
+    @pytest.mark.parametrize("workers", [None, 2])
+    def test_stats(self, frame, workers):
+        """Test that compile stats record stage timings and counters per child and layer"""
+        clear_texture_cache()
+        hatched = {"textures": [HatchTexture(5, layer=2)]}
+        children = [Box((0, 0, 0), top=hatched), Box((0.5, 0.5, 0)), Box((100, -100, 0))]
+        stages = []
+        stats = CompileStats(lambda stage, seconds: stages.append(stage))
+        result = Scene(frame, 50, children, stats=stats).compile(workers=workers)
+
+        for stage in ("prepare", "cull", "compile", "texture", "clip", "sort", "occlude"):
+            assert stats.stages[stage] > 0
+            assert stage in stages
+
+        assert stats.counters["children_compiled"] == 2
+        assert stats.counters["children_culled"] == 1
+        assert stats.counters["texture_cache_misses"] == 1
+        assert stats.counters["geometries"] == len(result)
+        assert stats.counters["strtree_hits"] > 0
+        assert stats.counters["difference_calls"] > 0
+        assert stats.counters["output_vertices"] == sum(
+            shapely.get_num_coordinates(r.geometry) for r in result
+        )
+        assert stats.children[1]["geometries"] == 3
+        assert stats.children[0]["geometries"] == len(result) - 3
+        assert stats.layers[2]["geometries"] == len(result) - 6
+        assert set(stats.as_dict()) == {"stages", "counters", "children", "layers"}
@@ -0,0 +1,101 @@
+import io
+
+import numpy as np
+import pytest
+import shapely
+
+from ..collection import FaceCollection
+from ..scene import Scene
+from ..scenefile import load_collection, load_scene, save_scene
+from ..texture import FillTexture, HatchTexture, Texture
+from ..volume import Box, Prism, Pyramid
+
+
+@pytest.fixture
+def frame():
+    return shapely.box(0, 0, 500, 500)
+
+
+class TestSceneFile:
+    def test_round_trip(self, frame, tmp_path):
+        """Test that a saved scene loads into a collection compiling like its shapes"""
+        hatch = HatchTexture(4, angle=0.5, inset=1, layer=2)
+        fill = FillTexture(layer=3, style="concentric")
+        path = tmp_path / "scene.npz"
+        save_scene(
+            path,
+            frame,
+            20,
+            boxes={
+                "origin": [(0, 0, 0), (2, 0, 0)],
+                "size": [(1, 1, 1), (1, 2, 1)],
+                "textures": [(0, -1, 1), (-1, -1, -1)],
+            },
+            prisms={"origin": [(0, 3, 0)], "sides": [6], "radius": [0.5]},
+            pyramids={"origin": [(3, 3, 0)], "size": [(1, 1, 2)], "layer": [4]},
+            texture_sets=[[hatch], [fill]],
+        )
+        scene = load_scene(path, occlusion="sweep")
+
+        assert len(scene.children) == 1
+        assert isinstance(scene.children[0], FaceCollection)
+        assert len(scene.children[0]) == 4
+        assert scene.render_context.frame.equals(frame)
+        assert scene.render_context.grid_pitch == 20
+
+        children = [
+            Box((0, 0, 0), top={"textures": [hatch]}, right={"textures": [fill]}),
+            Box((2, 0, 0), 1, 2, 1),
+            Prism((0, 3, 0), 6, 0.5),
+            Pyramid((3, 3, 0), 1, 1, 2, layer=4),
+        ]
+        expected = Scene(frame, 20, children, occlusion="sweep", depth_sort=True).compile()
+        compiled = scene.compile()
+        assert sorted(r.layer for r in compiled) == sorted(r.layer for r in expected)
+        for layer in {r.layer for r in expected}:
+            assert shapely.union_all(
+                [r.geometry for r in compiled if r.layer == layer]
+            ).equals(shapely.union_all([r.geometry for r in expected if r.layer == layer]))
+
+    def test_polygons(self, frame):
+        """Test that polygons and scene settings are read back unchanged"""
+        file = io.BytesIO()
+        vertices = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (3, 0, 0), (4, 0, 0), (4, 1, 0)]
+        save_scene(
+            file, frame, 10, polygons={"sizes": [3, 3], "vertices": vertices}, origin=(5, 6)
+        )
+        file.seek(0)
+        collection, settings = load_collection(file)
+
+        assert settings["origin"] == (5, 6)
+        assert np.array_equal(collection.vertex_array, vertices)
+        assert collection.face_sizes.tolist() == [3, 3]
+        assert collection.face_layers.tolist() == [1, 1]
+
+    def test_invalid_tables(self, frame):
+        """Test that malformed tables are rejected when saving"""
+        with pytest.raises(ValueError):
+            save_scene(io.BytesIO(), frame, 10, boxes={"origin": [(0, 0, 0)]})
+        with pytest.raises(ValueError):
+            save_scene(
+                io.BytesIO(), frame, 10, boxes={"origin": [(0, 0, 0)], "size": [(1, 1, 1)] * 2}
+            )
+        with pytest.raises(ValueError):
+            save_scene(io.BytesIO(), frame, 10, polygons={"sizes": [4], "vertices": [(0, 0, 0)]})
+        with pytest.raises(ValueError):
+            save_scene(
+                io.BytesIO(),
+                frame,
+                10,
+                pyramids={"origin": [(0, 0, 0)], "size": [(1, 1, 1)], "textures": [0]},
+            )
+
+    def test_unsupported_texture(self, frame):
+        """Test that only built in textures can be saved"""
+
+        class CustomTexture(Texture):
+            def _parameters(self):
+                return ()
+
+        with pytest.raises(ValueError):
+            save_scene(io.BytesIO(), frame, 10, texture_sets=[[CustomTexture()]])
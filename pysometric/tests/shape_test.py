@@ -1,6 +1,10 @@
+from math import radians
+
+import numpy as np
 import pytest
 
-from ..shape import Circle, Plane, Rectangle, project_to_plane
+from ..axis import Axis
+from ..shape import Circle, Plane, Polygon, Rectangle, Rotation, project_to_plane
 
 
 def test_project_to_plane_xy():
@@ -41,3 +45,29 @@ class TestCircle:
         """Test that a Circle generates the expected number of vertices"""
         circle = Circle((0, 0, 0), 1, Plane.XY, 64)
         assert len(circle.vertices) == 64
+
+
+class TestPolygon:
+    def test_vertex_array(self):
+        """Test that vertices are stored in a read-only float64 array"""
+        polygon = Polygon([(0, 0, 0), (1, 0, 0), (1, 1, 0)])
+        assert polygon.vertex_array.dtype == np.float64
+        assert polygon.vertex_array.shape == (3, 3)
+        assert polygon.vertices == [(0, 0, 0), (1, 0, 0), (1, 1, 0)]
+        with pytest.raises(ValueError):
+            polygon.vertex_array[0, 0] = 1
+
+    def test_rotated_vertices(self):
+        """Test that rotations are applied to the vertex array"""
+        polygon = Polygon(
+            [(1, 0, 0), (1, 1, 0), (0, 1, 0)],
+            rotations=[Rotation(Axis.Z, radians(90), (0, 0, 0))],
+        )
+        assert polygon.vertex_array == pytest.approx(
+            np.array([(0, 1, 0), (-1, 1, 0), (-1, 0, 0)])
+        )
+
+    def test_slots(self):
+        """Test that polygons do not carry a per-instance __dict__"""
+        assert not hasattr(Circle((0, 0, 0), 1, Plane.XY), "__dict__")
+        assert not hasattr(Rectangle((0, 0, 0), 1, 1, Plane.XY), "__dict__")
@@ -0,0 +1,72 @@
+import io
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+import shapely
+
+from ..render import RenderableGeometry
+from ..scene import Scene
+from ..svg import SvgWriter, write_svg
+from ..texture import HatchTexture
+from ..volume import Box
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+
+def _subpaths(group: ET.Element) -> list[np.ndarray]:
+    subpaths = []
+    for path in group.iter(f"{SVG_NS}path"):
+        for subpath in path.get("d").split("M")[1:]:
+            points = [point.split(",") for point in subpath.split()]
+            subpaths.append(np.array(points, dtype=float))
+
+    return subpaths
+
+
+class TestSvgWriter:
+    def test_groups_by_layer(self):
+        """Test that geometries are written to one group per layer, skipping layer 0"""
+        renderables = [
+            RenderableGeometry(shapely.LineString([(0, 0), (10, 10)]), 2),
+            RenderableGeometry(shapely.box(1, 1, 2, 2), 1),
+            RenderableGeometry(shapely.LineString([(5, 0), (5, 5)]), 2),
+            RenderableGeometry(shapely.LineString([(0, 5), (5, 5)]), 0),
+        ]
+        f = io.StringIO()
+        with SvgWriter(f, (0, 0, 20, 10), batch_size=1) as writer:
+            writer.write_all(renderables)
+
+        root = ET.fromstring(f.getvalue())
+        assert root.get("viewBox") == "0 0 20 10"
+        groups = root.findall(f"{SVG_NS}g")
+        assert [group.get("id") for group in groups] == ["layer1", "layer2"]
+
+        (outline,) = _subpaths(groups[0])
+        assert shapely.equals(shapely.LineString(outline), shapely.box(1, 1, 2, 2).exterior)
+        assert [len(subpath) for subpath in _subpaths(groups[1])] == [2, 2]
+
+    def test_precision(self):
+        """Test that coordinates are written with the requested number of decimals"""
+        f = io.StringIO()
+        write_svg(
+            [RenderableGeometry(shapely.LineString([(0, 1 / 3), (2 / 3, 1)]))], f, (0, 0, 1, 1), 2
+        )
+        assert re.search(r'd="M0\.00,0\.33 0\.67,1\.00"', f.getvalue())
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_scene_write_svg(self, tmp_path, stream):
+        """Test that a scene is written with the line work of its compiled geometries"""
+        scene = Scene(
+            shapely.box(0, 0, 500, 500), 50, [Box((0, 0, 0), top={"textures": [HatchTexture(5)]})]
+        )
+        path = str(tmp_path / "scene.svg")
+        scene.write_svg(path, stream=stream)
+
+        (group,) = ET.parse(path).getroot().findall(f"{SVG_NS}g")
+        drawn = shapely.union_all([shapely.LineString(line) for line in _subpaths(group)])
+        expected = shapely.union_all(
+            [r.geometry.boundary if r.geometry.area else r.geometry for r in scene.compile()]
+        )
+        assert shapely.hausdorff_distance(drawn, expected) < 1e-3
@@ -0,0 +1,59 @@
+import math
+
+import pytest
+import shapely
+
+from ..render import RenderContext
+from ..texture import (
+    FillTexture,
+    HatchTexture,
+    clear_texture_cache,
+    set_texture_cache_size,
+    texture_cache_info,
+)
+
+
+@pytest.fixture
+def render_context():
+    return RenderContext(shapely.box(0, 0, 100, 100), 10, math.radians(30))
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_texture_cache()
+    yield
+    set_texture_cache_size(4096, 4_000_000)
+    clear_texture_cache()
+
+
+class TestTextureCache:
+    def test_compile_hits_cache(self, render_context):
+        """Test that recompiling the same polygon reuses the cached fill"""
+        polygon = shapely.box(10, 10, 50, 40)
+        first = HatchTexture(2).compile(polygon, render_context)
+        second = HatchTexture(2, layer=2).compile(polygon, render_context)
+
+        assert texture_cache_info().hits == 1
+        assert texture_cache_info().misses == 1
+        assert second.geometry is first.geometry
+        assert second.layer == 2
+
+    def test_compile_misses_on_changes(self, render_context):
+        """Test that different parameters or polygons produce separate entries"""
+        polygon = shapely.box(10, 10, 50, 40)
+        HatchTexture(2).compile(polygon, render_context)
+        HatchTexture(3).compile(polygon, render_context)
+        HatchTexture(2, inset=1).compile(polygon, render_context)
+        HatchTexture(2).compile(shapely.box(10, 10, 50, 41), render_context)
+        FillTexture().compile(polygon, render_context)
+
+        assert texture_cache_info().hits == 0
+        assert texture_cache_info().currsize == 5
+
+    def test_cache_bounded_by_coordinates(self, render_context):
+        """Test that the cache evicts fills beyond the coordinate budget"""
+        set_texture_cache_size(4096, 50)
+        HatchTexture(1).compile(shapely.box(0, 0, 20, 20), render_context)
+        HatchTexture(1).compile(shapely.box(0, 0, 30, 30), render_context)
+
+        assert texture_cache_info().weight <= 50
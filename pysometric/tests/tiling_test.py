@@ -0,0 +1,63 @@
+import pytest
+import shapely
+
+from ..plane import Plane
+from ..scene import Scene
+from ..shape import Rectangle
+from ..texture import HatchTexture
+from ..tiling import TiledScene
+from ..volume import Box
+
+
+@pytest.fixture
+def frame():
+    return shapely.box(0, 0, 500, 500)
+
+
+def line_work(renderables):
+    return shapely.union_all(
+        [
+            r.geometry.boundary if shapely.get_dimensions(r.geometry) == 2 else r.geometry
+            for r in renderables
+        ]
+    )
+
+
+class TestTiledScene:
+    def test_tiles(self, frame):
+        tiles = TiledScene(frame, 20, [], 2, 3).tiles
+        assert len(tiles) == 6
+        assert shapely.union_all(tiles).equals(frame)
+
+    def test_compile_matches_scene(self, frame):
+        """Test that tiling draws the same lines as compiling the whole scene"""
+        hatched = {"textures": [HatchTexture(4)]}
+        children = [
+            Box((i * 0.6, j * 0.6, 0), 1, 1, 1 + (i + j) % 2, top=hatched)
+            for i in range(-3, 3)
+            for j in range(-3, 3)
+        ]
+        expected = line_work(Scene(frame, 40, children).compile())
+        actual = line_work(TiledScene(frame, 40, children, 3, 2).compile(workers=2))
+
+        assert actual.length == pytest.approx(expected.length)
+        assert shapely.hausdorff_distance(actual, expected) == pytest.approx(0, abs=1e-6)
+
+    def test_seams_stitched(self, frame):
+        """Test that an outline crossing tile seams is joined back into a single line"""
+        square = Rectangle((0, 0, 0), 4, 4, Plane.XY)
+        result = TiledScene(frame, 40, [square], 2, 2).compile()
+
+        assert len(result) == 1
+        assert shapely.get_num_geometries(result[0].geometry) == 1
+        assert result[0].geometry.is_closed
+
+    def test_frame_edges_kept(self, frame):
+        """Test that the lines drawn where the frame clips a shape are kept"""
+        children = [Box((-3.5, 3.5, 0), 2, 2, 2), Box((3.5, -3.5, 0), 2, 2, 2)]
+        expected = line_work(Scene(frame, 40, children).compile())
+        actual = line_work(TiledScene(frame, 40, children, 2, 2).compile())
+
+        assert expected.length > 0
+        assert actual.length == pytest.approx(expected.length)
+        assert shapely.hausdorff_distance(actual, expected) == pytest.approx(0, abs=1e-6)
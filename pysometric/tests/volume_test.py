@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+import shapely
+
+from ..render import RenderContext
+from ..scene import DIMETRIC_ANGLE, Scene
+from ..texture import FillTexture, HatchTexture
+from ..volume import Box, Prism, Pyramid
+
+
+@pytest.fixture
+def frame():
+    return shapely.box(0, 0, 500, 500)
+
+
+@pytest.fixture
+def render_context(frame):
+    return RenderContext(frame, 20, DIMETRIC_ANGLE)
+
+
+def _compile_faces(groups, render_context):
+    compiled = []
+    for group in groups:
+        for face in group.draw_order(render_context):
+            result = face.compile(render_context)
+            compiled.extend(result if isinstance(result, list) else [result])
+    return compiled
+
+
+class TestMany:
+    def test_box_many(self, render_context):
+        """Test that boxes built from arrays match boxes built one by one"""
+        origins = np.array([(0, 0, 0), (-3, -3, 0)])
+        hatch = [HatchTexture(4, layer=2)]
+        fill = [FillTexture()]
+        boxes = Box.many(
+            origins,
+            widths=[1, 2],
+            depths=1.5,
+            heights=[3, 1],
+            top={"textures": hatch, "layer": [3, 4]},
+            right={"textures": fill},
+        )
+        expected = [
+            Box(
+                tuple(origin),
+                width,
+                1.5,
+                height,
+                top={"textures": hatch, "layer": layer},
+                right={"textures": fill},
+            )
+            for origin, width, height, layer in zip(origins, [1, 2], [3, 1], [3, 4])
+        ]
+
+        assert len(boxes) == 2
+        assert np.array_equal(
+            boxes.vertex_array,
+            np.concatenate([face.vertex_array for box in expected for face in box.children]),
+        )
+        compiled = boxes.compile(render_context)
+        reference = _compile_faces(expected, render_context)
+        assert [r.layer for r in compiled] == [r.layer for r in reference]
+        for a, b in zip(compiled, reference):
+            assert shapely.equals_exact(a.geometry, b.geometry, 1e-9)
+
+    def test_prism_many(self, render_context):
+        """Test that prisms built from arrays compile like prisms built one by one"""
+        origins = np.array([(0, 0, 0), (3, 0, 0), (0, 3, 0)])
+        hatch = [HatchTexture(4)]
+        prisms = Prism.many(
+            origins, [6, 3, 5], 0.8, [1, 2, 3], top={"textures": hatch}, sides={"layer": 2}
+        )
+        expected = [
+            Prism(
+                tuple(origin),
+                sides,
+                0.8,
+                height,
+                top={"textures": hatch},
+                sides=[{"layer": 2}] * sides,
+            )
+            for origin, sides, height in zip(origins, [6, 3, 5], [1, 2, 3])
+        ]
+
+        compiled = prisms.compile(render_context)
+        reference = _compile_faces(expected[::-1], render_context)
+        assert sorted(r.layer for r in compiled) == sorted(r.layer for r in reference)
+        assert shapely.union_all([r.geometry for r in compiled]).equals(
+            shapely.union_all([r.geometry for r in reference])
+        )
+
+    def test_pyramid_many(self, render_context):
+        """Test that pyramids built from arrays compile like pyramids built one by one"""
+        hatch = [HatchTexture(4)]
+        pyramids = Pyramid.many([(0, 0, 0)], 2, 1, 3, sides={"textures": hatch}, layers=2)
+        pyramid = Pyramid((0, 0, 0), 2, 1, 3, sides=[{"textures": hatch}] * 4, layer=2)
+
+        compiled = pyramids.compile(render_context)
+        reference = _compile_faces([pyramid], render_context)
+        assert [r.layer for r in compiled] == [r.layer for r in reference]
+        for a, b in zip(compiled, reference):
+            assert shapely.equals_exact(a.geometry, b.geometry, 1e-9)
+
+    def test_scene(self, frame):
+        """Test that a Scene compiles collections alongside other children"""
+        boxes = Box.many(np.random.default_rng(0).uniform(-5, 5, (50, 3)))
+        scene = Scene(frame, 20, [Prism((0, 0, 2), 4), boxes])
+
+        assert len(scene.compile()) > 0
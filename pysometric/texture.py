@@ -1,26 +1,76 @@
+import hashlib
 from abc import abstractmethod
 from math import radians
+from time import perf_counter
 
 import shapely
-from vsketch.fill import generate_fill
 
-from .fill import hatch_fill
+from .cache import CacheInfo, LRUCache
+from .fill import PEN_FILL_STYLES, hatch_fill, pen_fill
 from .render import RenderableGeometry, RenderContext
+from .stats import active_stats
+
+# Compiled fills are bounded both by count and by their total number of coordinates
+# (16 bytes each), which keeps the cache below roughly 64 MB of coordinate data.
+_texture_cache = LRUCache(4096, 4_000_000, shapely.get_num_coordinates)
+
+
+def set_texture_cache_size(maxsize: int, maxcoords: int | None = None):
+    """Sets the maximum number of cached texture fills and, optionally, their total coordinates."""
+    _texture_cache.maxsize = maxsize
+    if maxcoords is not None:
+        _texture_cache.maxweight = maxcoords
+
+
+def clear_texture_cache():
+    _texture_cache.clear()
+
+
+def texture_cache_info() -> CacheInfo:
+    return _texture_cache.info()
 
 
 class Texture:
     """
     Base class for a texture, which is a 2D skin that can be applied to any Polygon.
+
+    Compiled fills are cached by the texture parameters and the projected polygon, so
+    recompiling an unchanged shape skips fill generation entirely.
     """
 
     def __init__(self, layer=1) -> None:
         self._layer = layer
 
-    @abstractmethod
     def compile(
         self, polygon2d: shapely.Polygon, render_context: RenderContext
     ) -> RenderableGeometry:
         """Compiles the texture for rendering."""
+        key = (
+            type(self),
+            self._parameters(),
+            hashlib.blake2b(shapely.to_wkb(polygon2d), digest_size=16).digest(),
+        )
+        stats = active_stats()
+        fill = _texture_cache.get(key)
+        if fill is None:
+            start = perf_counter()
+            fill = self._compile_fill(polygon2d)
+            _texture_cache.put(key, fill)
+            if stats is not None:
+                stats.add_time("texture", perf_counter() - start)
+                stats.count("texture_cache_misses")
+        elif stats is not None:
+            stats.count("texture_cache_hits")
+
+        return RenderableGeometry(fill, self._layer)
+
+    @abstractmethod
+    def _compile_fill(self, polygon2d: shapely.Polygon) -> shapely.Geometry:
+        """Generates the fill geometry for the given projected polygon."""
+
+    @abstractmethod
+    def _parameters(self) -> tuple:
+        """Returns the parameters that determine the generated fill."""
 
     @property
     def layer(self) -> int:
@@ -45,27 +95,51 @@ class HatchTexture(Texture):
         self._angle = angle
         self._inset = inset
 
-    def compile(
-        self, polygon2d: shapely.Polygon, render_context: RenderContext
-    ) -> RenderableGeometry:
+    def _compile_fill(self, polygon2d: shapely.Polygon) -> shapely.Geometry:
         fill_clip = (
             polygon2d if self._inset == 0 else polygon2d.buffer(self._inset * -1)
         )
-        fill = hatch_fill(fill_clip, self._pitch, self._angle)
-        return RenderableGeometry(fill, self._layer)
+        return hatch_fill(fill_clip, self._pitch, self._angle)
+
+    def _parameters(self) -> tuple:
+        return (self._pitch, self._angle, self._inset)
 
 
 class FillTexture(Texture):
-    def __init__(self, pen_width=0.5, inset=-0, layer=1) -> None:
+    """Fills a polygon solid with strokes spaced by the width of the pen.
+
+    Parameters
+    ----------
+    pen_width : float
+        The width of the pen, which is the spacing between fill strokes.
+    inset : float
+        The distance by which the fill is inset from the polygon outline.
+    layer : int
+        The layer of the fill strokes.
+    style : str
+        "zigzag" for horizontal rows joined into zig-zag strokes, or "concentric" for rings
+        inset from the outline.
+    tolerance : float | None
+        When set, strokes are simplified by this fraction of the pen width.
+    """
+
+    def __init__(
+        self, pen_width=0.5, inset=-0, layer=1, style="zigzag", tolerance: float | None = None
+    ) -> None:
         super().__init__(layer)
+        if style not in PEN_FILL_STYLES:
+            raise ValueError(f"Unsupported fill style: {style}")
+
         self._pen_width = pen_width
         self._inset = inset
+        self._style = style
+        self._tolerance = tolerance
 
-    def compile(
-        self, polygon2d: shapely.Polygon, render_context: RenderContext
-    ) -> RenderableGeometry:
+    def _compile_fill(self, polygon2d: shapely.Polygon) -> shapely.Geometry:
         fill_clip = (
             polygon2d if self._inset == 0 else polygon2d.buffer(self._inset * -1)
         )
-        fill = generate_fill(fill_clip, self._pen_width, 1.0).as_mls()
-        return RenderableGeometry(fill, self._layer)
+        return pen_fill(fill_clip, self._pen_width, self._style, 1.0, self._tolerance)
+
+    def _parameters(self) -> tuple:
+        return (self._pen_width, self._inset, self._style, self._tolerance)
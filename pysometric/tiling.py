@@ -0,0 +1,200 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import IO, TYPE_CHECKING
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from .depth import renderable_vertex_array
+from .layers import batch_by_layer
+from .render import RenderableGeometry, RenderContext, line_parts, project_bounds
+from .scene import DIMETRIC_ANGLE, Scene, render_to_sketch
+from .shape import Renderable
+from .svg import SVG_PRECISION, write_svg
+from .vector import Vector2
+
+if TYPE_CHECKING:
+    import vsketch
+
+
+def _compile_tile(
+    tile: shapely.Polygon,
+    children: list[Renderable],
+    frame: shapely.Polygon,
+    grid_pitch: float,
+    origin: Vector2,
+    margin: float,
+    scene_options: dict,
+) -> list[RenderableGeometry]:
+    """Compiles the children touching a tile and returns the line work inside the tile.
+
+    Shapes are clipped and occluded against the tile grown by `margin`, so that the edges
+    introduced by clipping at the seams between tiles fall outside the tile and are cut away
+    with everything else beyond it. The grown tile is kept within the scene's `frame`, so the
+    edges drawn where shapes are clipped by the frame itself are kept, as in Scene. Polygons
+    are converted to their outlines, which is what gets drawn.
+
+    Defined at module level so that it can be dispatched to a process pool.
+    """
+    min_x, min_y, max_x, max_y = tile.bounds
+    clip_frame = shapely.intersection(
+        shapely.box(min_x - margin, min_y - margin, max_x + margin, max_y + margin), frame
+    )
+    scene = Scene(clip_frame, grid_pitch, children, origin, True, **scene_options)
+
+    lines = []
+    for renderable in scene.compile():
+        geometry = _line_work(shapely.intersection(_line_work(renderable.geometry), tile))
+        if not geometry.is_empty:
+            lines.append(RenderableGeometry(geometry, renderable.layer))
+
+    return lines
+
+
+def _line_work(geometry: shapely.Geometry) -> shapely.MultiLineString:
+    """Reduces any geometry to the lines that draw it: polygons become their outlines."""
+    return shapely.multilinestrings(line_parts(geometry))
+
+
+def _stitch(
+    renderables: list[RenderableGeometry], seams: shapely.Geometry
+) -> list[RenderableGeometry]:
+    """Joins the line pieces that were split where they crossed the seams between tiles.
+
+    Pieces ending on a seam are merged per layer, and all other lines are kept as they are.
+    """
+    kept = []
+    pieces: dict[int, list[shapely.Geometry]] = {}
+    for renderable in renderables:
+        parts = shapely.get_parts(renderable.geometry)
+        touching = shapely.intersects(shapely.boundary(parts), seams)
+
+        if touching.any():
+            pieces.setdefault(renderable.layer, []).extend(parts[touching])
+            rest = parts[~touching]
+            if len(rest) > 0:
+                kept.append(RenderableGeometry(shapely.multilinestrings(rest), renderable.layer))
+        else:
+            kept.append(renderable)
+
+    for layer, layer_pieces in pieces.items():
+        merged = shapely.line_merge(shapely.union_all(layer_pieces))
+        kept.append(RenderableGeometry(merged, layer))
+
+    return kept
+
+
+class TiledScene:
+    """Compiles a very large scene as a grid of independent tiles.
+
+    The frame is split into `rows` x `columns` tiles. Each tile only compiles and occludes
+    the children whose projected bounds touch it, found with a spatial index, so peak memory
+    and occlusion cost depend on the tile size rather than on the whole scene. Tiles may be
+    compiled concurrently, and lines crossing tile seams are merged back together.
+
+    Other options are passed on to the Scene compiled for each tile. The result consists of
+    line work only: polygons are replaced by their visible outlines.
+    """
+
+    def __init__(
+        self,
+        frame: shapely.Polygon,
+        grid_pitch: float,
+        children: list[Renderable],
+        rows: int,
+        columns: int,
+        origin="centroid",
+        **scene_options,
+    ) -> None:
+        self.render_context = RenderContext(frame, grid_pitch, DIMETRIC_ANGLE, origin)
+        self._children = children
+        self._rows = rows
+        self._columns = columns
+        self._scene_options = scene_options
+
+    @property
+    def children(self) -> list[Renderable]:
+        return self._children
+
+    @property
+    def tiles(self) -> list[shapely.Polygon]:
+        """The non-empty tiles of the frame, row by row."""
+        min_x, min_y, max_x, max_y = self.render_context.frame_bounds
+        xs = np.linspace(min_x, max_x, self._columns + 1)
+        ys = np.linspace(min_y, max_y, self._rows + 1)
+        boxes = shapely.box(xs[:-1], ys[:-1, np.newaxis], xs[1:], ys[1:, np.newaxis]).ravel()
+        if not self.render_context.frame_is_rectangle:
+            boxes = shapely.intersection(boxes, self.render_context.frame)
+
+        return [tile for tile in boxes if not tile.is_empty]
+
+    def compile(
+        self, workers: int | None = None, executor: Executor | None = None
+    ) -> list[RenderableGeometry]:
+        """Compile every tile and stitch the results together.
+
+        Like Scene.compile, tiles run on a thread pool of `workers` threads or on the given
+        executor, and the result does not depend on scheduling.
+        """
+        tiles = self.tiles
+        min_x, min_y, max_x, max_y = self.render_context.frame_bounds
+        margin = 0.01 * max(max_x - min_x, max_y - min_y) / max(self._rows, self._columns)
+
+        # Index the projected bounds of every child to find those touching each tile
+        bounds = project_bounds(
+            [renderable_vertex_array(child) for child in self._children], self.render_context
+        )
+        indexed = np.flatnonzero(~np.isnan(bounds).any(axis=1))
+        tree = STRtree(shapely.box(*bounds[indexed].T))
+        tile_children = []
+        for tile in tiles:
+            hits = np.sort(indexed[tree.query(shapely.buffer(shapely.envelope(tile), margin))])
+            tile_children.append([self._children[i] for i in hits])
+
+        compile_tile = partial(
+            _compile_tile,
+            frame=self.render_context.frame,
+            grid_pitch=self.render_context.grid_pitch,
+            origin=self.render_context.origin,
+            margin=margin,
+            scene_options=self._scene_options,
+        )
+        if executor is not None:
+            results = list(executor.map(compile_tile, tiles, tile_children))
+        elif workers is not None and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(compile_tile, tiles, tile_children))
+        else:
+            results = list(map(compile_tile, tiles, tile_children))
+
+        seams = shapely.difference(
+            shapely.union_all([shapely.boundary(tile) for tile in tiles]),
+            shapely.boundary(self.render_context.frame),
+        )
+        return _stitch([r for result in results for r in result], seams)
+
+    def render(
+        self,
+        vsk: "vsketch.Vsketch",
+        workers: int | None = None,
+        executor: Executor | None = None,
+        merge_lines: bool = False,
+        sort_paths: bool = False,
+    ):
+        """Compile and render the tiled scene to the given sketch, in one batch per layer."""
+        renderables = batch_by_layer(self.compile(workers, executor), merge_lines, sort_paths)
+        render_to_sketch(renderables, vsk)
+
+    def write_svg(
+        self,
+        file: str | IO[str],
+        precision: int = SVG_PRECISION,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        merge_lines: bool = False,
+        sort_paths: bool = False,
+    ):
+        """Compile the tiled scene and write it to an SVG file or text stream, grouped by layer."""
+        renderables = batch_by_layer(self.compile(workers, executor), merge_lines, sort_paths)
+        write_svg(renderables, file, self.render_context.frame_bounds, precision)
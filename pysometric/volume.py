@@ -1,45 +1,81 @@
-from functools import cmp_to_key
-
-import shapely
+import numpy as np
 
 from pysometric.render import RenderableGeometry
 from pysometric.scene import RenderContext
 from pysometric.shape import Renderable
 
+from .collection import (
+    FaceCollection,
+    _column,
+    box_collection,
+    prism_collection,
+    pyramid_collection,
+)
+from .depth import sort_back_to_front
 from .plane import Plane
-from .render import RenderableGeometry, project_point
+from .render import RenderableGeometry
 from .shape import Group, Polygon, Rectangle, RegularPolygon
+from .texture import Texture
 from .vector import Vector3
 
 
 def _sort_visually(
     polygons: list[Polygon], render_context: RenderContext
 ) -> list[Polygon]:
-    def zsort(p0: tuple[shapely.Polygon, Polygon], p1: tuple[shapely.Polygon, Polygon]):
-        # Determine which geometry is visually lower on the 2D y-axis, which
-        # means it should be drawn first because it appears closer to the viewer
-        _, _, _, ymax0 = shapely.bounds(p0[0])
-        _, _, _, ymax1 = shapely.bounds(p1[0])
-
-        if ymax0 < ymax1:
-            return -1
-
-        if ymax0 > ymax1:
-            return 1
-
-        return 0
-
-    polygons2d = [
-        (
-            shapely.Polygon(
-                list(map(lambda v: project_point(v, render_context), p.vertices))
-            ),
-            p,
-        )
-        for p in polygons
-    ]
+    # Faces that reach lower on the 2D y-axis appear closer to the viewer, so they
+    # are drawn last
+    return sort_back_to_front(
+        polygons, [p.vertex_array for p in polygons], render_context
+    )
+
+
+def _cull_back_faces(
+    faces: list[Polygon], render_context: RenderContext
+) -> list[Polygon]:
+    """Removes the faces of a closed convex volume that face away from the viewer.
+
+    Such faces are always hidden behind the front of the volume, so skipping them saves
+    compiling their textures only for the occlusion pass to remove them again. Faces seen
+    exactly edge-on are kept.
+    """
+    vertex_arrays = [face.vertex_array for face in faces]
+    center = np.concatenate(vertex_arrays).mean(axis=0)
+    view_direction = render_context.view_direction
+
+    visible = []
+    for face, vertices in zip(faces, vertex_arrays):
+        # Newell's method gives a normal that is robust for any planar polygon
+        following = np.roll(vertices, -1, axis=0)
+        normal = np.cross(vertices, following).sum(axis=0)
+        if np.dot(normal, vertices.mean(axis=0) - center) < 0:
+            normal = -normal
 
-    return list(map(lambda p: p[1], sorted(polygons2d, key=cmp_to_key(zsort))))
+        tolerance = 1e-9 * np.linalg.norm(normal) * np.linalg.norm(view_direction)
+        if np.dot(normal, view_direction) >= -tolerance:
+            visible.append(face)
+
+    return visible
+
+
+def _face_options(
+    faces: list[dict], count: int
+) -> tuple[np.ndarray, np.ndarray, list[list[Texture]]]:
+    """Turns the options of each face shared by many volumes into per-face layer and
+    texture set id arrays, along with the texture sets.
+
+    A face's "layer" may be a single layer or an array with a layer per volume.
+    """
+    layers = np.empty((count, len(faces)), dtype=np.int64)
+    texture_ids = np.full((1, len(faces)), -1)
+    texture_sets = []
+    for i, face in enumerate(faces):
+        layer = face.get("layer")
+        layers[:, i] = 1 if layer is None else layer
+        if face.get("textures"):
+            texture_ids[0, i] = len(texture_sets)
+            texture_sets.append(list(face["textures"]))
+
+    return layers, texture_ids, texture_sets
 
 
 class Box(Group):
@@ -87,6 +123,32 @@ class Box(Group):
 
         super().__init__([left_plane, right_plane, top_plane])
 
+    @classmethod
+    def many(
+        cls,
+        origins: np.ndarray,
+        widths: np.ndarray | float = 1,
+        depths: np.ndarray | float = 1,
+        heights: np.ndarray | float = 1,
+        top: dict = {},
+        left: dict = {},
+        right: dict = {},
+    ) -> FaceCollection:
+        """Builds many boxes at once from an (N, 3) array of origins.
+
+        Dimensions are given per box as arrays, or shared by all boxes. The face options are
+        those of Box and apply to every box. The faces of all boxes are computed in a few
+        array operations and returned as a FaceCollection, which draws the boxes back to
+        front.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        count = len(origins)
+        sizes = np.column_stack(
+            [_column(values, count, np.float64) for values in (widths, depths, heights)]
+        )
+        layers, texture_ids, texture_sets = _face_options([top, left, right], count)
+        return box_collection(origins, sizes, layers, texture_ids, texture_sets)
+
 
 class Pyramid(Group):
     def __init__(
@@ -104,8 +166,8 @@ class Pyramid(Group):
         self._bottom_face = Rectangle(origin, width, depth, Plane.XY)
         self._side_faces = []
         for i in range(4):
-            v0 = self._bottom_face.vertices[i]
-            v1 = self._bottom_face.vertices[(i + 1) % 4]
+            v0 = self._bottom_face.vertex_array[i]
+            v1 = self._bottom_face.vertex_array[(i + 1) % 4]
             textures = sides[i].get("textures") or [] if len(sides) > i else []
             self._side_faces.append(
                 Polygon([v0, v1, peak], textures, [], layer)
@@ -113,12 +175,36 @@ class Pyramid(Group):
 
         super().__init__([self._bottom_face] + self._side_faces)
 
-    def compile(self, render_context: RenderContext) -> list[RenderableGeometry]:
-        self._children = [self._bottom_face] + _sort_visually(
-            self._side_faces, render_context
+    @classmethod
+    def many(
+        cls,
+        origins: np.ndarray,
+        widths: np.ndarray | float = 1,
+        depths: np.ndarray | float = 1,
+        heights: np.ndarray | float = 1,
+        sides: dict = {},
+        layers: np.ndarray | int = 1,
+    ) -> FaceCollection:
+        """Builds many pyramids at once from an (N, 3) array of origins.
+
+        Dimensions and layers are given per pyramid as arrays, or shared by all pyramids.
+        Unlike Pyramid, `sides` holds a single dict of options applied to every side face.
+        The faces of all pyramids are returned as a FaceCollection, which draws the
+        pyramids back to front.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        count = len(origins)
+        sizes = np.column_stack(
+            [_column(values, count, np.float64) for values in (widths, depths, heights)]
         )
+        _, texture_ids, texture_sets = _face_options([sides], count)
+        return pyramid_collection(origins, sizes, layers, texture_ids, texture_sets)
 
-        return super().compile(render_context)
+    def draw_order(self, render_context: RenderContext) -> list[Polygon]:
+        return _cull_back_faces(
+            [self._bottom_face] + _sort_visually(self._side_faces, render_context),
+            render_context,
+        )
 
 
 class Prism(Group):
@@ -158,15 +244,39 @@ class Prism(Group):
             textures = sides[i].get("textures") or [] if len(sides) > i else []
             layer = sides[i].get("layer") or 1 if len(sides) > i else 1
             vertices = [
-                self._top_face.vertices[i],
-                self._top_face.vertices[j],
-                self._bottom_face.vertices[j],
-                self._bottom_face.vertices[i],
+                self._top_face.vertex_array[i],
+                self._top_face.vertex_array[j],
+                self._bottom_face.vertex_array[j],
+                self._bottom_face.vertex_array[i],
             ]
             self._side_faces.append(Polygon(vertices, textures, [], layer))
 
         super().__init__([self._bottom_face] + self._side_faces + [self._top_face])
 
+    @classmethod
+    def many(
+        cls,
+        origins: np.ndarray,
+        num_sides: np.ndarray | int,
+        radii: np.ndarray | float = 1,
+        heights: np.ndarray | float = 1,
+        top: dict = {},
+        bottom: dict = {},
+        sides: dict = {},
+    ) -> FaceCollection:
+        """Builds many prisms at once from an (N, 3) array of origins.
+
+        Side counts, radii and heights are given per prism as arrays, or shared by all
+        prisms. Unlike Prism, `sides` holds a single dict of options applied to every side
+        face, and rotations are not supported. The faces of all prisms are returned as a
+        FaceCollection, which draws the prisms back to front.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        layers, texture_ids, texture_sets = _face_options([top, bottom, sides], len(origins))
+        return prism_collection(
+            origins, num_sides, radii, heights, layers, texture_ids, texture_sets
+        )
+
     @property
     def faces(self):
         return [self._bottom_face] + self._side_faces + [self._top_face]
@@ -183,11 +293,10 @@ class Prism(Group):
     def side_faces(self):
         return self._side_faces
 
-    def compile(self, render_context: RenderContext) -> list[RenderableGeometry]:
-        self._children = (
+    def draw_order(self, render_context: RenderContext) -> list[Polygon]:
+        return _cull_back_faces(
             [self._bottom_face]
             + _sort_visually(self._side_faces, render_context)
-            + [self._top_face]
+            + [self._top_face],
+            render_context,
         )
-
-        return super().compile(render_context)